@@ -1,34 +1,37 @@
 from flask import Blueprint, request, jsonify
-from models import db, User, Salon, Stylist, Service, Review, SalonReview
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, User, Salon, Stylist, Service, Review, SalonReview, adjust_rating
+from pagination import paginate, paginated_response
+from authz import admin_required, revoke_user_tokens
+from cache import catalog_cache, invalidate_catalog
+from export import export_response, parse_date_arg, EXPORTS, FORMATS
+from reporting import daily_report, default_range, DIMENSIONS
+from geo import parse_coordinates
 
 admin_bp = Blueprint('admin', __name__)
 
 @admin_bp.before_request
-@jwt_required()
+@admin_required
 def check_admin():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
+    """Every endpoint of this blueprint needs an admin token."""
 
 # User management
 @admin_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([{
+    users, next_cursor = paginate(User.query, User.id)
+    return paginated_response([{
         'id': user.id,
         'username': user.username,
         'email': user.email,
         'is_admin': user.is_admin,
         'is_blocked': user.is_blocked,
         'created_at': user.created_at
-    } for user in users]), 200
+    } for user in users], next_cursor)
 
 @admin_bp.route('/users/<int:user_id>/block', methods=['PUT'])
 def block_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_blocked = True
+    revoke_user_tokens(user)
     db.session.commit()
     return jsonify({"message": "User blocked successfully"}), 200
 
@@ -36,6 +39,7 @@ def block_user(user_id):
 def unblock_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_blocked = False
+    revoke_user_tokens(user)
     db.session.commit()
     return jsonify({"message": "User unblocked successfully"}), 200
 
@@ -46,15 +50,25 @@ def create_salon():
     required_fields = ['name', 'location', 'contact']
     if not all(field in data for field in required_fields):
         return jsonify({"error": "Missing required fields"}), 400
+
+    latitude = longitude = None
+    if data.get('latitude') is not None or data.get('longitude') is not None:
+        try:
+            latitude, longitude = parse_coordinates(data.get('latitude'), data.get('longitude'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
     
     new_salon = Salon(
         name=data['name'],
         location=data['location'],
         contact=data['contact'],
-        description=data.get('description', '')
+        description=data.get('description', ''),
+        latitude=latitude,
+        longitude=longitude
     )
     
     db.session.add(new_salon)
+    invalidate_catalog()
     db.session.commit()
     
     return jsonify({
@@ -66,6 +80,20 @@ def create_salon():
         }
     }), 201
 
+@admin_bp.route('/salons/<int:salon_id>/location', methods=['PUT'])
+def update_salon_location(salon_id):
+    salon = Salon.query.get_or_404(salon_id)
+    data = request.get_json() or {}
+    try:
+        salon.latitude, salon.longitude = parse_coordinates(data.get('latitude'), data.get('longitude'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if data.get('location'):
+        salon.location = data['location']
+    invalidate_catalog()
+    db.session.commit()
+    return jsonify({"message": "Salon location updated", "salon": salon.to_dict()}), 200
+
 # Stylist management
 @admin_bp.route('/stylists', methods=['POST'])
 def create_stylist():
@@ -82,6 +110,7 @@ def create_stylist():
     )
     
     db.session.add(new_stylist)
+    invalidate_catalog()
     db.session.commit()
     
     return jsonify({
@@ -110,6 +139,7 @@ def create_service():
     )
     
     db.session.add(new_service)
+    invalidate_catalog()
     db.session.commit()
     
     return jsonify({
@@ -122,30 +152,65 @@ def create_service():
     }), 201
 
 # Review management
+def set_review_hidden(review_model, review_id, owner_model, owner_id_column, hidden):
+    """Hide or show a review, keeping its owner's rating aggregate in step.
+
+    The flip is a conditional UPDATE so that of two concurrent requests only
+    the one that actually changed the row adjusts the aggregate.
+    """
+    review = review_model.query.get_or_404(review_id)
+    changed = review_model.query.filter_by(id=review_id, is_hidden=not hidden).update(
+        {review_model.is_hidden: hidden}
+    )
+    if changed == 1:
+        adjust_rating(owner_model, getattr(review, owner_id_column), review.rating, -1 if hidden else 1)
+    invalidate_catalog()
+    db.session.commit()
+
 @admin_bp.route('/reviews/stylist/<int:review_id>/hide', methods=['PUT'])
 def hide_stylist_review(review_id):
-    review = Review.query.get_or_404(review_id)
-    review.is_hidden = True
-    db.session.commit()
+    set_review_hidden(Review, review_id, Stylist, 'stylist_id', True)
     return jsonify({"message": "Review hidden successfully"}), 200
 
 @admin_bp.route('/reviews/stylist/<int:review_id>/show', methods=['PUT'])
 def show_stylist_review(review_id):
-    review = Review.query.get_or_404(review_id)
-    review.is_hidden = False
-    db.session.commit()
+    set_review_hidden(Review, review_id, Stylist, 'stylist_id', False)
     return jsonify({"message": "Review made visible successfully"}), 200
 
 @admin_bp.route('/reviews/salon/<int:review_id>/hide', methods=['PUT'])
 def hide_salon_review(review_id):
-    review = SalonReview.query.get_or_404(review_id)
-    review.is_hidden = True
-    db.session.commit()
+    set_review_hidden(SalonReview, review_id, Salon, 'salon_id', True)
     return jsonify({"message": "Review hidden successfully"}), 200
 
 @admin_bp.route('/reviews/salon/<int:review_id>/show', methods=['PUT'])
 def show_salon_review(review_id):
-    review = SalonReview.query.get_or_404(review_id)
-    review.is_hidden = False
-    db.session.commit()
-    return jsonify({"message": "Review made visible successfully"}), 200
\ No newline at end of file
+    set_review_hidden(SalonReview, review_id, Salon, 'salon_id', False)
+    return jsonify({"message": "Review made visible successfully"}), 200
+
+# Cache statistics (for this worker)
+@admin_bp.route('/cache', methods=['GET'])
+def get_cache_stats():
+    return jsonify({"catalog": catalog_cache.stats()}), 200
+
+# Streaming exports, e.g. /export/appointments?format=csv&from=2025-01-01&salon_id=1&gzip=true
+@admin_bp.route('/export/<name>', methods=['GET'])
+def export(name):
+    if name not in EXPORTS:
+        return jsonify({"error": f"Unknown export, expected one of: {', '.join(EXPORTS)}"}), 404
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unknown format, expected one of: {', '.join(FORMATS)}"}), 400
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true')
+    return export_response(name, fmt, compress)
+
+# Daily rollup reports, e.g. /reports/salon?from=2025-01-01&to=2025-01-31&id=1
+@admin_bp.route('/reports/<dimension>', methods=['GET'])
+def get_report(dimension):
+    if dimension not in DIMENSIONS:
+        return jsonify({"error": f"Unknown report, expected one of: {', '.join(DIMENSIONS)}"}), 404
+    default_from, default_to = default_range()
+    date_from = parse_date_arg('from') or default_from
+    date_to = parse_date_arg('to') or default_to
+    if date_from > date_to:
+        return jsonify({"error": "'from' must not be after 'to'"}), 400
+    return jsonify(daily_report(dimension, date_from, date_to, request.args.get('id', type=int))), 200
@@ -8,6 +8,8 @@ from datetime import timedelta
 import os
 from dotenv import load_dotenv
 from models import db  # Your SQLAlchemy instance
+from replicas import replica_binds, init_replicas
+from jsonprovider import init_json
 
 # Load environment variables from .env
 load_dotenv()
@@ -23,6 +25,7 @@ def create_app():
     # App configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///salon.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(os.getenv('DATABASE_REPLICA_URLS', ''))
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'super-secret-key')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
     app.config['JWT_COOKIE_CSRF_PROTECT'] = False
@@ -39,7 +42,77 @@ def create_app():
     app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
     app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
     app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_USERNAME')
+
+    # Outbox worker configuration (see mailer.py)
+    app.config['MAIL_OUTBOX_BATCH_SIZE'] = int(os.getenv('MAIL_OUTBOX_BATCH_SIZE', 50))
+    app.config['MAIL_OUTBOX_MAX_ATTEMPTS'] = int(os.getenv('MAIL_OUTBOX_MAX_ATTEMPTS', 5))
+    app.config['MAIL_OUTBOX_RETRY_DELAY'] = int(os.getenv('MAIL_OUTBOX_RETRY_DELAY', 30))  # seconds
  
+    # Claims-based authorization (see authz.py)
+    app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 30))  # seconds
+    app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', 10000))
+    app.config['JWT_REVOCATION_REFRESH'] = float(os.getenv('JWT_REVOCATION_REFRESH', 2))  # seconds
+    app.config['JWT_REVOCATION_OVERLAP'] = int(os.getenv('JWT_REVOCATION_OVERLAP', 60))  # seconds re-read per refresh
+    app.config['JWT_REVOCATION_PRUNE_INTERVAL'] = int(os.getenv('JWT_REVOCATION_PRUNE_INTERVAL', 600))  # seconds
+
+    # Password hashing (see passwords.py)
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')  # scrypt or pbkdf2
+    app.config['PASSWORD_HASH_COST'] = int(os.getenv('PASSWORD_HASH_COST', 32768))  # scrypt N or pbkdf2 iterations
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 2))  # 0 hashes on the request thread
+    app.config['PASSWORD_HASH_QUEUE_DEPTH'] = int(os.getenv('PASSWORD_HASH_QUEUE_DEPTH', 8))
+
+    # Pagination (see pagination.py)
+    app.config['PAGINATION_DEFAULT_LIMIT'] = int(os.getenv('PAGINATION_DEFAULT_LIMIT', 50))
+    app.config['PAGINATION_MAX_LIMIT'] = int(os.getenv('PAGINATION_MAX_LIMIT', 200))
+
+    # Streaming exports (see export.py)
+    app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', 1000))  # rows fetched per round trip
+
+    # Per-request SQL instrumentation (see instrumentation.py)
+    app.config['SQL_INSTRUMENTATION'] = os.getenv('SQL_INSTRUMENTATION', 'false').lower() == 'true'
+    app.config['SQL_SLOW_REQUEST_MS'] = float(os.getenv('SQL_SLOW_REQUEST_MS', 500))
+    app.config['SQL_REPEATED_STATEMENT_THRESHOLD'] = int(os.getenv('SQL_REPEATED_STATEMENT_THRESHOLD', 5))
+
+    # Read replicas (see replicas.py)
+    app.config['REPLICA_READ_AFTER_WRITE'] = float(os.getenv('REPLICA_READ_AFTER_WRITE', 10))  # seconds on the primary after a write
+    app.config['REPLICA_HEALTH_INTERVAL'] = float(os.getenv('REPLICA_HEALTH_INTERVAL', 5))  # seconds
+    app.config['REPLICA_MAX_LAG'] = float(os.getenv('REPLICA_MAX_LAG', 30))  # seconds (PostgreSQL)
+
+    # Prometheus metrics at /metrics (see metrics.py)
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+    # Addresses or networks allowed to scrape, comma-separated
+    app.config['METRICS_ALLOWED_IPS'] = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+
+    # Image uploads and their variants (see uploads.py and storage.py)
+    app.config['UPLOAD_STORAGE'] = os.getenv('UPLOAD_STORAGE', 'local')
+    app.config['UPLOAD_ROOT'] = os.getenv('UPLOAD_ROOT', os.path.join(app.root_path, 'static', 'uploads'))
+    app.config['UPLOAD_BASE_URL'] = os.getenv('UPLOAD_BASE_URL', '/api/media/files')
+    app.config['UPLOAD_TMP_DIR'] = os.getenv('UPLOAD_TMP_DIR')  # None uses the system temp directory
+    app.config['UPLOAD_MAX_BYTES'] = int(os.getenv('UPLOAD_MAX_BYTES', 10 * 1024 * 1024))
+    app.config['UPLOAD_CHUNK_SIZE'] = int(os.getenv('UPLOAD_CHUNK_SIZE', 64 * 1024))
+    app.config['UPLOAD_MAX_PIXELS'] = int(os.getenv('UPLOAD_MAX_PIXELS', 40_000_000))
+    app.config['UPLOAD_VARIANT_QUALITY'] = int(os.getenv('UPLOAD_VARIANT_QUALITY', 80))
+    app.config['UPLOAD_VARIANT_THREADS'] = int(os.getenv('UPLOAD_VARIANT_THREADS', 1))  # 0 leaves variants to `flask uploads run`
+    app.config['UPLOAD_VARIANT_BATCH_SIZE'] = int(os.getenv('UPLOAD_VARIANT_BATCH_SIZE', 20))
+    app.config['UPLOAD_VARIANT_MAX_ATTEMPTS'] = int(os.getenv('UPLOAD_VARIANT_MAX_ATTEMPTS', 3))
+    app.config['UPLOAD_VARIANT_RETRY_DELAY'] = int(os.getenv('UPLOAD_VARIANT_RETRY_DELAY', 30))  # seconds
+    app.config['UPLOAD_CACHE_MAX_AGE'] = int(os.getenv('UPLOAD_CACHE_MAX_AGE', 31536000))  # seconds; file URLs never change content
+    app.config['UPLOAD_SENDFILE'] = os.getenv('UPLOAD_SENDFILE', '')  # '', 'x-sendfile' (Apache, lighttpd) or 'x-accel-redirect' (nginx)
+    app.config['UPLOAD_ACCEL_PREFIX'] = os.getenv('UPLOAD_ACCEL_PREFIX', '/_uploads')  # nginx internal location for UPLOAD_ROOT
+
+    # JSON encoding and response compression (see jsonprovider.py and compression.py)
+    app.config['JSON_PROVIDER'] = os.getenv('JSON_PROVIDER', 'auto')  # auto (orjson if installed), orjson or stdlib
+    app.config['COMPRESS_ENABLED'] = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # bytes
+    app.config['COMPRESS_GZIP_LEVEL'] = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))  # 1-9
+    app.config['COMPRESS_BROTLI_LEVEL'] = int(os.getenv('COMPRESS_BROTLI_LEVEL', 4))  # 0-11
+
+    # Catalog response cache (see cache.py)
+    app.config['CATALOG_CACHE_ENABLED'] = os.getenv('CATALOG_CACHE_ENABLED', 'true').lower() == 'true'
+    app.config['CATALOG_CACHE_SIZE'] = int(os.getenv('CATALOG_CACHE_SIZE', 512))
+    app.config['CATALOG_CACHE_TTL'] = int(os.getenv('CATALOG_CACHE_TTL', 60))  # seconds
+    app.config['CATALOG_CACHE_VERSION_CHECK'] = float(os.getenv('CATALOG_CACHE_VERSION_CHECK', 1))  # seconds
+
     # Initialize CORS
     CORS(app, 
      supports_credentials=True,
@@ -47,8 +120,8 @@ def create_app():
          r"/api/*": {
              "origins": ["http://localhost:5173", "http://127.0.0.1:5173"],
              "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-             "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
-             "expose_headers": ["Content-Type", "Authorization"],
+             "allow_headers": ["Content-Type", "Authorization", "X-Requested-With", "If-None-Match", "If-Modified-Since"],
+             "expose_headers": ["Content-Type", "Authorization", "X-Next-Cursor", "Link", "ETag", "Last-Modified", "Content-Disposition"],
              "max_age": 86400
          }
      })
@@ -58,6 +131,21 @@ def create_app():
     jwt.init_app(app)
     migrate.init_app(app, db)
     mail.init_app(app)
+    init_replicas(app)
+    init_json(app)
+
+    if app.config['METRICS_ENABLED']:
+        from metrics import init_metrics
+        init_metrics(app, jwt)
+
+    if app.config['SQL_INSTRUMENTATION']:
+        from instrumentation import init_sql_instrumentation
+        init_sql_instrumentation(app)
+
+    # Registered after the timing hooks so compression counts towards request latency
+    if app.config['COMPRESS_ENABLED']:
+        from compression import init_compression
+        init_compression(app)
 
     # Register blueprints
     from auth import auth_bp
@@ -65,12 +153,28 @@ def create_app():
     from stylist import stylist_bp
     from salon import salon_bp
     from admin import admin_bp
+    from media import media_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(customer_bp, url_prefix='/api/customer')
     app.register_blueprint(stylist_bp, url_prefix='/api/stylist')
     app.register_blueprint(salon_bp, url_prefix='/api/salon')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(media_bp, url_prefix='/api/media')
+
+    # Register CLI commands
+    from mailer import outbox_cli
+    from uploads import uploads_cli
+    from commands import ratings_cli, tokens_cli, reports_cli, search_cli, geo_cli, replicas_cli
+
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(uploads_cli)
+    app.cli.add_command(ratings_cli)
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(reports_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(geo_cli)
+    app.cli.add_command(replicas_cli)
 
     return app
 
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from models import db, Appointment, Stylist, Service, Salon
+from availability import load_busy_intervals, SLOT_STEP_MINUTES
+from reporting import rollup_appointments, snapshot_rollup_values
+
+# Shared read path for appointment listings: one joined query that projects
+# only the columns the listings need, instead of lazy-loading stylist,
+# service and salon for every row.
+
+
+def appointment_rows(*criteria):
+    """Query of appointment rows joined with stylist, service and salon names."""
+    return db.session.query(
+        Appointment.id,
+        Appointment.stylist_id,
+        Appointment.status,
+        Appointment.appointment_date,
+        Appointment.appointment_time,
+        Appointment.start_datetime,
+        Appointment.end_datetime,
+        Stylist.name.label('stylist_name'),
+        Service.name.label('service_name'),
+        Salon.name.label('salon_name')
+    ).outerjoin(Stylist, Appointment.stylist_id == Stylist.id) \
+     .outerjoin(Service, Appointment.service_id == Service.id) \
+     .outerjoin(Salon, Stylist.salon_id == Salon.id) \
+     .filter(*criteria)
+
+
+def _format_date(d):
+    if not d:
+        return None
+    if isinstance(d, str):
+        return d.split()[0]  # Just get date part if it's a full datetime string
+    return d.strftime('%Y-%m-%d')
+
+
+def _format_time(t):
+    if not t:
+        return None
+    if isinstance(t, str):
+        return t.split('T')[-1].split('.')[0] if ':' in t else None  # Handle ISO strings
+    return t.strftime('%H:%M:%S')
+
+
+def _format_datetime(dt):
+    if not dt:
+        return None
+    if isinstance(dt, str):
+        return dt  # Assume it's already properly formatted
+    return dt.isoformat()
+
+
+def serialize_appointment(row):
+    return {
+        "id": row.id,
+        "stylist": row.stylist_name,
+        "stylist_id": row.stylist_id,
+        "service": row.service_name,
+        "status": row.status,
+        "salon": row.salon_name,
+        "appointment_date": _format_date(row.appointment_date),
+        "appointment_time": _format_time(row.appointment_time),
+        "start_datetime": _format_datetime(row.start_datetime),
+        "end_datetime": _format_datetime(row.end_datetime)
+    }
+
+
+# Booking: the overlap check and the insert run while holding a per-stylist
+# lock, so concurrent bookings for the same stylist are serialized instead of
+# racing between the check and the insert.
+BOOKING_LOCK_CLASS = 7001  # first key of pg_advisory_xact_lock(int, int)
+
+
+class BookingConflict(Exception):
+    pass
+
+
+def lock_stylist_schedule(stylist_id):
+    """Hold a lock on the stylist's schedule until the transaction ends."""
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        connection.execute(text("SELECT pg_advisory_xact_lock(:cls, :key)"), {"cls": BOOKING_LOCK_CLASS, "key": stylist_id})
+    elif dialect == 'sqlite':
+        # SQLite only has a database-wide write lock; take it before reading so
+        # a concurrent booking waits here instead of failing on commit.
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        connection.execute(db.select(Stylist.id).where(Stylist.id == stylist_id).with_for_update())
+
+
+def book_appointment(customer_id, stylist, service, start, notes=None):
+    """Add an appointment for `service` at `start` unless it overlaps another
+    appointment of the stylist. Raises BookingConflict; the caller commits."""
+    end = start + timedelta(minutes=service.duration or SLOT_STEP_MINUTES)
+
+    lock_stylist_schedule(stylist.id)
+    if load_busy_intervals([stylist.id], start, end)[stylist.id]:
+        raise BookingConflict()
+
+    appointment = Appointment(
+        customer_id=customer_id,
+        stylist_id=stylist.id,
+        service_id=service.id,
+        appointment_date=start.date(),
+        appointment_time=start.time(),
+        start_datetime=start,
+        end_datetime=end,
+        status='pending',
+        notes=notes,
+        **snapshot_rollup_values(stylist, service)
+    )
+    db.session.add(appointment)
+    db.session.flush()
+    rollup_appointments(Appointment.id == appointment.id)
+    return appointment
@@ -1,23 +1,19 @@
-from flask import Blueprint, current_app, request, jsonify
+from flask import Blueprint, request, jsonify
 from models import db, User, TokenBlocklist,Stylist
-from werkzeug.security import check_password_hash
+from passwords import verify_password, needs_rehash
 from datetime import timedelta
 from flask_jwt_extended import (
     create_access_token, jwt_required,
     get_jwt_identity, get_jwt
 )
-from flask_mail import Message
-from app import mail  # Make sure `mail` is initialized in app.py or __init__.py
-from datetime import datetime, timezone
+from mailer import queue_email
+from authz import cached_user, revoke_token
 
 auth_bp = Blueprint("auth", __name__)
 
 
 @auth_bp.route("/register", methods=["POST"])
 def register():
-    print("MAIL_USERNAME:", current_app.config.get('MAIL_USERNAME'))
-    print("MAIL_PASSWORD:", current_app.config.get('MAIL_PASSWORD'))
-    
     data = request.get_json()
     username = data.get('username')
     email = data.get('email')
@@ -38,8 +34,8 @@ def register():
     db.session.add(new_user)
 
     try:
-        # Send welcome email
-        msg = Message(
+        # Queue welcome email (sent by the mail worker once committed)
+        queue_email(
             subject="Welcome to Our Salon Booking System",
             recipients=[email],
             body=f"""Hello {username},
@@ -51,7 +47,6 @@ Best regards,
 The Salon Team
 """
         )
-        mail.send(msg)
 
         db.session.commit()
 
@@ -66,7 +61,7 @@ The Salon Team
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": "Failed to register or send welcome email"}), 500
+        return jsonify({"error": "Failed to register user"}), 500
 
 
 @auth_bp.route('/login', methods=['POST', 'OPTIONS'])
@@ -83,19 +78,21 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if not user or not check_password_hash(user.password, password):
+    if not user or not verify_password(user.password, password):
         return jsonify({"error": "Invalid credentials"}), 401
 
     if user.is_blocked:
         return jsonify({"error": "Your account has been blocked. Please contact support."}), 403
 
+    # Upgrade the stored hash when the hash method or cost has changed
+    if needs_rehash(user.password):
+        user.set_password(password)
+        db.session.commit()
+
     access_token = create_access_token(
         identity=str(user.id),
         expires_delta=timedelta(hours=1),
-        additional_claims={
-            'is_admin': user.is_admin,
-            'is_stylist': user.is_stylist
-        }
+        additional_claims=user.token_claims()
     )
 
     # Base user response
@@ -128,19 +125,18 @@ def login():
 @auth_bp.route("/current_user", methods=["GET"])
 @jwt_required()
 def fetch_current_user():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = cached_user(get_jwt_identity())
 
     if not user:
         return jsonify({"error": "User not found"}), 404
 
     user_data = {
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "is_admin": user.is_admin,
-        "is_blocked": user.is_blocked,
-        "created_at": user.created_at
+        "id": user["id"],
+        "username": user["username"],
+        "email": user["email"],
+        "is_admin": user["is_admin"],
+        "is_blocked": user["is_blocked"],
+        "created_at": user["created_at"]
     }
     return jsonify(user_data), 200
 
@@ -150,15 +146,13 @@ def fetch_current_user():
 def logout():
     try:
         jti = get_jwt()["jti"]
-        now = datetime.now(timezone.utc)
         
         # Check if token is already blacklisted
         existing = TokenBlocklist.query.filter_by(jti=jti).first()
         if existing:
             return jsonify({"message": "Token already invalidated"}), 200
             
-        new_blocked_token = TokenBlocklist(jti=jti, created_at=now)
-        db.session.add(new_blocked_token)
+        revoke_token(jti)
         db.session.commit()
         return jsonify({"message": "Successfully logged out"}), 200
     except Exception as e:
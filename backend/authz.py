@@ -0,0 +1,180 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import jsonify, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+from models import db, User, TokenBlocklist
+from app import jwt
+
+# Authorization from JWT claims. auth.login puts is_admin/is_stylist and the
+# user's token_version ("ver") into the access token, so role checks need no
+# database lookup. Blocking a user or changing their roles bumps
+# User.token_version, which revokes their outstanding tokens once the
+# per-worker user cache below refreshes (USER_CACHE_TTL seconds at most).
+
+
+class UserCache:
+    """Per-worker TTL cache of small user snapshots keyed by user id."""
+
+    FIELDS = ('id', 'username', 'email', 'is_admin', 'is_stylist', 'is_blocked', 'token_version', 'created_at')
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        user_id = int(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        user = db.session.get(User, user_id)
+        snapshot = {field: getattr(user, field) for field in self.FIELDS} if user else None
+        with self._lock:
+            if len(self._entries) >= current_app.config['USER_CACHE_SIZE']:
+                self._entries.clear()
+            self._entries[user_id] = (now + current_app.config['USER_CACHE_TTL'], snapshot)
+        return snapshot
+
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+
+
+user_cache = UserCache()
+
+
+def cached_user(user_id):
+    """Snapshot dict of the user (or None), served from the per-worker cache."""
+    return user_cache.get(user_id)
+
+
+def revoke_user_tokens(user):
+    """Invalidate every token issued to `user`; call before committing a role or block change."""
+    user.token_version = (user.token_version or 0) + 1
+    user_cache.forget(user.id)
+
+
+class RevokedTokens:
+    """Per-worker set of revoked JTIs mirrored from the token_blocklist table.
+
+    New rows are pulled incrementally at most every JWT_REVOCATION_REFRESH
+    seconds, so checking a token is a set lookup rather than a query. The
+    watermark is the newest created_at seen, and each refresh re-reads the
+    last JWT_REVOCATION_OVERLAP seconds so a row that commits late with an
+    older created_at is not missed. Ids are no use as a watermark: SQLite
+    reuses them after a prune and Postgres sequence values commit out of
+    order. Re-read rows are deduplicated by jti.
+
+    Entries older than JWT_ACCESS_TOKEN_EXPIRES can no longer match a valid
+    token; they are dropped from memory and pruned from the table every
+    JWT_REVOCATION_PRUNE_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._jtis = {}  # jti -> created_at
+        self._watermark = None  # newest created_at loaded
+        self._loaded = False
+        self._refreshed_at = 0.0
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, jti, created_at):
+        with self._lock:
+            self._jtis[jti] = created_at
+
+    def __contains__(self, jti):
+        self.refresh()
+        return jti in self._jtis
+
+    def __len__(self):
+        return len(self._jtis)
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._refreshed_at < current_app.config['JWT_REVOCATION_REFRESH']:
+            return
+        # Only the first load makes other threads wait; later refreshes are
+        # skipped while another thread is already running one.
+        if not self._lock.acquire(blocking=not self._loaded):
+            return
+        try:
+            self._refreshed_at = now
+            query = db.session.query(TokenBlocklist.jti, TokenBlocklist.created_at)
+            if self._watermark is not None:
+                overlap = timedelta(seconds=current_app.config['JWT_REVOCATION_OVERLAP'])
+                query = query.filter(TokenBlocklist.created_at >= self._watermark - overlap)
+            for jti, created_at in query.all():
+                self._jtis[jti] = created_at
+                if created_at is not None and (self._watermark is None or created_at > self._watermark):
+                    self._watermark = created_at
+            self._loaded = True
+            if now - self._pruned_at >= current_app.config['JWT_REVOCATION_PRUNE_INTERVAL']:
+                self._pruned_at = now
+                self._prune()
+        finally:
+            self._lock.release()
+
+    def _prune(self):
+        cutoff = datetime.utcnow() - current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+        self._jtis = {jti: created_at for jti, created_at in self._jtis.items() if created_at is None or created_at >= cutoff}
+        prune_blocklist(cutoff)
+
+
+revoked_tokens = RevokedTokens()
+
+
+def prune_blocklist(cutoff=None):
+    """Delete blocklist rows for tokens that have expired anyway. Returns the row count.
+
+    Runs on its own connection so it never commits the request's session.
+    """
+    cutoff = cutoff or datetime.utcnow() - current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    with db.engine.begin() as connection:
+        result = connection.execute(db.delete(TokenBlocklist).where(TokenBlocklist.created_at < cutoff))
+    return result.rowcount
+
+
+def revoke_token(jti):
+    """Add a JTI to the blocklist (caller commits) and to this worker's set."""
+    now = datetime.utcnow()
+    db.session.add(TokenBlocklist(jti=jti, created_at=now))
+    revoked_tokens.add(jti, now)
+
+
+@jwt.token_in_blocklist_loader
+def check_token_revoked(jwt_header, jwt_payload):
+    if jwt_payload['jti'] in revoked_tokens:
+        return True
+    if jwt_payload.get('type') != 'access':
+        return False
+    user = cached_user(jwt_payload['sub'])
+    if user is None or user['is_blocked']:
+        return True
+    return jwt_payload.get('ver', 0) != (user['token_version'] or 0)
+
+
+def is_admin():
+    return bool(get_jwt().get('is_admin'))
+
+
+def roles_required(*roles):
+    """Require a valid token carrying at least one of the given role claims."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            claims = get_jwt()
+            if not any(claims.get(f'is_{role}') for role in roles):
+                return jsonify({"error": f"{' or '.join(role.capitalize() for role in roles)} access required"}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+admin_required = roles_required('admin')
@@ -0,0 +1,220 @@
+import re
+from datetime import datetime, time, timedelta
+
+from models import db, Appointment, Service
+
+# Availability engine: a stylist's appointments are loaded as busy intervals
+# with one range query on (stylist_id, start_datetime), merged, subtracted
+# from the salon's opening window, and the remaining free intervals are cut
+# into slots that fit the requested service duration.
+
+DEFAULT_OPENING = (time(9, 0), time(18, 0))
+SLOT_STEP_MINUTES = 30
+# Appointments are never longer than this, so an appointment overlapping the
+# start of a range must have started at most this long before it.
+MAX_APPOINTMENT_LENGTH = timedelta(hours=24)
+
+DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+_TIME_RE = re.compile(r'^\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*$', re.I)
+
+
+def _parse_time(value):
+    match = _TIME_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid time: {value}")
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or '').lower()
+    if meridiem == 'pm' and hour != 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    return time(hour, minute)
+
+
+def _expand_days(key):
+    """'Mon-Fri' -> [0..4], 'Sat' -> [5], 'Mon, Wed' -> [0, 2]."""
+    days = []
+    for part in key.split(','):
+        bounds = [DAYS.index(b.strip()[:3].lower()) for b in part.split('-')]
+        if len(bounds) == 1:
+            days.append(bounds[0])
+        else:
+            start, end = bounds
+            days.extend(d % 7 for d in range(start, end + 1 if end >= start else end + 8))
+    return days
+
+
+def opening_window(opening_hours, day):
+    """Return (open, close) times for `day`, or None when the salon is closed.
+
+    `opening_hours` is the Salon.opening_hours JSON, e.g.
+    {"Mon-Fri": "9am - 6pm", "Sat": "9am - 4pm", "Sun": "Closed"}.
+    Salons without (parseable) opening hours use 09:00-18:00.
+    """
+    if not opening_hours:
+        return DEFAULT_OPENING
+    try:
+        for key, hours in opening_hours.items():
+            if day.weekday() not in _expand_days(key):
+                continue
+            if not hours or hours.strip().lower() == 'closed':
+                return None
+            opens, closes = hours.split('-')
+            return _parse_time(opens), _parse_time(closes)
+    except (ValueError, AttributeError):
+        return DEFAULT_OPENING
+    # Days not listed are treated as closed
+    return None
+
+
+def load_busy_intervals(stylist_ids, start, end):
+    """Busy (start, end) datetimes per stylist overlapping [start, end), from one query."""
+    rows = db.session.query(
+        Appointment.stylist_id,
+        Appointment.start_datetime,
+        Appointment.end_datetime,
+        Service.duration
+    ).outerjoin(Service, Appointment.service_id == Service.id).filter(
+        Appointment.stylist_id.in_(stylist_ids),
+        Appointment.start_datetime >= start - MAX_APPOINTMENT_LENGTH,
+        Appointment.start_datetime < end
+    ).all()
+
+    busy = {stylist_id: [] for stylist_id in stylist_ids}
+    for stylist_id, busy_start, busy_end, duration in rows:
+        if busy_end is None:
+            busy_end = busy_start + timedelta(minutes=duration or SLOT_STEP_MINUTES)
+        if busy_end > start:
+            busy[stylist_id].append((busy_start, busy_end))
+    return busy
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping or touching intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_intervals(window_start, window_end, busy):
+    """Complement of the merged `busy` intervals inside the window."""
+    free = []
+    cursor = window_start
+    for start, end in busy:
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        free.append((cursor, window_end))
+    return free
+
+
+def fit_slots(free, duration, anchor, step=SLOT_STEP_MINUTES):
+    """Slot start times on the `anchor` + k*step grid where `duration` fits in a free interval."""
+    length = timedelta(minutes=duration)
+    step = timedelta(minutes=step)
+    slots = []
+    for start, end in free:
+        # First grid point at or after the start of the free interval
+        k = -((anchor - start) // step)
+        slot = anchor + k * step
+        while slot + length <= end:
+            slots.append(slot)
+            slot += step
+    return slots
+
+
+def daily_free_intervals(opening_hours, busy, start_date, days):
+    """Yield (day, window_start, free intervals) for each open day in the range."""
+    busy = merge_intervals(busy)
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        window = opening_window(opening_hours, day)
+        if window is None:
+            yield day, None, []
+            continue
+        window_start = datetime.combine(day, window[0])
+        window_end = datetime.combine(day, window[1])
+        yield day, window_start, free_intervals(window_start, window_end, busy)
+
+
+def stylist_availability(stylist, start_date, days=1, duration=None):
+    """Map each date in the range to the slot start times that fit `duration` minutes."""
+    duration = duration or SLOT_STEP_MINUTES
+    range_start = datetime.combine(start_date, time.min)
+    range_end = range_start + timedelta(days=days)
+    busy = load_busy_intervals([stylist.id], range_start, range_end)[stylist.id]
+    opening_hours = stylist.salon.opening_hours if stylist.salon else None
+
+    availability = {}
+    for day, window_start, free in daily_free_intervals(opening_hours, busy, start_date, days):
+        availability[day] = fit_slots(free, duration, window_start) if window_start else []
+    return availability
+
+
+def _minute_bits(window_start, free):
+    """Bitmap of the window with bit m set when minute m is free."""
+    bits = 0
+    for start, end in free:
+        lo = int((start - window_start).total_seconds() // 60)
+        hi = int((end - window_start).total_seconds() // 60)
+        bits |= ((1 << (hi - lo)) - 1) << lo
+    return bits
+
+
+def _runs_of(bits, length):
+    """Bit m set when bits m..m+length-1 are all set (log-time shift-and)."""
+    span = 1
+    while span * 2 <= length:
+        bits &= bits >> span
+        span *= 2
+    return bits & (bits >> (length - span))
+
+
+def salon_availability_matrix(opening_hours, stylist_ids, start_date, days, duration=None, step=SLOT_STEP_MINUTES):
+    """Stylist x day slot bitsets for a salon, from a single appointments query.
+
+    Returns (day_windows, matrix) where day_windows is a list of
+    (day, window_start, slot_count) and matrix maps stylist id to one int per
+    day whose bit i is set when slot window_start + i*step fits `duration`.
+    """
+    duration = duration or step
+    range_start = datetime.combine(start_date, time.min)
+    range_end = range_start + timedelta(days=days)
+    busy = load_busy_intervals(stylist_ids, range_start, range_end)
+
+    day_windows = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        window = opening_window(opening_hours, day)
+        if window is None:
+            day_windows.append((day, None, 0))
+            continue
+        window_start = datetime.combine(day, window[0])
+        minutes = int((datetime.combine(day, window[1]) - window_start).total_seconds() // 60)
+        day_windows.append((day, window_start, max(0, (minutes - duration) // step + 1)))
+
+    matrix = {}
+    for stylist_id in stylist_ids:
+        row = []
+        daily = daily_free_intervals(opening_hours, busy[stylist_id], start_date, days)
+        for (day, window_start, free), (_, _, slot_count) in zip(daily, day_windows):
+            if window_start is None:
+                row.append(0)
+                continue
+            fits = _runs_of(_minute_bits(window_start, free), duration)
+            bitset = 0
+            for i in range(slot_count):
+                if fits >> (i * step) & 1:
+                    bitset |= 1 << i
+            row.append(bitset)
+        matrix[stylist_id] = row
+    return day_windows, matrix
@@ -0,0 +1,247 @@
+"""Benchmark the hot API endpoints against a generated dataset.
+
+Boots create_app() on a scratch SQLite database filled by seed_bulk.generate
+(or on --database, which must hold a seed_bulk dataset), drives each
+endpoint in-process through the Flask test client, and records throughput,
+p50/p95/p99 latency and SQL statements per request. Results are written as
+JSON; the run fails (exit status 1) when a limit in the thresholds file is
+exceeded, or when p95 latency regresses past --tolerance against --baseline.
+
+    cd backend
+    python -m benchmarks.endpoints --output results.json
+    python -m benchmarks.endpoints --baseline results.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+THRESHOLDS = os.path.join(os.path.dirname(__file__), 'thresholds.json')
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def scenarios(client, ids):
+    """(name, default request count, function(i) -> response) for each endpoint."""
+    customer = ids['customer']
+    stylist = ids['stylist']
+    customer_headers = ids['customer_headers']
+    admin_headers = ids['admin_headers']
+    future = ids['first_free_day']
+
+    def booking(i):
+        # A fresh stylist/day pair per request so bookings do not conflict
+        stylist_id = ids['stylists'][i % len(ids['stylists'])]
+        day = future + timedelta(days=i // len(ids['stylists']))
+        return client.post(f"/api/customer/customers/{customer}/appointments", headers=customer_headers, json={
+            "stylist_id": stylist_id,
+            "service_id": ids['services'][stylist_id],
+            "appointment_date": day.isoformat(),
+            "appointment_time": "10:00"
+        })
+
+    return [
+        ('login', 20, lambda i: client.post('/api/auth/login', json={
+            "email": ids['customer_email'], "password": "password123"})),
+        ('stylist_login', 20, lambda i: client.post('/api/auth/login', json={
+            "email": ids['stylist_email'], "password": "password123"})),
+        ('salon_list', 200, lambda i: client.get('/api/salon/salons')),
+        ('salon_detail', 200, lambda i: client.get(f'/api/salon/salons/{ids["salon"]}')),
+        ('nearby', 200, lambda i: client.get('/api/salon/salons/nearby?lat=-1.2676&lng=36.8108&radius=5&limit=20')),
+        ('stylist_detail', 200, lambda i: client.get(f'/api/stylist/stylists/{stylist}')),
+        ('availability', 200, lambda i: client.get(
+            f'/api/stylist/stylists/{stylist}/availability?date={ids["today"]}&service_id={ids["services"][stylist]}')),
+        ('booking', 100, booking),
+        ('customer_appointments', 200, lambda i: client.get(
+            f'/api/customer/customers/{customer}/appointments', headers=customer_headers)),
+        ('admin_appointments', 200, lambda i: client.get('/api/customer/admin/appointments', headers=admin_headers))
+    ]
+
+
+def prepare(app, db):
+    """Pick the users, stylists and services the scenarios use."""
+    from flask_jwt_extended import create_access_token
+    from models import User, Stylist, Appointment, stylist_services
+
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).order_by(User.id).first()
+        customer_id = db.session.query(Appointment.customer_id).order_by(Appointment.id).limit(1).scalar()
+        customer = db.session.get(User, customer_id)
+        stylists = [stylist_id for stylist_id, in db.session.query(Stylist.id).order_by(Stylist.id)]
+        first_stylist = db.session.get(Stylist, stylists[0])
+        services = dict(db.session.query(stylist_services.c.stylist_id, db.func.min(stylist_services.c.service_id))
+                        .group_by(stylist_services.c.stylist_id))
+        last_booked = db.session.query(db.func.max(Appointment.appointment_date)).scalar() or date.today()
+        return {
+            "customer": customer.id,
+            "customer_email": customer.email,
+            "customer_headers": {"Authorization": "Bearer " + create_access_token(
+                identity=str(customer.id), additional_claims=customer.token_claims())},
+            "admin_headers": {"Authorization": "Bearer " + create_access_token(
+                identity=str(admin.id), additional_claims=admin.token_claims())},
+            "stylist": stylists[0],
+            "stylist_email": first_stylist.user.email,
+            "salon": first_stylist.salon_id,
+            "stylists": [stylist_id for stylist_id in stylists if stylist_id in services],
+            "services": services,
+            "today": date.today().isoformat(),
+            "first_free_day": max(last_booked, date.today()) + timedelta(days=1)
+        }
+
+
+def run_scenario(app, db, fn, requests, warmup):
+    from sqlalchemy import event
+
+    with app.app_context():
+        engine = db.engine
+    counter = StatementCounter()
+    for i in range(warmup):
+        fn(-1 - i)
+
+    latencies = []
+    statuses = {}
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        started = time.perf_counter()
+        for i in range(requests):
+            request_started = time.perf_counter()
+            response = fn(i)
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+    return {
+        "requests": requests,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "queries_per_request": round(counter.count / requests, 2)
+    }
+
+
+def check(results, thresholds, baseline=None, tolerance=0.25):
+    """List of human-readable threshold and regression failures."""
+    failures = []
+    for name, result in results.items():
+        limits = thresholds.get(name, {})
+        if any(not 200 <= int(code) < 300 for code in result['statuses']) and not limits.get('allow_errors'):
+            failures.append(f"{name}: non-2xx responses {result['statuses']}")
+        if 'p95_ms' in limits and result['p95_ms'] > limits['p95_ms']:
+            failures.append(f"{name}: p95 {result['p95_ms']}ms > {limits['p95_ms']}ms")
+        if 'max_queries' in limits and result['queries_per_request'] > limits['max_queries']:
+            failures.append(f"{name}: {result['queries_per_request']} queries/request > {limits['max_queries']}")
+        if 'min_rps' in limits and result['throughput_rps'] < limits['min_rps']:
+            failures.append(f"{name}: {result['throughput_rps']} req/s < {limits['min_rps']} req/s")
+        previous = (baseline or {}).get(name)
+        if previous and result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            failures.append(f"{name}: p95 {result['p95_ms']}ms regressed more than {tolerance:.0%} "
+                            f"from baseline {previous['p95_ms']}ms")
+    return failures
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument('--database', help="existing seed_bulk database URL (default: generate a scratch SQLite one)")
+    parser.add_argument('--salons', type=int, default=10)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def open_dataset(args):
+    """(app, db, scratch file or None) for --database or a freshly generated scratch database."""
+    scratch = None
+    if args.database:
+        os.environ['DATABASE_URL'] = args.database
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        os.environ['DATABASE_URL'] = f'sqlite:///{scratch.name}'
+
+    from app import create_app, db
+    import seed_bulk
+
+    app = create_app()
+    if scratch:
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            counts = seed_bulk.generate(salons=args.salons, customers=args.customers, years=args.years, seed=args.seed)
+            db.session.commit()
+            print(f"dataset: {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s "
+                  f"({counts.get('appointments', 0)} appointments)")
+    return app, db, scratch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplier for the per-endpoint request counts")
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', nargs='+', help="endpoint names to run")
+    parser.add_argument('--thresholds', default=THRESHOLDS)
+    parser.add_argument('--baseline', help="results file of an earlier run to compare p95 latency against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed p95 regression against --baseline")
+    parser.add_argument('--output', help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    app, db, scratch = open_dataset(args)
+    client = app.test_client()
+    ids = prepare(app, db)
+    results = {}
+    for name, requests, fn in scenarios(client, ids):
+        if args.only and name not in args.only:
+            continue
+        results[name] = run_scenario(app, db, fn, max(1, int(requests * args.scale)), args.warmup)
+        r = results[name]
+        print(f"{name:<24}{r['throughput_rps']:>9} req/s  p50 {r['p50_ms']:>8}ms  p95 {r['p95_ms']:>8}ms  "
+              f"p99 {r['p99_ms']:>8}ms  {r['queries_per_request']:>6} queries  {r['statuses']}")
+
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    failures = check(results, thresholds, baseline, args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.utcnow().isoformat(),
+                    "python": platform.python_version(),
+                    "database": app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0],
+                    "dataset": None if args.database else {"salons": args.salons, "customers": args.customers,
+                                                           "years": args.years, "seed": args.seed}
+                },
+                "results": results,
+                "failures": failures
+            }, f, indent=2)
+
+    if scratch:
+        os.unlink(scratch.name)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Login throughput against the size of the password hashing pool.
+
+Creates users in a scratch SQLite database and fires concurrent
+POST /api/auth/login requests from a thread pool, once per
+PASSWORD_HASH_WORKERS setting (0 hashes on the request thread).
+
+    cd backend
+    python -m benchmarks.password_hashing --workers 0 1 2 4 --threads 8 --logins 200
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ['DATABASE_URL'] = f'sqlite:///{_db.name}'
+
+from app import app  # noqa: E402
+from models import db, User  # noqa: E402
+import passwords  # noqa: E402
+
+PASSWORD = 'benchmark-password'
+
+
+def login(i, users):
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={"email": f"bench{i % users}@example.com", "password": PASSWORD})
+    return response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--threads', type=int, default=8, help="concurrent login requests")
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--users', type=int, default=20)
+    args = parser.parse_args()
+
+    # Deep enough that the benchmark measures throughput, not 503s
+    app.config['PASSWORD_HASH_QUEUE_DEPTH'] = args.threads
+    with app.app_context():
+        print(f"hash method: {passwords.hash_method()}, {args.threads} concurrent requests, {args.logins} logins")
+        db.create_all()
+        for i in range(args.users):
+            user = User(username=f'bench{i}', email=f'bench{i}@example.com')
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+
+    for workers in args.workers:
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        if passwords._pool is not None:
+            passwords._pool.shutdown()
+            passwords._reset_pool()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            statuses = Counter(executor.map(lambda i: login(i, args.users), range(args.logins)))
+        elapsed = time.perf_counter() - start
+        print(f"workers={workers:<3} {args.logins / elapsed:8.1f} logins/s  statuses={dict(statuses)}")
+
+    os.unlink(_db.name)
+
+
+if __name__ == '__main__':
+    main()
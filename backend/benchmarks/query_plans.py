@@ -0,0 +1,143 @@
+"""Check the query plans of the statements the hot endpoints issue.
+
+Drives the scenarios of benchmarks.endpoints against a generated dataset (or
+--database), records every SELECT, UPDATE and DELETE they send, and asks the
+database how it would run each one: EXPLAIN QUERY PLAN on SQLite, EXPLAIN
+(FORMAT JSON) on PostgreSQL. The run fails (exit status 1) when a statement
+scans a whole table of at least --min-rows rows, unless the thresholds file
+lists that table under the endpoint's "allow_scans".
+
+    cd backend
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --only customer_appointments --verbose
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from benchmarks.endpoints import THRESHOLDS, add_dataset_arguments, open_dataset, prepare, scenarios
+
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+SQLITE_SCAN = re.compile(r'SCAN (\w+)')
+
+
+class StatementRecorder:
+    """Distinct statements (with the parameters of their first execution) seen on an engine."""
+
+    def __init__(self):
+        self.statements = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in EXPLAINED:
+            self.statements.setdefault(statement, parameters)
+
+
+def sqlite_plan(conn, statement, parameters):
+    """(plan lines, scanned table names) for one statement on SQLite."""
+    details = [row[3] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+    return details, [match.group(1) for match in map(SQLITE_SCAN.match, details) if match]
+
+
+def postgresql_plan(conn, statement, parameters):
+    """(plan lines, scanned table names) for one statement on PostgreSQL."""
+    plan = conn.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    details, scans = [], []
+
+    def walk(node, depth):
+        relation = node.get('Relation Name')
+        details.append('  ' * depth + node['Node Type'] + (f" on {relation}" if relation else ''))
+        if node['Node Type'] == 'Seq Scan':
+            scans.append(relation)
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(plan[0]['Plan'], 0)
+    return details, scans
+
+
+def table_name(name, tables):
+    # SQLAlchemy aliases a table joined twice as <table>_1, <table>_2, ...
+    return name if name in tables else re.sub(r'_\d+$', '', name)
+
+
+def check_plans(app, db, statements, allowed, min_rows, row_counts):
+    """List of (statement, plan lines, tables scanned in full) for the statements of one endpoint."""
+    with app.app_context():
+        engine = db.engine
+    explain = postgresql_plan if engine.dialect.name == 'postgresql' else sqlite_plan
+    tables = set(db.metadata.tables)
+
+    results = []
+    with engine.connect() as conn:
+        for statement, parameters in statements.items():
+            details, scans = explain(conn, statement, parameters)
+            full = []
+            for name in scans:
+                table = table_name(name, tables)
+                if table not in tables or table in allowed:
+                    continue
+                if table not in row_counts:
+                    row_counts[table] = conn.exec_driver_sql(f'SELECT count(*) FROM {table}').scalar()
+                if row_counts[table] >= min_rows:
+                    full.append(table)
+            results.append((statement, details, full))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument('--requests', type=int, default=3, help="requests per endpoint while recording statements")
+    parser.add_argument('--min-rows', type=int, default=1000, help="tables smaller than this may be scanned")
+    parser.add_argument('--only', nargs='+', help="endpoint names to check")
+    parser.add_argument('--thresholds', default=THRESHOLDS)
+    parser.add_argument('--verbose', action='store_true', help="print every plan, not only the failing ones")
+    args = parser.parse_args()
+
+    from sqlalchemy import event
+
+    app, db, scratch = open_dataset(args)
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    client = app.test_client()
+    ids = prepare(app, db)
+    with app.app_context():
+        engine = db.engine
+
+    failures = []
+    row_counts = {}
+    for name, _, fn in scenarios(client, ids):
+        if args.only and name not in args.only:
+            continue
+        recorder = StatementRecorder()
+        event.listen(engine, 'before_cursor_execute', recorder)
+        try:
+            for i in range(args.requests):
+                fn(i)
+        finally:
+            event.remove(engine, 'before_cursor_execute', recorder)
+
+        allowed = set(thresholds.get(name, {}).get('allow_scans', []))
+        results = check_plans(app, db, recorder.statements, allowed, args.min_rows, row_counts)
+        print(f"{name}: {len(results)} statements")
+        for statement, details, full in results:
+            if full:
+                failures.append(f"{name}: full scan of {', '.join(full)} in {' '.join(statement.split())}")
+            if full or args.verbose:
+                print('    ' + ' '.join(statement.split()))
+                for line in details:
+                    print('        ' + line)
+
+    if scratch:
+        os.unlink(scratch.name)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
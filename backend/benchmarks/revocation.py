@@ -0,0 +1,76 @@
+"""Per-request cost of the JWT revocation check.
+
+Fills a scratch SQLite database with revoked JTIs and times
+GET /api/auth/current_user with the in-memory check (authz.check_token_revoked)
+against a plain blocklist query per request.
+
+    cd backend
+    python -m benchmarks.revocation --rows 100000 --requests 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ['DATABASE_URL'] = f'sqlite:///{_db.name}'
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app, jwt  # noqa: E402
+from models import db, User, TokenBlocklist  # noqa: E402
+import authz  # noqa: E402
+
+
+def db_lookup(jwt_header, jwt_payload):
+    # Same checks, but with a blocklist query on every request
+    if db.session.query(TokenBlocklist.id).filter_by(jti=jwt_payload['jti']).first() is not None:
+        return True
+    return authz.check_token_revoked(jwt_header, jwt_payload)
+
+
+def run(client, headers, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/api/auth/current_user', headers=headers)
+        assert response.status_code == 200, response.get_json()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help="revoked JTIs in the blocklist")
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        now = datetime.utcnow()
+        db.session.execute(db.insert(TokenBlocklist), [
+            {"jti": str(uuid.uuid4()), "created_at": now} for _ in range(args.rows)
+        ])
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id), additional_claims=user.token_claims())}"}
+
+    client = app.test_client()
+    run(client, headers, 50)  # warm up caches and the first blocklist load
+
+    memory = run(client, headers, args.requests)
+    jwt._token_in_blocklist_callback = db_lookup
+    query = run(client, headers, args.requests)
+    jwt._token_in_blocklist_callback = authz.check_token_revoked
+
+    print(f"blocklist rows:   {args.rows}")
+    print(f"in-memory check:  {memory:8.1f} us/request ({len(authz.revoked_tokens)} JTIs cached)")
+    print(f"query per request:{query:8.1f} us/request")
+    print(f"saved:            {query - memory:8.1f} us/request")
+    os.unlink(_db.name)
+
+
+if __name__ == '__main__':
+    main()
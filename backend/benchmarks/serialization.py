@@ -0,0 +1,80 @@
+"""Serialization time and bytes on the wire for the admin appointment list.
+
+Builds one page of GET /api/customer/admin/appointments from a generated
+dataset (or --database) and, for every JSON provider in jsonprovider.PROVIDERS
+that is installed, times encoding the page and compressing the result with
+each content coding. It then requests the endpoint end to end with each
+provider/coding pair. The first row (stdlib, identity) is the behaviour
+before orjson and compression.
+
+    cd backend
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --limit 200 --rounds 500
+"""
+import argparse
+import os
+import time
+
+from benchmarks.endpoints import add_dataset_arguments, open_dataset, percentile, prepare
+
+CODINGS = ['identity', 'gzip', 'br']
+
+
+def median_ms(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument('--limit', type=int, default=200, help="appointments on the page")
+    parser.add_argument('--rounds', type=int, default=200, help="timed repetitions per measurement")
+    args = parser.parse_args()
+
+    import compression
+    import jsonprovider
+    from appointments import appointment_rows, serialize_appointment
+    from models import Appointment
+
+    app, db, scratch = open_dataset(args)
+    client = app.test_client()
+    ids = prepare(app, db)
+    providers = {name: cls for name, cls in jsonprovider.PROVIDERS.items()
+                 if name != 'orjson' or jsonprovider.orjson is not None}
+    codings = [coding for coding in CODINGS if coding != 'br' or compression.brotli is not None]
+    url = f'/api/customer/admin/appointments?limit={args.limit}'
+    original = app.json
+
+    with app.test_request_context(headers={'Accept-Encoding': ', '.join(codings[1:])}):
+        rows = appointment_rows().order_by(Appointment.id).limit(args.limit).all()
+        page = [serialize_appointment(row) for row in rows]
+        encoders = compression._encoders()
+        print(f"{len(page)} appointments per page, {args.rounds} rounds")
+        print(f"{'provider':<10}{'coding':<10}{'encode ms':>10}{'compress ms':>13}{'bytes':>9}{'request p50 ms':>16}")
+
+        for name, cls in providers.items():
+            app.json = provider = cls(app)
+            encode_ms = median_ms(lambda: provider.response(page), args.rounds)
+            body = provider.response(page).get_data()
+
+            for coding in codings:
+                compress_ms, size = 0.0, len(body)
+                if coding != 'identity':
+                    compress_ms = median_ms(lambda: encoders[coding](body), args.rounds)
+                    size = len(encoders[coding](body))
+                headers = {**ids['admin_headers'], 'Accept-Encoding': coding}
+                request_ms = median_ms(lambda: client.get(url, headers=headers), max(1, args.rounds // 4))
+                print(f"{name:<10}{coding:<10}{encode_ms:>10.3f}{compress_ms:>13.3f}{size:>9}{request_ms:>16.2f}")
+
+    app.json = original
+    if scratch:
+        os.unlink(scratch.name)
+
+
+if __name__ == '__main__':
+    main()
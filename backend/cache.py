@@ -0,0 +1,235 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import request, current_app, make_response, jsonify
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import db, CacheVersion
+
+# Names of the shared version counters
+CATALOG = 'catalog'            # salons, services, stylists and reviews
+APPOINTMENTS = 'appointments'
+
+
+class CatalogCache:
+    """Bounded LRU + TTL cache of serialized catalog responses.
+
+    Each gunicorn worker has its own copy. Entries are tagged with the catalog
+    version stored in the cache_versions table; any worker that writes to the
+    catalog bumps the version, and the other workers drop their entries the
+    next time they read it (at most every CATALOG_CACHE_VERSION_CHECK seconds).
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _current_version(self):
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= current_app.config['CATALOG_CACHE_VERSION_CHECK']:
+            version = db.session.query(CacheVersion.version).filter_by(name=CATALOG).scalar() or 0
+            with self._lock:
+                if version != self._version:
+                    self._entries.clear()
+                    self._version = version
+                self._version_checked_at = now
+        return self._version
+
+    def get(self, key):
+        version = self._current_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value):
+        version = self._current_version()
+        expires_at = time.monotonic() + current_app.config['CATALOG_CACHE_TTL']
+        with self._lock:
+            self._entries[key] = (version, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > current_app.config['CATALOG_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def expire(self):
+        """Drop local entries and re-read the version on the next request."""
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+catalog_cache = CatalogCache()
+
+
+def bump_version(name, connection=None):
+    """Increment a shared version counter in the current transaction.
+
+    Runs on the session unless `connection` is given.
+    """
+    bind = connection or db.session
+    values = {CacheVersion.version: CacheVersion.version + 1, CacheVersion.updated_at: datetime.utcnow()}
+    update = db.update(CacheVersion).where(CacheVersion.name == name).values(values) \
+        .execution_options(synchronize_session=False)
+    if bind.execute(update).rowcount:
+        return
+    try:
+        with bind.begin_nested():
+            bind.execute(db.insert(CacheVersion).values(name=name, version=1, updated_at=datetime.utcnow()))
+    except IntegrityError:
+        # Another worker created the row first
+        bind.execute(update)
+
+
+def invalidate_catalog():
+    """Bump the shared catalog version as part of the caller's transaction.
+
+    This worker's entries are dropped once that transaction commits: dropping
+    them now would let a request in between re-cache the old rows under the
+    old version, which is still the committed one.
+    """
+    bump_version(CATALOG)
+    db.session.info['expire_catalog'] = True
+
+
+def appointments_changed():
+    """Bump the appointments version once the caller's transaction commits.
+
+    The bump runs in its own short transaction after that commit. Inside the
+    booking transaction it would hold the single counter row locked until the
+    commit and serialize every booking for every stylist behind it. Bumping
+    after the commit can only pair new rows with the old version for a
+    moment, which costs a re-download, never a stale 304.
+    """
+    db.session.info['bump_appointments'] = True
+
+
+def _after_commit(session):
+    if session.in_nested_transaction():  # a savepoint was released; the transaction goes on
+        return
+    if session.info.pop('expire_catalog', False):
+        catalog_cache.expire()
+    if session.info.pop('bump_appointments', False):
+        with db.engine.begin() as connection:
+            bump_version(APPOINTMENTS, connection)
+
+
+def _after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:  # the whole transaction, not a savepoint
+        session.info.pop('expire_catalog', None)
+        session.info.pop('bump_appointments', None)
+
+
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_soft_rollback', _after_rollback)
+
+
+def cached_catalog(view):
+    """Cache successful responses of a public catalog view by path and query string."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config['CATALOG_CACHE_ENABLED']:
+            return view(*args, **kwargs)
+
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        cached = catalog_cache.get(key)
+        if cached is not None:
+            body, headers = cached
+            return current_app.response_class(body, status=200, headers=headers)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            catalog_cache.set(key, (response.get_data(), list(response.headers.items())))
+        return response
+    return wrapper
+
+
+def _identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:  # the view is not behind @jwt_required
+        return None
+
+
+def conditional_get(*version_names, public=False, authorize=None):
+    """Answer If-None-Match / If-Modified-Since with 304 using the shared versions.
+
+    The strong ETag is derived from the request path, query string and the
+    named version counters, so revalidation costs one primary-key lookup
+    instead of rebuilding the response. Private responses also key the ETag
+    on the JWT identity and are validated by ETag only, since Last-Modified
+    cannot tell two users apart.
+
+    `authorize(**view_kwargs)` runs before any validator is compared; views
+    that check access themselves must pass it, or a 304 would answer a
+    request the view refuses.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if authorize is not None and not authorize(**kwargs):
+                return jsonify({"error": "Unauthorized access"}), 403
+
+            rows = db.session.query(CacheVersion.name, CacheVersion.version, CacheVersion.updated_at).filter(
+                CacheVersion.name.in_(version_names)
+            ).all()
+            versions = {name: (version, updated_at) for name, version, updated_at in rows}
+            parts = [request.full_path] + [f"{name}:{versions.get(name, (0, None))[0]}" for name in version_names]
+            if not public:
+                parts.append(f"user:{_identity()}")
+            etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+            last_modified = None
+            if public:
+                last_modified = max((updated_at for _, updated_at in versions.values() if updated_at), default=None)
+                if last_modified is not None:
+                    last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+            if request.if_none_match:
+                # Weak comparison: compressed responses carry the ETag as W/"..."
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'public, no-cache' if public else 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,132 @@
+import csv
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from models import db, Salon, rebuild_rating_aggregates
+from authz import prune_blocklist
+from reporting import backfill_rollups
+from replicas import ReplicaSet
+from search import rebuild_search_index
+from geo import parse_coordinates, place_coordinates, geo_band
+from cache import invalidate_catalog
+
+ratings_cli = AppGroup('ratings', help="Maintain the denormalized rating aggregates.")
+
+
+@ratings_cli.command('rebuild')
+def rebuild_ratings():
+    """Recompute stylist and salon rating aggregates from the review tables."""
+    rebuild_rating_aggregates()
+    db.session.commit()
+    click.echo("Rating aggregates rebuilt")
+
+
+tokens_cli = AppGroup('tokens', help="Maintain the JWT revocation blocklist.")
+
+
+@tokens_cli.command('prune')
+def prune_tokens():
+    """Delete blocklist entries for tokens that have already expired."""
+    click.echo(f"Pruned {prune_blocklist()} expired blocklist entries")
+
+
+reports_cli = AppGroup('reports', help="Maintain the reporting rollups.")
+
+
+@reports_cli.command('backfill')
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), help="First day to rebuild (default: all).")
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), help="Last day to rebuild (default: all).")
+def backfill_reports(date_from, date_to):
+    """Rebuild the daily salon, stylist and service rollups from appointments."""
+    backfill_rollups(date_from and date_from.date(), date_to and date_to.date())
+    db.session.commit()
+    click.echo("Reporting rollups rebuilt")
+
+
+search_cli = AppGroup('search', help="Maintain the full-text search index.")
+
+
+@search_cli.command('rebuild')
+def rebuild_search():
+    """Recreate the search index from the salons, stylists and services."""
+    rebuild_search_index()
+    db.session.commit()
+    click.echo("Search index rebuilt")
+
+
+geo_cli = AppGroup('geo', help="Maintain salon coordinates.")
+
+
+@geo_cli.command('backfill')
+@click.option('--csv', 'csv_file', type=click.File(), help="CSV with id or slug, latitude and longitude columns.")
+@click.option('--overwrite', is_flag=True, help="Also replace coordinates that are already set from the location text.")
+def backfill_coordinates(csv_file, overwrite):
+    """Set salon coordinates from a CSV file or from the known places named in their location."""
+    given = {}
+    if csv_file:
+        for line, row in enumerate(csv.DictReader(csv_file), start=2):
+            try:
+                given[row.get('id') or row.get('slug')] = parse_coordinates(row.get('latitude'), row.get('longitude'))
+            except ValueError as e:
+                raise click.ClickException(f"line {line}: {e}")
+
+    updated, missing = 0, []
+    for salon in Salon.query.order_by(Salon.id):
+        coordinates = given.get(str(salon.id)) or given.get(salon.slug)
+        if coordinates is None and (salon.latitude is None or overwrite):
+            coordinates = place_coordinates(salon.location)
+        if coordinates is not None and coordinates != (salon.latitude, salon.longitude):
+            salon.latitude, salon.longitude = coordinates
+            updated += 1
+        elif salon.latitude is None:
+            missing.append(salon)
+        elif salon.geo_band != geo_band(salon.latitude):
+            salon.geo_band = geo_band(salon.latitude)  # rows written without the model
+            updated += 1
+    if updated:
+        invalidate_catalog()
+    db.session.commit()
+
+    click.echo(f"Updated {updated} salon(s)")
+    for salon in missing:
+        click.echo(f"No coordinates for salon {salon.id} ({salon.location!r})")
+
+
+replicas_cli = AppGroup('replicas', help="Inspect the read replicas.")
+
+
+@replicas_cli.command('status')
+def replica_status():
+    """Check every replica the way request routing does."""
+    keys = [key for key in current_app.config['SQLALCHEMY_BINDS'] if key.startswith('replica')]
+    if not keys:
+        click.echo("No replicas configured (set DATABASE_REPLICA_URLS)")
+        return
+    replicas = ReplicaSet(keys)
+    for key in keys:
+        healthy, lag, error = replicas.check(key)
+        state = "healthy" if healthy else f"unhealthy ({error})"
+        click.echo(f"{key}: {state}" + ("" if lag is None else f", {lag:.1f}s behind"))
+
+
+@replicas_cli.command('sync')
+def sync_replicas():
+    """Copy a SQLite primary into SQLite replicas, to stand in for replication locally."""
+    engines = db.engines
+    if engines[None].dialect.name != 'sqlite':
+        raise click.ClickException("sync only copies SQLite databases; real replicas replicate themselves")
+    for key, engine in engines.items():
+        if key is None or not key.startswith('replica'):
+            continue
+        if engine.dialect.name != 'sqlite':
+            raise click.ClickException(f"{key} is not a SQLite database")
+        source = engines[None].raw_connection()
+        target = engine.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            target.close()
+            source.close()
+        click.echo(f"Copied the primary to {key} ({engine.url.database})")
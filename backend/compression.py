@@ -0,0 +1,52 @@
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional; only gzip is offered without it
+    brotli = None
+
+# Response compression. Buffered JSON, CSV and text responses of at least
+# COMPRESS_MIN_SIZE bytes are compressed with the best encoding the client
+# accepts: br (when the brotli package is installed), then gzip. Streamed
+# responses (exports) and files (uploads) are passed through untouched.
+
+COMPRESSIBLE = {
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html',
+}
+
+
+def _encoders():
+    config = current_app.config
+    encoders = {}
+    if brotli is not None:
+        encoders['br'] = lambda data: brotli.compress(data, quality=config['COMPRESS_BROTLI_LEVEL'])
+    encoders['gzip'] = lambda data: gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+    return encoders
+
+
+def compress_response(response):
+    if response.mimetype not in COMPRESSIBLE or response.direct_passthrough or response.is_streamed \
+            or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200 or (response.content_length or 0) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    encoders = _encoders()
+    encoding = request.accept_encodings.best_match(list(encoders))
+    if encoding is None:
+        return response
+
+    response.set_data(encoders[encoding](response.get_data()))
+    response.headers['Content-Encoding'] = encoding
+    # The compressed body is a different representation of the same resource
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
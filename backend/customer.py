@@ -1,53 +1,50 @@
 from flask import Blueprint, request, jsonify
-from models import db, User, Stylist, Appointment, Review, SalonReview
-from werkzeug.security import generate_password_hash, check_password_hash
+from models import db, User, Stylist, Service, Appointment, Review, SalonReview, adjust_rating, rebuild_rating_aggregates
+from passwords import hash_password, verify_password
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_mail import Message
-from app import mail
+from mailer import queue_email
+from pagination import paginate, paginated_response
+from authz import is_admin, admin_required, revoke_user_tokens
+from appointments import appointment_rows, serialize_appointment, book_appointment, BookingConflict
+from reporting import rollup_appointments
+from storage import image_url, image_urls
+from cache import conditional_get, invalidate_catalog, appointments_changed, CATALOG, APPOINTMENTS
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from flask_cors import CORS
 
 customer_bp = Blueprint("customer_bp", __name__)
 
 def check_admin_or_self_access(customer_id):
     """Check if current user is admin or the requested user"""
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    return current_user.is_admin or current_user_id == customer_id
+    return is_admin() or int(get_jwt_identity()) == customer_id
 
 # ====================== ADMIN-ONLY FUNCTIONS ======================
 
 @customer_bp.route("/admin/customers", methods=["GET"])
-@jwt_required()
+@admin_required
 def admin_get_all_customers():
-    current_user = User.query.get(get_jwt_identity())
-    if not current_user or not current_user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
+    customers, next_cursor = paginate(User.query.filter_by(is_admin=False), User.id)
 
-    customers = User.query.filter_by(is_admin=False).all()
-
-    return jsonify([
+    return paginated_response([
         {
             "id": c.id,
             "username": c.username,
             "email": c.email,
             "phone": c.phone if c.phone is not None else None,
-            "profile_pic": c.profile_pic if c.profile_pic is not None else None,
+            "profile_pic": image_url(c.profile_pic),
+            "profile_pic_urls": image_urls(c.profile_pic),
             "is_admin": c.is_admin,
             "is_blocked": c.is_blocked,
             "created_at": c.created_at.isoformat() if c.created_at else None,
             "last_login": c.last_login.isoformat() if c.last_login else None,
         } for c in customers
-    ]), 200
+    ], next_cursor)
 
 @customer_bp.route("/admin/customers/<int:customer_id>", methods=["GET"])
-@jwt_required()
+@admin_required
 def admin_get_customer_details(customer_id):
     """Admin: Get specific customer details"""
-    current_user = User.query.get(get_jwt_identity())
-    if not current_user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     customer = User.query.get_or_404(customer_id)
     return jsonify({
         "id": customer.id,
@@ -58,16 +55,14 @@ def admin_get_customer_details(customer_id):
     }), 200
 
 @customer_bp.route("/admin/customers/<int:customer_id>", methods=["PATCH"])
-@jwt_required()
+@admin_required
 def admin_update_customer(customer_id):
     """Admin: Update any customer's details"""
-    current_user = User.query.get(get_jwt_identity())
-    if not current_user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     customer = User.query.get_or_404(customer_id)
     data = request.get_json()
 
+    if "is_admin" in data or "is_blocked" in data:
+        revoke_user_tokens(customer)
     if "is_admin" in data:
         customer.is_admin = data["is_admin"]
     if "is_blocked" in data:
@@ -81,7 +76,7 @@ def admin_update_customer(customer_id):
             return jsonify({"error": "Email already in use"}), 400
         customer.email = data["email"]
     if "new_password" in data:
-        customer.password = generate_password_hash(data["new_password"])
+        customer.password = hash_password(data["new_password"])
 
     try:
         db.session.commit()
@@ -92,45 +87,19 @@ def admin_update_customer(customer_id):
     
     # get all appointments admin
 @customer_bp.route("/admin/appointments", methods=["GET"])
-@jwt_required()
+@admin_required
+@conditional_get(APPOINTMENTS, CATALOG)
 def get_all_appointments_admin():
-    current_user = User.query.get(get_jwt_identity())
-    if not current_user or not current_user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
-    appointments = Appointment.query.all()
-    return jsonify([{
-        "id": app.id,
-        "stylist": getattr(app.stylist, 'name', None),
-        "service": getattr(app.service, 'name', None),
-        "status": app.status,
-        "salon": getattr(getattr(app.stylist, 'salon', None), 'name', None),
-        "appointment_date": app.appointment_date.isoformat() if app.appointment_date else None,
-        "appointment_time": app.appointment_time.strftime('%H:%M:%S') if app.appointment_time else None,
-        "start_datetime": app.start_datetime.isoformat() if app.start_datetime else None,
-        "end_datetime": app.end_datetime.isoformat() if app.end_datetime else None
-    } for app in appointments]), 200
+    appointments, next_cursor = paginate(appointment_rows(), Appointment.id)
+    return paginated_response([serialize_appointment(row) for row in appointments], next_cursor)
 
 @customer_bp.route("/admin/customers/<int:customer_id>/appointments", methods=["GET"])
-@jwt_required()
+@admin_required
+@conditional_get(APPOINTMENTS, CATALOG)
 def admin_get_customer_appointments(customer_id):
     """Admin: Get any customer's appointments"""
-    current_user = User.query.get(get_jwt_identity())
-    if not current_user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
-    appointments = Appointment.query.filter_by(customer_id=customer_id).all()
-    return jsonify([{
-        "id": app.id,
-        "stylist": getattr(app.stylist, 'name', None),
-        "service": getattr(app.service, 'name', None),
-        "status": app.status,
-        "salon": getattr(getattr(app.stylist, 'salon', None), 'name', None),
-        "appointment_date": app.appointment_date.isoformat() if app.appointment_date else None,
-        "appointment_time": app.appointment_time.strftime('%H:%M:%S') if app.appointment_time else None,
-        "start_datetime": app.start_datetime.isoformat() if app.start_datetime else None,
-        "end_datetime": app.end_datetime.isoformat() if app.end_datetime else None
-    } for app in appointments]), 200
+    appointments, next_cursor = paginate(appointment_rows(Appointment.customer_id == customer_id), Appointment.id)
+    return paginated_response([serialize_appointment(row) for row in appointments], next_cursor)
 
 # ====================== CUSTOMER FUNCTIONS ======================
 @customer_bp.route("/customer", methods=["POST"])
@@ -154,7 +123,7 @@ def create_customer():
     new_customer = User(
         username=username,
         email=email,
-        password=generate_password_hash(password),
+        password=hash_password(password),
         is_admin=is_admin,
         created_at=datetime.utcnow()  # assuming your User model supports this
     )
@@ -162,8 +131,8 @@ def create_customer():
     db.session.add(new_customer)
 
     try:
-        # Send welcome email
-        msg = Message(
+        # Queue welcome email
+        queue_email(
             subject="Welcome to Our Salon Booking System",
             recipients=[email],
             body=f"""Hello {username},
@@ -174,7 +143,6 @@ You can now book appointments with our stylists and enjoy our services.
 Best regards,  
 The Salon Team"""
         )
-        mail.send(msg)
 
         db.session.commit()
 
@@ -191,25 +159,21 @@ The Salon Team"""
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": "Failed to register or send welcome email"}), 500
+        return jsonify({"error": "Failed to register customer"}), 500
 
 
 # Delete any appointment (admin only)
 @customer_bp.route("/admin/appointments/<int:appointment_id>", methods=["DELETE"])
-@jwt_required()
+@admin_required
 def admin_delete_appointment(appointment_id):
-    current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-
-    if not current_user or not current_user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     appointment = Appointment.query.get(appointment_id)
     if not appointment:
         return jsonify({"error": "Appointment not found"}), 404
 
     try:
+        rollup_appointments(Appointment.id == appointment.id, sign=-1)
         db.session.delete(appointment)
+        appointments_changed()
         db.session.commit()
         return jsonify({"message": "Appointment deleted successfully"}), 200
     except Exception as e:
@@ -220,62 +184,11 @@ def admin_delete_appointment(appointment_id):
 # Get all appointments (admin only)
 
 @customer_bp.route("/customers/admin/appointments", methods=["GET"])
-
+@admin_required
+@conditional_get(APPOINTMENTS, CATALOG)
 def get_customer_appointments_admin():
-    
-
-    appointments = Appointment.query.all()
-
-    result = []
-    for app in appointments:
-        # Safest possible date/time formatting
-        def safe_date_format(d):
-            if not d:
-                return None
-            try:
-                if isinstance(d, str):
-                    return d.split()[0]  # Just get date part if it's a full datetime string
-                return d.strftime('%Y-%m-%d')
-            except Exception:
-                return None
-
-        def safe_time_format(t):
-            if not t:
-                return None
-            try:
-                if isinstance(t, str):
-                    if ':' in t:  # Basic check if it's a time string
-                        return t.split('T')[-1].split('.')[0]  # Handle ISO strings
-                    return None
-                return t.strftime('%H:%M:%S')
-            except Exception:
-                return None
-
-        def safe_datetime_format(dt):
-            if not dt:
-                return None
-            try:
-                if isinstance(dt, str):
-                    return dt  # Assume it's already properly formatted
-                return dt.isoformat()
-            except Exception:
-                return None
-
-        appointment_data = {
-            "id": app.id,
-            "stylist": getattr(app.stylist, 'name', None),
-            "service": getattr(app.service, 'name', None),
-            "status": app.status,
-            "salon": getattr(getattr(app.stylist, 'salon', None), 'name', None),
-            "appointment_date": safe_date_format(getattr(app, 'appointment_date', None)),
-            "appointment_time": safe_time_format(getattr(app, 'appointment_time', None)),
-            "start_datetime": safe_datetime_format(getattr(app, 'start_datetime', None)),
-            "end_datetime": safe_datetime_format(getattr(app, 'end_datetime', None))
-        }
-
-        result.append(appointment_data)
-
-    return jsonify(result), 200
+    appointments, next_cursor = paginate(appointment_rows(), Appointment.id)
+    return paginated_response([serialize_appointment(row) for row in appointments], next_cursor)
 
 
 # Get customer profile
@@ -339,6 +252,7 @@ def update_customer(customer_id):
     # is_admin update
     if "is_admin" in data:
         customer.is_admin = data["is_admin"]
+        revoke_user_tokens(customer)
 
     # Password update (requires current_password and new_password)
     current_password = data.get("current_password")
@@ -348,14 +262,14 @@ def update_customer(customer_id):
         if not (current_password and new_password):
             return jsonify({"error": "Both current and new passwords are required"}), 400
 
-        if not check_password_hash(customer.password, current_password):
+        if not verify_password(customer.password, current_password):
             return jsonify({"error": "Current password is incorrect"}), 400
 
-        customer.password = generate_password_hash(new_password)
+        customer.password = hash_password(new_password)
 
     try:
-        # Send update email
-        msg = Message(
+        # Queue update email
+        queue_email(
             subject="Your Profile Has Been Updated",
             recipients=[customer.email],
             body=f"""Hello {customer.username},
@@ -367,39 +281,41 @@ If you didn't make these changes, please contact us immediately.
 Best regards,  
 The Salon Team"""
         )
-        mail.send(msg)
 
         db.session.commit()
         return jsonify({"message": "Customer updated successfully"}), 200
 
     except Exception:
         db.session.rollback()
-        return jsonify({"error": "Failed to update profile or send email"}), 500
+        return jsonify({"error": "Failed to update profile"}), 500
 
 # Delete customer account (self or admin)
 @customer_bp.route("/customers/<int:customer_id>", methods=["DELETE"])
 @jwt_required()
 def delete_customer(customer_id):
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-
-    if not current_user:
-        return jsonify({"error": "User not found"}), 404
 
     # Allow if the user is deleting themselves or is an admin
-    if current_user_id != customer_id and not current_user.is_admin:
+    if current_user_id != customer_id and not is_admin():
         return jsonify({"error": "Unauthorized access"}), 403
 
     customer = User.query.get_or_404(customer_id)
 
     # Delete related data
+    stylist_ids = [row.stylist_id for row in db.session.query(Review.stylist_id).filter_by(customer_id=customer_id).distinct()]
+    salon_ids = [row.salon_id for row in db.session.query(SalonReview.salon_id).filter_by(customer_id=customer_id).distinct()]
+    # Take the appointments out of the rollups while they still exist
+    rollup_appointments(Appointment.customer_id == customer_id, sign=-1)
     Appointment.query.filter_by(customer_id=customer_id).delete()
     Review.query.filter_by(customer_id=customer_id).delete()
     SalonReview.query.filter_by(customer_id=customer_id).delete()
+    rebuild_rating_aggregates(stylist_ids=stylist_ids, salon_ids=salon_ids)
+    if stylist_ids or salon_ids:
+        invalidate_catalog()
 
     try:
-        # Send deletion email
-        msg = Message(
+        # Queue deletion email
+        queue_email(
             subject="Your Account Has Been Deleted",
             recipients=[customer.email],
             body=f"""Hello {customer.username},
@@ -409,79 +325,24 @@ Your account has been successfully deleted. We're sorry to see you go.
 Best regards,  
 The Salon Team"""
         )
-        mail.send(msg)
 
         db.session.delete(customer)
+        appointments_changed()
         db.session.commit()
 
         return jsonify({"message": "Customer account deleted successfully"}), 200
 
     except Exception:
         db.session.rollback()
-        return jsonify({"error": "Failed to delete account or send email"}), 500
+        return jsonify({"error": "Failed to delete account"}), 500
 
 # Get customer appointments
 @customer_bp.route("/customers/<int:customer_id>/appointments", methods=["GET"])
 @jwt_required()
+@conditional_get(APPOINTMENTS, CATALOG, authorize=lambda customer_id: int(get_jwt_identity()) == customer_id)
 def get_customer_appointments(customer_id):
-    current_user_id = int(get_jwt_identity())
-    if current_user_id != customer_id:
-        return jsonify({"error": "Unauthorized access"}), 403
-
-    appointments = Appointment.query.filter_by(customer_id=customer_id).all()
-
-    result = []
-    for app in appointments:
-        # Safest possible date/time formatting
-        def safe_date_format(d):
-            if not d:
-                return None
-            try:
-                if isinstance(d, str):
-                    return d.split()[0]  # Just get date part if it's a full datetime string
-                return d.strftime('%Y-%m-%d')
-            except Exception:
-                return None
-
-        def safe_time_format(t):
-            if not t:
-                return None
-            try:
-                if isinstance(t, str):
-                    if ':' in t:  # Basic check if it's a time string
-                        return t.split('T')[-1].split('.')[0]  # Handle ISO strings
-                    return None
-                return t.strftime('%H:%M:%S')
-            except Exception:
-                return None
-
-        def safe_datetime_format(dt):
-            if not dt:
-                return None
-            try:
-                if isinstance(dt, str):
-                    return dt  # Assume it's already properly formatted
-                return dt.isoformat()
-            except Exception:
-                return None
-
-        appointment_data = {
-            "id": app.id,
-            "stylist": getattr(app.stylist, 'name', None),
-            "stylist_id": app.stylist_id,  
-            "service": getattr(app.service, 'name', None),
-            "status": app.status,
-            "salon": getattr(getattr(app.stylist, 'salon', None), 'name', None),
-            "appointment_date": safe_date_format(getattr(app, 'appointment_date', None)),
-            "appointment_time": safe_time_format(getattr(app, 'appointment_time', None)),
-            "start_datetime": safe_datetime_format(getattr(app, 'start_datetime', None)),
-            "end_datetime": safe_datetime_format(getattr(app, 'end_datetime', None)),
-         
-        }
-
-        result.append(appointment_data)
-
-    return jsonify(result), 200
+    appointments, next_cursor = paginate(appointment_rows(Appointment.customer_id == customer_id), Appointment.id)
+    return paginated_response([serialize_appointment(row) for row in appointments], next_cursor)
 
 #post review
 @customer_bp.route('/reviews', methods=['POST'])
@@ -490,11 +351,13 @@ def create_review():
     data = request.get_json()
     
     customer_id = int(get_jwt_identity())  # Assumes JWT stores customer ID
-    stylist_id = data.get('stylist_id')
     appointment_id = data.get('appointment_id')
     rating = data.get('rating')
     comment = data.get('comment', '')
 
+    if isinstance(rating, bool) or not isinstance(rating, int) or not 1 <= rating <= 5:
+        return jsonify({'error': 'Rating must be a whole number from 1 to 5'}), 400
+
     # Validate appointment
     appointment = Appointment.query.get(appointment_id)
     if not appointment:
@@ -510,6 +373,8 @@ def create_review():
 
         return jsonify({'error': 'You can only review your own appointments'}), 403
 
+    # The review goes to whoever did the appointment, whatever the body says
+    stylist_id = appointment.stylist_id
     review = Review(
         customer_id=customer_id,
         stylist_id=stylist_id,
@@ -518,6 +383,8 @@ def create_review():
         comment=comment
     )
     db.session.add(review)
+    adjust_rating(Stylist, stylist_id, rating)
+    invalidate_catalog()
     db.session.commit()
 
     return jsonify({'message': 'Review submitted successfully', 'review': review.to_dict()}), 201
@@ -535,7 +402,9 @@ def delete_customer_appointment(customer_id, appointment_id):
         return jsonify({"error": "Appointment not found"}), 404
 
     try:
+        rollup_appointments(Appointment.id == appointment.id, sign=-1)
         db.session.delete(appointment)
+        appointments_changed()
         db.session.commit()
         return jsonify({"message": "Appointment deleted successfully"}), 200
     except Exception as e:
@@ -616,31 +485,23 @@ def create_appointment(customer_id):
         if appointment_datetime < datetime.utcnow():
             return jsonify({"error": "Appointment must be in the future"}), 400
 
-        # Check for existing appointment at the same time
-        existing = Appointment.query.filter_by(
-            stylist_id=stylist_id,
-            start_datetime=appointment_datetime
-        ).first()
-        
-        if existing:
-            return jsonify({"error": "Stylist already booked at this time"}), 400
-
-        new_appointment = Appointment(
-            customer_id=customer_id,
-            stylist_id=stylist_id,
-            service_id=service_id,
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            start_datetime=appointment_datetime
-        )
-        
-        db.session.add(new_appointment)
+        stylist = Stylist.query.get(stylist_id)
+        service = Service.query.get(service_id)
+        if not stylist or not service:
+            return jsonify({"error": "Stylist or service not found"}), 404
+
+        # Overlap check and insert under a per-stylist lock
+        new_appointment = book_appointment(customer_id, stylist, service, appointment_datetime)
+        appointments_changed()
         db.session.commit()
 
         return jsonify(new_appointment.to_dict()), 201
         
     except ValueError as e:
         return jsonify({"error": f"Invalid date/time format: {str(e)}"}), 400
+    except (BookingConflict, IntegrityError):
+        db.session.rollback()
+        return jsonify({"error": "Stylist already booked at this time"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to create appointment: {str(e)}"}), 500
\ No newline at end of file
@@ -0,0 +1,193 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time
+
+from flask import Response, current_app, request, stream_with_context, jsonify, abort, make_response
+from sqlalchemy import select, literal, exists
+
+from models import db, User, Stylist, Service, Salon, Appointment, Review, SalonReview
+
+# Streaming exports: rows are read with yield_per (a server-side cursor on
+# PostgreSQL) and written out as NDJSON or CSV chunk by chunk, so memory use
+# does not grow with the number of rows exported.
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def parse_date_arg(name):
+    """Date from a YYYY-MM-DD query argument, None when absent; aborts with 400 when invalid."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        abort(make_response(jsonify({"error": f"Invalid {name} date, expected YYYY-MM-DD"}), 400))
+
+
+def export_filters():
+    """(date_from, date_to, salon_id) from the query string; both dates are inclusive."""
+    return parse_date_arg('from'), parse_date_arg('to'), request.args.get('salon_id', type=int)
+
+
+def _created_between(column, date_from, date_to):
+    criteria = []
+    if date_from:
+        criteria.append(column >= datetime.combine(date_from, time.min))
+    if date_to:
+        criteria.append(column <= datetime.combine(date_to, time.max))
+    return criteria
+
+
+def appointments_export(date_from, date_to, salon_id):
+    query = select(
+        Appointment.id,
+        Appointment.customer_id,
+        User.email.label('customer_email'),
+        Appointment.stylist_id,
+        Stylist.name.label('stylist'),
+        Service.name.label('service'),
+        Stylist.salon_id,
+        Salon.name.label('salon'),
+        Appointment.status,
+        Appointment.appointment_date,
+        Appointment.appointment_time,
+        Appointment.start_datetime,
+        Appointment.end_datetime,
+        Appointment.created_at
+    ).outerjoin(User, Appointment.customer_id == User.id) \
+     .outerjoin(Stylist, Appointment.stylist_id == Stylist.id) \
+     .outerjoin(Service, Appointment.service_id == Service.id) \
+     .outerjoin(Salon, Stylist.salon_id == Salon.id) \
+     .order_by(Appointment.id)
+    if date_from:
+        query = query.where(Appointment.appointment_date >= date_from)
+    if date_to:
+        query = query.where(Appointment.appointment_date <= date_to)
+    if salon_id:
+        query = query.where(Stylist.salon_id == salon_id)
+    return [query]
+
+
+def customers_export(date_from, date_to, salon_id):
+    query = select(
+        User.id,
+        User.username,
+        User.email,
+        User.phone,
+        User.is_blocked,
+        User.created_at,
+        User.last_login
+    ).where(User.is_admin.is_(False), *_created_between(User.created_at, date_from, date_to)).order_by(User.id)
+    if salon_id:
+        # Customers who have booked at the salon
+        query = query.where(exists().where(
+            Appointment.customer_id == User.id,
+            Appointment.stylist_id == Stylist.id,
+            Stylist.salon_id == salon_id
+        ))
+    return [query]
+
+
+def reviews_export(date_from, date_to, salon_id):
+    stylist_reviews = select(
+        literal('stylist').label('type'),
+        Review.id,
+        Review.customer_id,
+        Stylist.salon_id,
+        Review.stylist_id,
+        Review.appointment_id,
+        Review.rating,
+        Review.comment,
+        Review.is_hidden,
+        Review.created_at
+    ).join(Stylist, Review.stylist_id == Stylist.id) \
+     .where(*_created_between(Review.created_at, date_from, date_to)).order_by(Review.id)
+    salon_reviews = select(
+        literal('salon').label('type'),
+        SalonReview.id,
+        SalonReview.customer_id,
+        SalonReview.salon_id,
+        literal(None).label('stylist_id'),
+        SalonReview.appointment_id,
+        SalonReview.rating,
+        SalonReview.comment,
+        SalonReview.is_hidden,
+        SalonReview.created_at
+    ).where(*_created_between(SalonReview.created_at, date_from, date_to)).order_by(SalonReview.id)
+    if salon_id:
+        stylist_reviews = stylist_reviews.where(Stylist.salon_id == salon_id)
+        salon_reviews = salon_reviews.where(SalonReview.salon_id == salon_id)
+    return [stylist_reviews, salon_reviews]
+
+
+EXPORTS = {
+    'appointments': appointments_export,
+    'customers': customers_export,
+    'reviews': reviews_export
+}
+
+
+def _value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def _stream_rows(queries):
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    for query in queries:
+        result = db.session.execute(query.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield result.keys(), partition
+
+
+def _ndjson_chunks(queries):
+    for keys, rows in _stream_rows(queries):
+        yield ''.join(json.dumps(dict(zip(keys, map(_value, row))), default=str) + '\n' for row in rows)
+
+
+def _csv_chunks(queries):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(queries[0].selected_columns.keys())
+    # The header goes out on its own, so an empty export is still a valid CSV
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for keys, rows in _stream_rows(queries):
+        writer.writerows([_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(name, fmt, compress=False):
+    """Streaming download of the `name` export in `fmt` (ndjson or csv)."""
+    queries = EXPORTS[name](*export_filters())
+    chunks = _ndjson_chunks(queries) if fmt == 'ndjson' else _csv_chunks(queries)
+    filename = f"{name}.{fmt}"
+    mimetype = FORMATS[fmt]
+    if compress:
+        chunks = _gzip(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
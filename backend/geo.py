@@ -0,0 +1,97 @@
+import math
+
+# Salon coordinates and "near me" lookups. Salons carry latitude/longitude
+# plus geo_band, the index of the latitude band of BAND_DEGREES they fall in.
+# The (geo_band, longitude) index turns a bounding box into one short range
+# scan per band, so a lookup reads about the same number of rows however
+# many salons there are elsewhere; candidates are then ranked by exact
+# haversine distance.
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+BAND_DEGREES = 0.05  # about 5.6 km of latitude
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 100
+
+# Approximate centres of the places salons are listed in, used to backfill
+# coordinates from the free-text location. Longer names are tried first.
+PLACES = {
+    "nairobi cbd": (-1.2864, 36.8172),
+    "westlands": (-1.2676, 36.8108),
+    "kilimani": (-1.2921, 36.7856),
+    "kileleshwa": (-1.2814, 36.7836),
+    "lavington": (-1.2800, 36.7700),
+    "parklands": (-1.2626, 36.8183),
+    "eastleigh": (-1.2740, 36.8510),
+    "south b": (-1.3106, 36.8375),
+    "karen": (-1.3197, 36.7073),
+    "ngong": (-1.3617, 36.6577),
+    "rongai": (-1.3962, 36.7594),
+    "kitengela": (-1.4733, 36.9606),
+    "ruaka": (-1.2086, 36.7833),
+    "thika": (-1.0333, 37.0693),
+    "nairobi": (-1.2921, 36.8219),
+    "mombasa": (-4.0435, 39.6682),
+    "kisumu": (-0.0917, 34.7680),
+    "nakuru": (-0.3031, 36.0800),
+    "eldoret": (0.5143, 35.2698),
+}
+
+
+def geo_band(latitude):
+    return None if latitude is None else math.floor(latitude / BAND_DEGREES)
+
+
+def parse_coordinates(latitude, longitude):
+    """(latitude, longitude) as floats; ValueError if either is missing or out of range."""
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError("latitude and longitude must be numbers")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("latitude must be within ±90 and longitude within ±180")
+    return latitude, longitude
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, [(min_lon, max_lon), ...]) covering every point within radius_km.
+
+    The longitude range is split in two where it crosses the antimeridian, and
+    covers every longitude when the box reaches a pole.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+    if min_lat <= -90 or max_lat >= 90:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+
+    # Widest at the box's edge nearest a pole
+    dlon = dlat / math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if dlon >= 180:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def bands_between(min_lat, max_lat):
+    return list(range(geo_band(min_lat), geo_band(max_lat) + 1))
+
+
+def place_coordinates(location):
+    """Coordinates of the first known place named in a free-text location, or None."""
+    text = (location or '').lower()
+    for place in sorted(PLACES, key=len, reverse=True):
+        if place in text:
+            return PLACES[place]
+    return None
@@ -0,0 +1,20 @@
+# Gunicorn picks this file up from the working directory.
+import os
+import shutil
+
+# Prometheus multiprocess mode: workers write their metrics to files in this
+# directory so /metrics on any worker reports the whole server (see metrics.py).
+# It must be set before the app (and prometheus_client) is imported.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/salon-prometheus')
+
+
+def on_starting(server):
+    # Drop samples left over from a previous run
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,90 @@
+import time
+
+from flask import g, has_request_context, current_app, request
+from sqlalchemy import event
+
+from models import db
+
+# Per-request SQL instrumentation, switched on with SQL_INSTRUMENTATION. When
+# it is off nothing is registered, so requests and queries pay nothing.
+#
+# Each request collects its statement count, DB time and per-statement
+# totals. Responses carry them in a Server-Timing header; slow requests are
+# logged with their statements, and a statement repeated within one request
+# (same SQL, different parameters) is logged as a likely N+1 query.
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_time = 0.0
+        self.statements = {}  # sql -> [executions, seconds]
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.db_time += elapsed
+        entry = self.statements.setdefault(statement, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def repeated(self, threshold):
+        return [(sql, n, t) for sql, (n, t) in self.statements.items() if n >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    if has_request_context() and 'sql_stats' in g:
+        g.sql_stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def _start_request():
+    g.sql_stats = RequestStats()
+
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    db_ms = stats.db_time * 1000
+
+    response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{stats.count} queries"')
+    response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+    config = current_app.config
+    repeated = stats.repeated(config['SQL_REPEATED_STATEMENT_THRESHOLD'])
+    for sql, executions, seconds in repeated:
+        current_app.logger.warning(
+            f"Possible N+1 on {request.method} {request.path}: {executions} x ({seconds * 1000:.1f}ms) {sql}"
+        )
+    if total_ms >= config['SQL_SLOW_REQUEST_MS']:
+        lines = [f"{n:>4} x {t * 1000:8.1f}ms  {sql}" for sql, (n, t) in
+                 sorted(stats.statements.items(), key=lambda item: -item[1][1])]
+        current_app.logger.warning(
+            f"Slow request {request.method} {request.full_path.rstrip('?')}: {total_ms:.1f}ms total, "
+            f"{db_ms:.1f}ms in {stats.count} queries\n" + '\n'.join(lines)
+        )
+    return response
+
+
+def init_sql_instrumentation(app):
+    """Hook statement timing into every engine of `app` and the request cycle."""
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
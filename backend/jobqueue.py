@@ -0,0 +1,118 @@
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+
+from models import db
+
+# Database-backed work queues: the mail outbox (mailer.py) and the image
+# variants of uploads (uploads.py). Rows have status, attempts, last_error and
+# next_attempt_at columns. Workers claim due 'pending' rows, retry failures
+# with exponential backoff and park a row in the queue's dead status after
+# <prefix>_MAX_ATTEMPTS attempts. Batch size, attempts and the first retry
+# delay come from the <prefix>_BATCH_SIZE, _MAX_ATTEMPTS and _RETRY_DELAY
+# settings.
+
+
+class WorkQueue:
+    """A table of jobs worked through by `flask <queue> run` workers."""
+
+    def __init__(self, model, key, noun, dead_status, config_prefix):
+        self.model = model
+        self.key = key  # unique column, the tie-breaker for rows due at the same time
+        self.noun = noun
+        self.dead_status = dead_status
+        self.config_prefix = config_prefix
+
+    def config(self, name):
+        return current_app.config[f'{self.config_prefix}_{name}']
+
+    def record_failure(self, row, error, max_attempts):
+        row.attempts += 1
+        row.last_error = str(error)
+        if row.attempts >= max_attempts:
+            row.status = self.dead_status
+            return
+
+        # Exponential backoff: retry_delay, 2x, 4x, ...
+        delay = self.config('RETRY_DELAY') * 2 ** (row.attempts - 1)
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+    def drain(self, process, batch_size=None, max_attempts=None, connect=None, on_connect_error=None):
+        """Run `process(row, resource)` on one batch of due rows and commit.
+
+        `process` marks the row done; an exception counts as a failed
+        attempt. `connect()`, if given, is a context manager opened once per
+        batch whose value is passed as `resource`; when opening or closing it
+        fails, every row not attempted yet counts as failed. Returns the
+        number of rows processed.
+        """
+        batch_size = batch_size or self.config('BATCH_SIZE')
+        max_attempts = max_attempts or self.config('MAX_ATTEMPTS')
+        model = self.model
+
+        # SKIP LOCKED lets several workers share the queue on Postgres; SQLite ignores it
+        batch = model.query.filter(
+            model.status == 'pending',
+            model.next_attempt_at <= datetime.utcnow()
+        ).order_by(model.next_attempt_at, self.key).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        if not batch:
+            db.session.rollback()
+            return 0
+
+        done = 0
+        attempted = set()
+        try:
+            with (connect() if connect else nullcontext()) as resource:
+                for row in batch:
+                    attempted.add(id(row))
+                    try:
+                        process(row, resource)
+                    except Exception as e:
+                        current_app.logger.warning(f"Failed to process {self.noun} {getattr(row, self.key.key)}: {e}")
+                        self.record_failure(row, e, max_attempts)
+                    else:
+                        done += 1
+        except Exception as e:
+            current_app.logger.warning(f"Could not open the {self.noun} connection: {e}")
+            if on_connect_error:
+                on_connect_error(e)
+            for row in batch:
+                if id(row) not in attempted:
+                    self.record_failure(row, e, max_attempts)
+
+        db.session.commit()
+        return done
+
+    def run(self, drain, once, interval):
+        """Worker loop behind `flask <queue> run`; `drain()` returns the rows processed."""
+        batch_size = self.config('BATCH_SIZE')
+        while True:
+            done = drain()
+            if done:
+                click.echo(f"Processed {done} {self.noun}(s)")
+            if once:
+                # Keep going while full batches come back, then stop
+                if done < batch_size:
+                    break
+                continue
+            if done < batch_size:
+                time.sleep(interval)
+
+    def echo_status(self):
+        counts = db.session.query(self.model.status, db.func.count(self.key)).group_by(self.model.status).all()
+        for status, count in counts:
+            click.echo(f"{status}: {count}")
+
+    def requeue_dead(self):
+        """Give dead rows a fresh set of attempts. Returns the row count."""
+        count = self.model.query.filter_by(status=self.dead_status).update({
+            self.model.status: 'pending',
+            self.model.attempts: 0,
+            self.model.next_attempt_at: datetime.utcnow()
+        })
+        db.session.commit()
+        return count
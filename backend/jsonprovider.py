@@ -0,0 +1,77 @@
+import decimal
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib provider is used instead
+    orjson = None
+
+# JSON encoding of every jsonify() response and request.get_json() body.
+# JSON_PROVIDER picks an entry of PROVIDERS; "auto" uses orjson when it is
+# installed. Both encode datetime, date and time values as ISO 8601 strings
+# (the same text as .isoformat()), so handlers can return them as they are.
+
+
+class ISOJSONProvider(DefaultJSONProvider):
+    """Flask's stdlib provider, with ISO 8601 dates instead of HTTP dates."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime, date, time)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+def _orjson_default(o):
+    # Types orjson does not encode itself, as Flask's provider encodes them
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(ISOJSONProvider):
+    """orjson-backed provider; falls back to the stdlib for json.dumps-only arguments."""
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_orjson_default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Bytes go straight into the response, without a str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        data = orjson.dumps(obj, default=_orjson_default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+PROVIDERS = {
+    'stdlib': ISOJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def init_json(app):
+    """Install the JSON provider named by JSON_PROVIDER on `app`."""
+    name = app.config['JSON_PROVIDER']
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    elif name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is orjson but orjson is not installed")
+    app.json = PROVIDERS[name](app)
@@ -0,0 +1,78 @@
+import time
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from flask_mail import Message
+
+from models import db, OutboundEmail
+from jobqueue import WorkQueue
+from app import mail
+from metrics import MAIL_SEND_SECONDS, MAIL_FAILURES
+
+outbox_cli = AppGroup('outbox', help="Manage the outbound email queue.")
+
+
+def queue_email(subject, recipients, body):
+    """Add an email to the outbox.
+
+    The row joins the caller's transaction, so the email is only sent if the
+    handler commits. Delivery happens later in the mail worker.
+    """
+    email = OutboundEmail(
+        subject=subject,
+        recipients=list(recipients),
+        body=body,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(email)
+    return email
+
+
+outbox = WorkQueue(OutboundEmail, OutboundEmail.id, 'email', dead_status='dead', config_prefix='MAIL_OUTBOX')
+
+
+def _send(email, conn):
+    started = time.perf_counter()
+    try:
+        conn.send(Message(subject=email.subject, recipients=email.recipients, body=email.body))
+    except Exception:
+        MAIL_FAILURES.labels('message').inc()
+        raise
+    MAIL_SEND_SECONDS.observe(time.perf_counter() - started)
+    email.status = 'sent'
+    email.sent_at = datetime.utcnow()
+    email.last_error = None
+
+
+def drain_outbox(batch_size=None, max_attempts=None):
+    """Send one batch of due emails over a single SMTP connection.
+
+    Returns the number of emails sent.
+    """
+    return outbox.drain(_send, batch_size, max_attempts, connect=mail.connect,
+                        on_connect_error=lambda e: MAIL_FAILURES.labels('connection').inc())
+
+
+@outbox_cli.command('run')
+@click.option('--once', is_flag=True, help="Drain the due emails and exit.")
+@click.option('--interval', default=5.0, show_default=True, help="Seconds to sleep when the queue is empty.")
+@click.option('--metrics-port', type=int, help="Serve Prometheus metrics for this worker on the port.")
+def run_worker(once, interval, metrics_port):
+    """Run the mail worker."""
+    if metrics_port:
+        from prometheus_client import start_http_server
+        start_http_server(metrics_port)
+    outbox.run(drain_outbox, once, interval)
+
+
+@outbox_cli.command('status')
+def outbox_status():
+    """Show the number of emails per status."""
+    outbox.echo_status()
+
+
+@outbox_cli.command('retry-dead')
+def retry_dead():
+    """Move dead-lettered emails back to the queue."""
+    click.echo(f"Requeued {outbox.requeue_dead()} email(s)")
@@ -0,0 +1,142 @@
+import posixpath
+
+from flask import Blueprint, request, jsonify, current_app, redirect, send_file
+from werkzeug.utils import send_file as werkzeug_send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, User, Salon, Stylist, Upload
+from authz import is_admin, admin_required
+from cache import invalidate_catalog
+from storage import get_storage, image_url, image_urls, UPLOAD_KEY
+from uploads import receive_upload, process_in_background, UploadRejected
+
+media_bp = Blueprint('media', __name__)
+
+CONTENT_TYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif', 'webp': 'image/webp'}
+
+
+def _receive():
+    """Upload from the request: a raw image body, or the `file` field of a multipart form.
+
+    A raw body is streamed straight from the socket; a multipart form is
+    spooled to disk by the form parser first.
+    """
+    if request.content_length and request.content_length > current_app.config['UPLOAD_MAX_BYTES']:
+        raise UploadRejected("File is too large", 413)
+    if request.mimetype == 'multipart/form-data':
+        file = request.files.get('file')
+        if not file:
+            raise UploadRejected("No file uploaded")
+        return receive_upload(file.stream)
+    return receive_upload(request.stream)
+
+
+def _set_image(obj, column, catalog=True):
+    try:
+        upload = _receive()
+    except UploadRejected as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), e.status
+
+    setattr(obj, column, upload.key)
+    if catalog:
+        invalidate_catalog()
+    db.session.commit()
+    if upload.status == 'pending':
+        process_in_background()
+
+    return jsonify({
+        "message": "Image uploaded successfully",
+        column: image_url(upload.key),
+        f"{column}_urls": image_urls(upload.key),
+        "upload": upload.to_dict()
+    }), 200
+
+
+@media_bp.route('/users/<int:user_id>/profile-pic', methods=['POST'])
+@jwt_required()
+def upload_user_profile_pic(user_id):
+    if not (is_admin() or int(get_jwt_identity()) == user_id):
+        return jsonify({"error": "Unauthorized access"}), 403
+    user = User.query.get_or_404(user_id)
+    return _set_image(user, 'profile_pic', catalog=False)
+
+
+@media_bp.route('/stylists/<int:stylist_id>/profile-pic', methods=['POST'])
+@jwt_required()
+def upload_stylist_profile_pic(stylist_id):
+    stylist = Stylist.query.get_or_404(stylist_id)
+    if not (is_admin() or int(get_jwt_identity()) == stylist.user_id):
+        return jsonify({"error": "Unauthorized access"}), 403
+    return _set_image(stylist, 'profile_pic')
+
+
+@media_bp.route('/salons/<int:salon_id>/cover-image', methods=['POST'])
+@admin_required
+def upload_salon_cover_image(salon_id):
+    salon = Salon.query.get_or_404(salon_id)
+    return _set_image(salon, 'cover_image')
+
+
+@media_bp.route('/uploads/<digest>', methods=['GET'])
+@jwt_required()
+def get_upload(digest):
+    upload = Upload.query.get_or_404(digest)
+    return jsonify(upload.to_dict()), 200
+
+
+@media_bp.route('/files/<path:key>', methods=['GET'])
+def serve_file(key):
+    """Serve a stored file.
+
+    Keys are content hashes, so a URL always names the same bytes: responses
+    are cacheable for UPLOAD_CACHE_MAX_AGE seconds and marked immutable, and
+    the ETag is derived from the key rather than from file metadata. With
+    UPLOAD_SENDFILE set, a proxy in front of the app sends the bytes.
+    """
+    match = UPLOAD_KEY.match(key)
+    if not match:
+        return jsonify({"error": "File not found"}), 404
+
+    storage = get_storage()
+    if not storage.exists(key):
+        if match.group(2):
+            # The worker has not made this variant yet; the original will do.
+            # The redirect must not be cached, or the variant never gets used.
+            upload = db.session.get(Upload, match.group(1))
+            if upload:
+                response = redirect(storage.url(upload.key), 302)
+                response.cache_control.no_cache = True
+                return response
+        return jsonify({"error": "File not found"}), 404
+
+    config = current_app.config
+    etag = '.'.join(filter(None, match.groups()))  # digest[.variant].ext
+    path = storage.path(key)
+    mimetype = CONTENT_TYPES[match.group(3)]
+
+    if config['UPLOAD_SENDFILE'] == 'x-accel-redirect' and path:
+        # nginx serves the file (and ranges) from an internal location mapped to UPLOAD_ROOT
+        response = current_app.response_class(mimetype=mimetype)
+        response.set_etag(etag)
+        response.make_conditional(request)
+        if response.status_code == 200:
+            response.headers['X-Accel-Redirect'] = f"{config['UPLOAD_ACCEL_PREFIX'].rstrip('/')}/{key}"
+    elif path:
+        # send_file on a path answers Range and If-None-Match requests and hands
+        # the file to the server's wsgi.file_wrapper (sendfile(2) under gunicorn)
+        # or, with x-sendfile, to the proxy
+        response = werkzeug_send_file(
+            path, request.environ, mimetype=mimetype, etag=etag, conditional=True,
+            use_x_sendfile=config['UPLOAD_SENDFILE'] == 'x-sendfile',
+            response_class=current_app.response_class, max_age=config['UPLOAD_CACHE_MAX_AGE']
+        )
+        response.accept_ranges = 'bytes'  # werkzeug only sends it on 206 responses
+    else:
+        response = send_file(storage.open(key), mimetype=mimetype, etag=etag, conditional=True,
+                             download_name=posixpath.basename(key))
+
+    response.cache_control.public = True
+    response.cache_control.max_age = config['UPLOAD_CACHE_MAX_AGE']
+    response.cache_control.immutable = True
+    response.cache_control.no_cache = None
+    return response
@@ -0,0 +1,144 @@
+import ipaddress
+import os
+import time
+
+from flask import g, request, jsonify, Response
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func
+
+from models import db, OutboundEmail
+
+# Prometheus metrics served at /metrics. Under gunicorn, set
+# PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does) so every worker writes its
+# samples to memory-mapped files in that directory and a scrape of any worker
+# aggregates all of them. The endpoint is off unless METRICS_ENABLED is set
+# and only answers clients in METRICS_ALLOWED_IPS (localhost by default).
+
+REQUESTS = Counter(
+    'http_requests_total', "HTTP requests handled.",
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', "Time spent handling HTTP requests.",
+    ['blueprint', 'endpoint', 'method']
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight', "HTTP requests currently being handled.",
+    multiprocess_mode='livesum'
+)
+POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out', "Database connections checked out of the pool.",
+    ['bind'], multiprocess_mode='livesum'
+)
+POOL_OVERFLOW = Gauge(
+    'db_pool_overflow', "Database connections opened beyond the pool size.",
+    ['bind'], multiprocess_mode='livesum'
+)
+MAIL_SEND_SECONDS = Histogram(
+    'mail_send_duration_seconds', "Time spent sending one email over SMTP."
+)
+MAIL_FAILURES = Counter(
+    'mail_send_failures_total', "Failed email deliveries.",
+    ['reason']  # message or connection
+)
+AUTH_FAILURES = Counter(
+    'jwt_auth_failures_total', "Requests rejected by JWT authentication.",
+    ['reason']
+)
+
+
+class OutboxCollector:
+    """Outbox backlog by status, read from the database at scrape time."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def collect(self):
+        gauge = GaugeMetricFamily('mail_outbox_emails', "Emails in the outbox by status.", labels=['status'])
+        with self.app.app_context():
+            counts = db.session.query(OutboundEmail.status, func.count(OutboundEmail.id)) \
+                .group_by(OutboundEmail.status).all()
+            db.session.remove()
+        for status, count in counts:
+            gauge.add_metric([status], count)
+        yield gauge
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    IN_FLIGHT.inc()
+
+
+def _finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    IN_FLIGHT.dec()
+    # Route names rather than paths keep the label set bounded
+    labels = (request.blueprint or '', request.endpoint or 'unmatched', request.method)
+    REQUEST_SECONDS.labels(*labels).observe(time.perf_counter() - started)
+    REQUESTS.labels(*labels, str(response.status_code)).inc()
+    return response
+
+
+def _watch_pool(bind, engine):
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return  # e.g. SingletonThreadPool for in-memory SQLite
+
+    def update(*args):
+        POOL_CHECKED_OUT.labels(bind).set(pool.checkedout())
+        POOL_OVERFLOW.labels(bind).set(max(0, pool.overflow()))
+
+    event.listen(engine, 'checkout', update)
+    event.listen(engine, 'checkin', update)
+
+
+def _register_auth_failures(jwt):
+    # Same responses as flask_jwt_extended's defaults, counted by reason
+    def failure(reason, message, status):
+        AUTH_FAILURES.labels(reason).inc()
+        return jsonify({"msg": message}), status
+
+    jwt.unauthorized_loader(lambda message: failure('missing', message, 401))
+    jwt.invalid_token_loader(lambda message: failure('invalid', message, 422))
+    jwt.expired_token_loader(lambda header, payload: failure('expired', "Token has expired", 401))
+    jwt.revoked_token_loader(lambda header, payload: failure('revoked', "Token has been revoked", 401))
+
+
+def process_registry():
+    """All workers' samples in multiprocess mode, else this process's."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_metrics(app, jwt):
+    """Time requests, watch the pools, count auth failures and serve /metrics."""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            _watch_pool(bind or 'default', engine)
+    _register_auth_failures(jwt)
+
+    registry = process_registry()
+    app_registry = CollectorRegistry()
+    app_registry.register(OutboxCollector(app))
+
+    allowed = [ipaddress.ip_network(ip, strict=False) for ip in app.config['METRICS_ALLOWED_IPS']]
+
+    def metrics():
+        try:
+            client = ipaddress.ip_address(request.remote_addr)
+        except ValueError:
+            client = None
+        if client is None or not any(client in network for network in allowed):
+            return jsonify({"error": "Forbidden"}), 403
+        return Response(generate_latest(registry) + generate_latest(app_registry), mimetype=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
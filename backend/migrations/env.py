@@ -51,6 +51,27 @@ def get_metadata():
     return target_db.metadata
 
 
+# search_index (see search.py) is created outside the models, as are the
+# shadow tables FTS5 keeps for it on SQLite. Leave them out of autogenerate
+# so `flask db migrate`/`check` don't try to drop them.
+UNMANAGED_TABLES = {
+    'search_index',
+    'search_index_data',
+    'search_index_idx',
+    'search_index_config',
+    'search_index_docsize',
+    'search_index_content',
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table':
+        return name not in UNMANAGED_TABLES
+    if type_ == 'index':
+        return object.table.name not in UNMANAGED_TABLES
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +86,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -100,6 +122,7 @@ def run_migrations_online():
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
+            include_object=include_object,
             **conf_args
         )
 
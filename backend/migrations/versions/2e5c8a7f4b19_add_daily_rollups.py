@@ -0,0 +1,37 @@
+"""add daily rollups
+
+Revision ID: 2e5c8a7f4b19
+Revises: 6b9e3f0a2d48
+Create Date: 2026-10-19 10:27:31.402816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e5c8a7f4b19'
+down_revision = '6b9e3f0a2d48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Databases built with db.create_all() may have the table already
+    if not sa.inspect(bind).has_table('daily_rollups'):
+        op.create_table('daily_rollups',
+            sa.Column('dimension', sa.String(length=10), nullable=False),
+            sa.Column('entity_id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('bookings', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Float(), nullable=False),
+            sa.Column('booked_minutes', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('dimension', 'entity_id', 'day', 'status')
+        )
+    # Filled by 4a9c2e6d8b31, once appointments have their rollup snapshot
+
+
+def downgrade():
+    op.drop_table('daily_rollups')
@@ -0,0 +1,32 @@
+"""add cache versions
+
+Revision ID: 3a6e9c1f4b70
+Revises: 5d8f1b3a6c24
+Create Date: 2026-10-19 09:12:33.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a6e9c1f4b70'
+down_revision = '5d8f1b3a6c24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built with db.create_all() may have the table already. Rows
+    # are created on the first bump; a missing row reads as version 0.
+    if not sa.inspect(op.get_bind()).has_table('cache_versions'):
+        op.create_table('cache_versions',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('name')
+        )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
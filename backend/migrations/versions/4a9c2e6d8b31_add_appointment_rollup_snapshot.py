@@ -0,0 +1,39 @@
+"""add appointment rollup snapshot
+
+Revision ID: 4a9c2e6d8b31
+Revises: 7d1f4c9e2a86
+Create Date: 2026-10-20 09:12:40.218457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from reporting import backfill_rollups
+
+
+# revision identifiers, used by Alembic.
+revision = '4a9c2e6d8b31'
+down_revision = '7d1f4c9e2a86'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [('rollup_salon_id', sa.Integer), ('rollup_price', sa.Float), ('rollup_minutes', sa.Integer)]
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Databases built with db.create_all() may have the columns already
+    existing = {column['name'] for column in sa.inspect(bind).get_columns('appointments')}
+    with op.batch_alter_table('appointments') as batch_op:
+        for name, type_ in COLUMNS:
+            if name not in existing:
+                batch_op.add_column(sa.Column(name, type_(), nullable=True))
+
+    # Snapshot the existing appointments at the current prices and rebuild the rollups from them
+    backfill_rollups(connection=bind)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments') as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,43 @@
+"""add indexes for hot queries
+
+Revision ID: 4c1e7a9b2d53
+Revises: b75cc8d90cc1
+Create Date: 2026-10-18 18:05:12.418220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e7a9b2d53'
+down_revision = 'b75cc8d90cc1'
+branch_labels = None
+depends_on = None
+
+# Databases created with db.create_all() since the indexes were added to
+# models.py already have them; if_not_exists keeps the upgrade safe for both.
+INDEXES = [
+    ('idx_appointment_customer', 'appointments', ['customer_id', 'id']),
+    ('idx_review_stylist_visible', 'reviews', ['stylist_id', 'is_hidden']),
+    ('idx_review_customer_stylist', 'reviews', ['customer_id', 'stylist_id']),
+    ('idx_salon_review_salon_visible', 'salon_reviews', ['salon_id', 'is_hidden']),
+    ('idx_salon_review_customer_salon', 'salon_reviews', ['customer_id', 'salon_id']),
+    ('idx_service_salon', 'services', ['salon_id', 'is_active']),
+    ('idx_stylist_salon', 'stylists', ['salon_id', 'is_active']),
+    ('ix_stylists_email', 'stylists', ['email']),
+]
+
+
+def upgrade():
+    # Review pages now filter on is_hidden = false in SQL, which NULL never matches
+    op.execute(sa.text("UPDATE reviews SET is_hidden = false WHERE is_hidden IS NULL"))
+    op.execute(sa.text("UPDATE salon_reviews SET is_hidden = false WHERE is_hidden IS NULL"))
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
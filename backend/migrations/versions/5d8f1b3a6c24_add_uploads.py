@@ -0,0 +1,42 @@
+"""add uploads
+
+Revision ID: 5d8f1b3a6c24
+Revises: e7a2c4b9d610
+Create Date: 2026-10-18 21:14:05.318427
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8f1b3a6c24'
+down_revision = 'e7a2c4b9d610'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built with db.create_all() may have the table already
+    if not sa.inspect(op.get_bind()).has_table('uploads'):
+        op.create_table('uploads',
+            sa.Column('digest', sa.String(length=64), nullable=False),
+            sa.Column('key', sa.String(length=100), nullable=False),
+            sa.Column('content_type', sa.String(length=50), nullable=False),
+            sa.Column('size', sa.Integer(), nullable=False),
+            sa.Column('width', sa.Integer(), nullable=True),
+            sa.Column('height', sa.Integer(), nullable=True),
+            sa.Column('variants', sa.JSON(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('digest')
+        )
+    op.create_index('idx_upload_due', 'uploads', ['status', 'next_attempt_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_upload_due', table_name='uploads')
+    op.drop_table('uploads')
@@ -0,0 +1,41 @@
+"""add rating aggregates
+
+Revision ID: 6b9e3f0a2d48
+Revises: c41d8a2e6f93
+Create Date: 2026-10-19 10:02:45.660213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models import rebuild_rating_aggregates
+
+
+# revision identifiers, used by Alembic.
+revision = '6b9e3f0a2d48'
+down_revision = 'c41d8a2e6f93'
+branch_labels = None
+depends_on = None
+
+TABLES = ('stylists', 'salons')
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table in TABLES:
+        # Databases built with db.create_all() may have the columns already
+        existing = {column['name'] for column in sa.inspect(bind).get_columns(table)}
+        with op.batch_alter_table(table) as batch_op:
+            for name in ('rating_sum', 'rating_count'):
+                if name not in existing:
+                    batch_op.add_column(sa.Column(name, sa.Integer(), server_default='0', nullable=False))
+
+    # Fill the aggregates from the reviews already there
+    rebuild_rating_aggregates(connection=bind)
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('rating_count')
+            batch_op.drop_column('rating_sum')
@@ -0,0 +1,26 @@
+"""add token blocklist created_at index
+
+Revision ID: 7d1f4c9e2a86
+Revises: 2e5c8a7f4b19
+Create Date: 2026-10-19 10:48:12.530977
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d1f4c9e2a86'
+down_revision = '2e5c8a7f4b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Used by the revocation refresh (created_at watermark) and by prune_blocklist
+    op.create_index('ix_token_blocklist_created_at', 'token_blocklist', ['created_at'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_token_blocklist_created_at', table_name='token_blocklist')
@@ -0,0 +1,31 @@
+"""add user token version
+
+Revision ID: 8f2b4d7e1c35
+Revises: 3a6e9c1f4b70
+Create Date: 2026-10-19 09:26:51.771042
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2b4d7e1c35'
+down_revision = '3a6e9c1f4b70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built with db.create_all() may have the column already.
+    # Tokens issued before this revision carry no "ver" claim, which authz
+    # reads as 0, so they stay valid.
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'token_version' not in existing:
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
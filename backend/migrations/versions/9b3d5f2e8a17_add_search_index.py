@@ -0,0 +1,27 @@
+"""add search index
+
+Revision ID: 9b3d5f2e8a17
+Revises: 4c1e7a9b2d53
+Create Date: 2026-10-18 19:12:40.906115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from search import rebuild_search_index, drop_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3d5f2e8a17'
+down_revision = '4c1e7a9b2d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 table on SQLite, tsvector + GIN on PostgreSQL, filled from the catalog
+    rebuild_search_index(op.get_bind())
+
+
+def downgrade():
+    drop_search_index(op.get_bind())
@@ -0,0 +1,163 @@
+"""baseline schema
+
+Revision ID: b75cc8d90cc1
+Revises: 
+Create Date: 2025-06-20 10:41:12.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b75cc8d90cc1'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# The schema the existing databases (instance/salon.db among them) were
+# stamped with. Upgrading an empty database creates it; databases that
+# already have it skip straight to the next revision.
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table('users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password', sa.String(length=256), nullable=False),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('profile_pic', sa.String(length=255), nullable=True),
+            sa.Column('is_admin', sa.Boolean(), nullable=True),
+            sa.Column('is_blocked', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('last_login', sa.DateTime(), nullable=True),
+            sa.Column('is_stylist', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('username'),
+            sa.UniqueConstraint('email')
+        )
+    if 'salons' not in existing:
+        op.create_table('salons',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('slug', sa.String(length=100), nullable=False),
+            sa.Column('location', sa.String(length=200), nullable=False),
+            sa.Column('contact', sa.String(length=50), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('cover_image', sa.String(length=255), nullable=True),
+            sa.Column('opening_hours', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('slug')
+        )
+    if 'services' not in existing:
+        op.create_table('services',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('slug', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('duration', sa.Integer(), nullable=True),
+            sa.Column('price', sa.Float(), nullable=True),
+            sa.Column('category', sa.String(length=50), nullable=True),
+            sa.Column('salon_id', sa.Integer(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(['salon_id'], ['salons.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('slug')
+        )
+    if 'stylists' not in existing:
+        op.create_table('stylists',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('slug', sa.String(length=100), nullable=False),
+            sa.Column('specialization', sa.String(length=100), nullable=True),
+            sa.Column('bio', sa.Text(), nullable=True),
+            sa.Column('profile_pic', sa.String(length=255), nullable=True),
+            sa.Column('salon_id', sa.Integer(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('years_experience', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('email', sa.String(length=120), nullable=True),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['salon_id'], ['salons.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='fk_stylists_user_id'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('slug'),
+            sa.UniqueConstraint('user_id', name='uq_stylists_user_id')
+        )
+    if 'stylist_services' not in existing:
+        op.create_table('stylist_services',
+            sa.Column('stylist_id', sa.Integer(), nullable=False),
+            sa.Column('service_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['service_id'], ['services.id']),
+            sa.ForeignKeyConstraint(['stylist_id'], ['stylists.id']),
+            sa.PrimaryKeyConstraint('stylist_id', 'service_id')
+        )
+    if 'appointments' not in existing:
+        op.create_table('appointments',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('appointment_date', sa.Date(), nullable=True),
+            sa.Column('customer_id', sa.Integer(), nullable=False),
+            sa.Column('stylist_id', sa.Integer(), nullable=False),
+            sa.Column('service_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('appointment_time', sa.Time(), nullable=True),
+            sa.Column('start_datetime', sa.DateTime(), nullable=True),
+            sa.Column('end_datetime', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['customer_id'], ['users.id']),
+            sa.ForeignKeyConstraint(['service_id'], ['services.id']),
+            sa.ForeignKeyConstraint(['stylist_id'], ['stylists.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_appointment_datetime', 'appointments', ['stylist_id', 'start_datetime'], unique=True)
+    if 'reviews' not in existing:
+        op.create_table('reviews',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('customer_id', sa.Integer(), nullable=False),
+            sa.Column('stylist_id', sa.Integer(), nullable=False),
+            sa.Column('appointment_id', sa.Integer(), nullable=True),
+            sa.Column('rating', sa.Integer(), nullable=False),
+            sa.Column('comment', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('is_hidden', sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id']),
+            sa.ForeignKeyConstraint(['customer_id'], ['users.id']),
+            sa.ForeignKeyConstraint(['stylist_id'], ['stylists.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'salon_reviews' not in existing:
+        op.create_table('salon_reviews',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('customer_id', sa.Integer(), nullable=False),
+            sa.Column('salon_id', sa.Integer(), nullable=False),
+            sa.Column('appointment_id', sa.Integer(), nullable=True),
+            sa.Column('rating', sa.Integer(), nullable=False),
+            sa.Column('comment', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('is_hidden', sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id']),
+            sa.ForeignKeyConstraint(['customer_id'], ['users.id']),
+            sa.ForeignKeyConstraint(['salon_id'], ['salons.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'token_blocklist' not in existing:
+        op.create_table('token_blocklist',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('jti', sa.String(length=36), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_token_blocklist_jti', 'token_blocklist', ['jti'], unique=False)
+
+
+def downgrade():
+    for table in ('token_blocklist', 'salon_reviews', 'reviews', 'appointments', 'stylist_services',
+                  'stylists', 'services', 'salons', 'users'):
+        op.drop_table(table)
@@ -0,0 +1,41 @@
+"""add outbound emails
+
+Revision ID: c41d8a2e6f93
+Revises: 8f2b4d7e1c35
+Create Date: 2026-10-19 09:41:07.118935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d8a2e6f93'
+down_revision = '8f2b4d7e1c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built with db.create_all() may have the table already
+    if not sa.inspect(op.get_bind()).has_table('outbound_emails'):
+        op.create_table('outbound_emails',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('subject', sa.String(length=255), nullable=False),
+            sa.Column('recipients', sa.JSON(), nullable=False),
+            sa.Column('body', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('sent_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('idx_outbound_email_due', 'outbound_emails', ['status', 'next_attempt_at'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_outbound_email_due', table_name='outbound_emails')
+    op.drop_table('outbound_emails')
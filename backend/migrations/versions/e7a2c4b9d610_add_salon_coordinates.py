@@ -0,0 +1,43 @@
+"""add salon coordinates
+
+Revision ID: e7a2c4b9d610
+Revises: 9b3d5f2e8a17
+Create Date: 2026-10-18 20:03:27.551904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2c4b9d610'
+down_revision = '9b3d5f2e8a17'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('geo_band', sa.Integer(), nullable=True),
+]
+
+
+def upgrade():
+    # Databases built with db.create_all() may have the columns already.
+    # Existing salons only have a free-text location; fill them in with
+    # `flask geo backfill`.
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('salons')}
+    with op.batch_alter_table('salons') as batch_op:
+        for column in COLUMNS:
+            if column.name not in existing:
+                batch_op.add_column(column)
+    op.create_index('idx_salon_geo', 'salons', ['geo_band', 'longitude'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('idx_salon_geo', table_name='salons')
+    with op.batch_alter_table('salons') as batch_op:
+        batch_op.drop_column('geo_band')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
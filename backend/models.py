@@ -1,23 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, verify_password
 from flask_jwt_extended import create_access_token
 from sqlalchemy import func
+from sqlalchemy.orm import validates
 from datetime import datetime, timedelta
-import os
-from werkzeug.utils import secure_filename
-
-db = SQLAlchemy()
-
-# File saving helper
-def save_file(file, folder):
-    if file and file.filename:
-        filename = secure_filename(f"{datetime.now().timestamp()}_{file.filename}")
-        filepath = os.path.join('static', 'uploads', folder, filename)
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        file.save(filepath)
-        return f"uploads/{folder}/{filename}"
-    return None
+from replicas import RoutingSession
+from geo import geo_band
+from storage import image_url, image_urls
 
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # USER MODEL
 class User(db.Model):
@@ -32,6 +23,7 @@ class User(db.Model):
     is_admin = db.Column(db.Boolean, default=False)
     is_stylist = db.Column(db.Boolean, default=False)
     is_blocked = db.Column(db.Boolean, default=False)
+    token_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
 
@@ -47,15 +39,23 @@ class User(db.Model):
     salon_reviews = db.relationship('SalonReview', backref='customer', lazy=True, cascade="all, delete-orphan")
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+
+    def token_claims(self):
+        # Role claims read by authz.py; "ver" must match token_version
+        return {
+            'is_admin': bool(self.is_admin),
+            'is_stylist': bool(self.is_stylist),
+            'ver': self.token_version or 0
+        }
 
     def generate_token(self):
         self.last_login = datetime.utcnow()
         db.session.commit()
-        return create_access_token(identity=self.id)
+        return create_access_token(identity=str(self.id), additional_claims=self.token_claims())
 
     def to_dict(self):
         return {
@@ -63,7 +63,8 @@ class User(db.Model):
             "username": self.username,
             "email": self.email,
             "phone": self.phone,
-            "profile_pic": self.profile_pic,
+            "profile_pic": image_url(self.profile_pic),
+            "profile_pic_urls": image_urls(self.profile_pic),
             "is_admin": self.is_admin,
             "is_stylist": self.is_stylist,
             "created_at": self.created_at.isoformat() if self.created_at else None,
@@ -84,10 +85,12 @@ class Stylist(db.Model):
     specialization = db.Column(db.String(100))
     bio = db.Column(db.Text)
     phone = db.Column(db.String(20))
-    email = db.Column(db.String(120))
+    email = db.Column(db.String(120), index=True)  # looked up on login
     profile_pic = db.Column(db.String(255))
     is_active = db.Column(db.Boolean, default=True)
     years_experience = db.Column(db.Integer, default=0)
+    rating_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -96,6 +99,10 @@ class Stylist(db.Model):
     reviews = db.relationship('Review', backref='stylist', lazy='dynamic', cascade="all, delete-orphan")
     services = db.relationship('Service', secondary='stylist_services', back_populates='stylists', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('idx_stylist_salon', 'salon_id', 'is_active'),
+    )
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if not self.slug and self.name:
@@ -105,11 +112,8 @@ class Stylist(db.Model):
         return self.name.lower().replace(' ', '-') + '-' + str(int(datetime.utcnow().timestamp()))
 
     def average_rating(self):
-        avg = db.session.query(func.avg(Review.rating)).filter(
-            Review.stylist_id == self.id,
-            Review.is_hidden == False
-        ).scalar()
-        return round(avg, 2) if avg else 0.0
+        # Read from the denormalized aggregate, see adjust_rating()
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else 0.0
 
     def to_dict(self, include_services=False, include_user=False):
         data = {
@@ -120,7 +124,8 @@ class Stylist(db.Model):
             "bio": self.bio,
             "phone": self.phone,
             "email": self.email,
-            "profile_pic": self.profile_pic,
+            "profile_pic": image_url(self.profile_pic),
+            "profile_pic_urls": image_urls(self.profile_pic),
             "salon_id": self.salon_id,
             "salon_name": self.salon.name if self.salon else None,
             "is_active": self.is_active,
@@ -147,18 +152,29 @@ class Salon(db.Model):
     description = db.Column(db.Text)
     cover_image = db.Column(db.String(255))
     opening_hours = db.Column(db.JSON)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geo_band = db.Column(db.Integer)  # latitude band for nearby lookups, see geo.py
+    rating_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     services = db.relationship('Service', backref='salon', lazy=True, cascade="all, delete-orphan")
     stylists = db.relationship('Stylist', backref='salon', lazy=True, cascade="all, delete-orphan")
     reviews = db.relationship('SalonReview', backref='salon', lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('idx_salon_geo', 'geo_band', 'longitude'),
+    )
+
+    @validates('latitude')
+    def _update_geo_band(self, key, latitude):
+        self.geo_band = geo_band(latitude)
+        return latitude
+
     def average_rating(self):
-        avg = db.session.query(func.avg(SalonReview.rating)).filter(
-            SalonReview.salon_id == self.id,
-            SalonReview.is_hidden == False
-        ).scalar()
-        return round(avg, 2) if avg else 0.0
+        # Read from the denormalized aggregate, see adjust_rating()
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else 0.0
 
     def to_dict(self):
         return {
@@ -168,8 +184,11 @@ class Salon(db.Model):
             "location": self.location,
             "contact": self.contact,
             "description": self.description,
-            "cover_image": self.cover_image,
+            "cover_image": image_url(self.cover_image),
+            "cover_image_urls": image_urls(self.cover_image),
             "opening_hours": self.opening_hours,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
             "average_rating": self.average_rating(),
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
@@ -192,6 +211,10 @@ class Service(db.Model):
     stylists = db.relationship('Stylist', secondary='stylist_services', back_populates='services')
     appointments = db.relationship('Appointment', backref='service', lazy=True)
 
+    __table_args__ = (
+        db.Index('idx_service_salon', 'salon_id', 'is_active'),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -228,9 +251,14 @@ class Appointment(db.Model):
     status = db.Column(db.String(20), default='pending')
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # What the booking added to daily_rollups, so removing it subtracts the same (see reporting.py)
+    rollup_salon_id = db.Column(db.Integer)
+    rollup_price = db.Column(db.Float)
+    rollup_minutes = db.Column(db.Integer)
 
     __table_args__ = (
         db.Index('idx_appointment_datetime', 'stylist_id', 'start_datetime', unique=True),
+        db.Index('idx_appointment_customer', 'customer_id', 'id'),  # keyset pages of a customer's bookings
     )
 
     def __init__(self, **kwargs):
@@ -269,6 +297,12 @@ class Review(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_hidden = db.Column(db.Boolean, default=False)
     appointment = db.relationship("Appointment", backref="reviews", lazy=True)
+
+    __table_args__ = (
+        db.Index('idx_review_stylist_visible', 'stylist_id', 'is_hidden'),
+        db.Index('idx_review_customer_stylist', 'customer_id', 'stylist_id'),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -296,6 +330,11 @@ class SalonReview(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_hidden = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        db.Index('idx_salon_review_salon_visible', 'salon_id', 'is_hidden'),
+        db.Index('idx_salon_review_customer_salon', 'customer_id', 'salon_id'),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -310,10 +349,144 @@ class SalonReview(db.Model):
         }
 
 
+# RATING AGGREGATES
+# Stylist and Salon keep rating_sum/rating_count for their visible reviews so
+# average_rating() needs no query. Every write that creates, hides, shows or
+# deletes a review must go through adjust_rating() or rebuild_rating_aggregates().
+def adjust_rating(model, object_id, rating, count=1):
+    """Add (count=1) or remove (count=-1) one visible rating on a Stylist or Salon."""
+    model.query.filter_by(id=object_id).update({
+        model.rating_sum: model.rating_sum + int(rating) * count,
+        model.rating_count: model.rating_count + count
+    })
+
+
+def rebuild_rating_aggregates(stylist_ids=None, salon_ids=None, connection=None):
+    """Recompute the aggregates from the review tables (all rows when no ids are given).
+
+    Runs on the session unless `connection` is given (migrations pass theirs).
+    """
+    execute = (connection or db.session).execute
+    for model, review_model, fk, ids in (
+        (Stylist, Review, Review.stylist_id, stylist_ids),
+        (Salon, SalonReview, SalonReview.salon_id, salon_ids),
+    ):
+        visible = db.and_(fk == model.id, review_model.is_hidden == False)
+        statement = db.update(model).values({
+            model.rating_sum: db.select(func.coalesce(func.sum(review_model.rating), 0)).where(visible).scalar_subquery(),
+            model.rating_count: db.select(func.count(review_model.id)).where(visible).scalar_subquery()
+        })
+        if ids is not None:
+            if not ids:
+                continue
+            statement = statement.where(model.id.in_(ids))
+        execute(statement.execution_options(synchronize_session=False))
+
+
 # TOKEN BLOCKLIST
 class TokenBlocklist(db.Model):
     __tablename__ = 'token_blocklist'
 
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # pruned by authz.prune_blocklist
+
+
+# OUTBOUND EMAIL (outbox drained by the mail worker, see mailer.py)
+class OutboundEmail(db.Model):
+    __tablename__ = 'outbound_emails'
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.JSON, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sent, dead
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_outbound_email_due', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "subject": self.subject,
+            "recipients": self.recipients,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "next_attempt_at": self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None
+        }
+
+
+# CACHE VERSIONS (shared counters for cache invalidation and HTTP validators, see cache.py)
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# DAILY ROLLUPS (reporting aggregates maintained by reporting.py)
+class DailyRollup(db.Model):
+    __tablename__ = 'daily_rollups'
+
+    dimension = db.Column(db.String(10), primary_key=True)  # salon, stylist, service
+    entity_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    bookings = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0, nullable=False)
+    booked_minutes = db.Column(db.Integer, default=0, nullable=False)
+
+    def to_dict(self):
+        return {
+            f"{self.dimension}_id": self.entity_id,
+            "day": self.day.isoformat(),
+            "status": self.status,
+            "bookings": self.bookings,
+            "revenue": round(self.revenue, 2),
+            "booked_minutes": self.booked_minutes
+        }
+
+
+# UPLOADS (content-addressed files and their variant jobs, see uploads.py)
+class Upload(db.Model):
+    __tablename__ = 'uploads'
+
+    digest = db.Column(db.String(64), primary_key=True)  # sha256 of the content
+    key = db.Column(db.String(100), nullable=False)  # storage key of the original
+    content_type = db.Column(db.String(50), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    variants = db.Column(db.JSON)  # variant name -> storage key, once made
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, ready, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_upload_due', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            "digest": self.digest,
+            "key": self.key,
+            "content_type": self.content_type,
+            "size": self.size,
+            "width": self.width,
+            "height": self.height,
+            "status": self.status,
+            "urls": image_urls(self.key),
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
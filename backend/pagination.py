@@ -0,0 +1,60 @@
+import base64
+import json
+from urllib.parse import urlencode
+
+from flask import request, jsonify, abort, make_response, current_app
+
+
+def encode_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps({"k": value}).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode()))["k"]
+    except (ValueError, KeyError, TypeError):
+        value = None
+    # Keys are scalar column values; anything else would reach the SQL comparison
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        abort(make_response(jsonify({"error": "Invalid cursor"}), 400))
+    return value
+
+
+def page_limit():
+    """The `limit` query argument, clamped to the configured maximum."""
+    default_size = current_app.config['PAGINATION_DEFAULT_LIMIT']
+    max_size = current_app.config['PAGINATION_MAX_LIMIT']
+    limit = request.args.get('limit', default_size, type=int)
+    return max(1, min(limit, max_size))
+
+
+def paginate(query, key):
+    """Keyset-paginate `query` on the unique, sortable column `key`.
+
+    Reads `limit` and `cursor` from the query string and returns
+    (items, next_cursor); next_cursor is None on the last page.
+    """
+    limit = page_limit()
+    cursor = request.args.get('cursor')
+    if cursor:
+        query = query.filter(key > decode_cursor(cursor))
+
+    # Fetch one extra row to know whether another page exists
+    items = query.order_by(key).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(getattr(items[-1], key.key))
+
+
+def paginated_response(data, next_cursor):
+    """JSON list response carrying the next cursor in X-Next-Cursor and Link headers."""
+    response = jsonify(data)
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        next_url = f"{request.base_url}?{urlencode(args)}"
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response, 200
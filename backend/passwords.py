@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, jsonify, make_response, abort
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Password hashing and verification run in a small per-worker process pool so
+# the CPU-bound KDF never runs on the request thread. The number of hashes
+# queued or running per worker is capped at PASSWORD_HASH_QUEUE_DEPTH; past
+# that, requests get a 503 instead of piling up behind the pool.
+
+_pool = None
+_pool_pid = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def hash_method():
+    """Werkzeug method string for the configured PASSWORD_HASH_METHOD and PASSWORD_HASH_COST."""
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    cost = current_app.config['PASSWORD_HASH_COST']
+    if method == 'scrypt':
+        return f'scrypt:{cost}:8:1'
+    if method == 'pbkdf2':
+        return f'pbkdf2:sha256:{cost}'
+    raise ValueError(f"Unsupported PASSWORD_HASH_METHOD: {method}")
+
+
+def _mp_context():
+    # Forking a threaded web worker can copy locks held by other threads (the
+    # DB pool, logging) into the child, where they stay locked. The pool's
+    # processes only need werkzeug, so they start clean from a fork server,
+    # or with spawn where there is none.
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['werkzeug.security'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _get_pool():
+    global _pool, _pool_pid, _slots
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if workers <= 0:
+        return None, None
+    with _pool_lock:
+        # A pool created before gunicorn forked belongs to the parent
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+            _pool_pid = os.getpid()
+            _slots = threading.BoundedSemaphore(workers + current_app.config['PASSWORD_HASH_QUEUE_DEPTH'])
+        return _pool, _slots
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def _run(fn, *args):
+    pool, slots = _get_pool()
+    if pool is None:
+        return fn(*args)
+    if not slots.acquire(blocking=False):
+        abort(make_response(jsonify({"error": "Server is busy, please try again shortly"}), 503, {"Retry-After": "1"}))
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        # A pool process died (e.g. OOM-killed); start a fresh pool next time
+        _reset_pool()
+        return fn(*args)
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """True when `pwhash` was made with a different method or cost than configured."""
+    return pwhash.split('$', 1)[0] != hash_method()
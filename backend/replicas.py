@@ -0,0 +1,185 @@
+import itertools
+import threading
+import time
+
+from flask import g, has_request_context, current_app, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_sqlalchemy.session import Session
+from jwt.exceptions import PyJWTError
+from sqlalchemy import event, text, Select, Insert, Update, Delete
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+# Read-replica routing. DATABASE_REPLICA_URLS adds one SQLAlchemy bind per
+# replica (replica1, replica2, ...). GET requests to the blueprints below read
+# from a healthy replica, picked round-robin once per request; everything
+# else, and any statement that writes or locks, goes to the primary.
+#
+# After a user writes, their reads stay on the primary for
+# REPLICA_READ_AFTER_WRITE seconds so they see their own changes despite
+# replication lag. That window is kept per process: with several gunicorn
+# workers a user's next request may land on a worker that does not know
+# about the write, so keep the window longer than the expected lag.
+
+REPLICA_BLUEPRINTS = {'salon', 'stylist_bp', 'customer_bp'}
+WRITES = (Insert, Update, Delete)
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS for a comma-separated list of replica URLs."""
+    urls = [url.strip() for url in urls.split(',') if url.strip()]
+    return {f'replica{i}': url for i, url in enumerate(urls, start=1)}
+
+
+class RoutingSession(Session):
+    """Sends reads to the request's replica, if it has one, and writes to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or isinstance(clause, WRITES):
+                g.db_wrote = True
+            elif g.get('db_replica') and not g.get('db_wrote') and isinstance(clause, Select) \
+                    and clause._for_update_arg is None:
+                return self._db.engines[g.db_replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaSet:
+    """Health of the configured replicas, checked at most every REPLICA_HEALTH_INTERVAL seconds.
+
+    A replica is healthy when it answers and, on PostgreSQL, is no more than
+    REPLICA_MAX_LAG seconds behind. A connection error on a replica marks it
+    unhealthy straight away; reads fall back to the primary when none is left.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self._healthy = dict.fromkeys(self.keys, True)
+        self._checked_at = dict.fromkeys(self.keys, 0.0)
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def choose(self):
+        start = next(self._next)
+        for i in range(len(self.keys)):
+            key = self.keys[(start + i) % len(self.keys)]
+            if self.is_healthy(key):
+                return key
+        return None
+
+    def is_healthy(self, key):
+        now = time.monotonic()
+        with self._lock:
+            due = now - self._checked_at[key] >= current_app.config['REPLICA_HEALTH_INTERVAL']
+            if due:
+                self._checked_at[key] = now  # one check at a time per replica
+        if due:
+            self._healthy[key] = self.check(key)[0]
+        return self._healthy[key]
+
+    def mark_down(self, key):
+        with self._lock:
+            self._healthy[key] = False
+            self._checked_at[key] = time.monotonic()
+
+    def check(self, key):
+        """(healthy, lag in seconds or None, error message or None) for one replica."""
+        engine = current_app.extensions['sqlalchemy'].engines[key]
+        try:
+            with engine.connect() as conn:
+                lag = None
+                if engine.dialect.name == 'postgresql':
+                    # Zero when everything received has been replayed, so an
+                    # idle primary does not look like lag
+                    lag = conn.execute(text(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                    )).scalar()
+                else:
+                    conn.execute(text("SELECT 1"))
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f"Replica {key} is unavailable: {e}")
+            return False, None, str(e)
+        if lag is not None and lag > current_app.config['REPLICA_MAX_LAG']:
+            current_app.logger.warning(f"Replica {key} is {lag:.1f}s behind the primary")
+            return False, float(lag), "replication lag"
+        return True, None if lag is None else float(lag), None
+
+
+class RecentWriters:
+    """User ids whose reads stay on the primary, with the time their window ends."""
+
+    def __init__(self):
+        self._until = {}
+
+    def add(self, identity, seconds):
+        now = time.monotonic()
+        if len(self._until) > 10000:
+            self._until = {key: until for key, until in self._until.items() if until > now}
+        self._until[identity] = now + seconds
+
+    def __contains__(self, identity):
+        until = self._until.get(identity)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            self._until.pop(identity, None)
+            return False
+        return True
+
+    def __bool__(self):
+        return bool(self._until)
+
+
+recent_writers = RecentWriters()
+
+
+def _request_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:  # the request was never authenticated
+        return None
+
+
+def _choose_replica():
+    if request.method not in ('GET', 'HEAD') or request.blueprint not in REPLICA_BLUEPRINTS:
+        return
+    if recent_writers:
+        try:
+            verify_jwt_in_request(optional=True)
+        except (JWTExtendedException, PyJWTError):
+            pass  # the view rejects the token itself
+        if _request_identity() in recent_writers:
+            return
+    g.db_replica = current_app.extensions['replicas'].choose()
+
+
+def _remember_write(response):
+    if g.get('db_wrote') and response.status_code < 400:
+        identity = _request_identity()
+        if identity is not None:
+            recent_writers.add(identity, current_app.config['REPLICA_READ_AFTER_WRITE'])
+    return response
+
+
+def init_replicas(app):
+    """Route reads of `app` to the binds named replica*, if there are any."""
+    keys = [key for key in app.config.get('SQLALCHEMY_BINDS', {}) if key.startswith('replica')]
+    if not keys:
+        return
+    replicas = ReplicaSet(keys)
+    app.extensions['replicas'] = replicas
+
+    with app.app_context():
+        engines = current_app.extensions['sqlalchemy'].engines
+        for key in keys:
+            def handle_error(exception_context, key=key):
+                if exception_context.is_disconnect or \
+                        isinstance(exception_context.sqlalchemy_exception, OperationalError):
+                    app.logger.warning(f"Replica {key} failed, routing reads elsewhere: "
+                                       f"{exception_context.original_exception}")
+                    replicas.mark_down(key)
+            event.listen(engines[key], 'handle_error', handle_error)
+
+    app.before_request(_choose_replica)
+    app.after_request(_remember_write)
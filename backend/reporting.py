@@ -0,0 +1,231 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, literal
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Appointment, Stylist, Service, Salon, DailyRollup
+from availability import SLOT_STEP_MINUTES, opening_window
+
+# Reporting rollups: bookings, revenue (Service.price) and booked minutes
+# (Service.duration) per day and status, kept for each salon, stylist and
+# service in daily_rollups. Appointment writes apply their deltas in the same
+# transaction; `flask reports backfill` rebuilds the table from appointments.
+# The salon, price and minutes an appointment counts with are snapshotted on
+# the appointment (rollup_*) when it is booked, so deleting it or changing its
+# status later subtracts exactly what was added, whatever happened to the
+# service or stylist since.
+
+# The snapshot, or for appointments without one the current values
+SALON_ID = func.coalesce(Appointment.rollup_salon_id, Stylist.salon_id)
+PRICE = func.coalesce(Appointment.rollup_price, Service.price, 0)
+MINUTES = func.coalesce(Appointment.rollup_minutes, Service.duration, SLOT_STEP_MINUTES)
+
+DIMENSIONS = {
+    'salon': SALON_ID,
+    'stylist': Appointment.stylist_id,
+    'service': Appointment.service_id
+}
+
+
+def snapshot_rollup_values(stylist, service):
+    """rollup_* column values for a new appointment of `service` with `stylist`."""
+    return {
+        "rollup_salon_id": stylist.salon_id,
+        "rollup_price": service.price or 0,
+        "rollup_minutes": service.duration or SLOT_STEP_MINUTES
+    }
+
+
+def _facts(*criteria):
+    """(day, status, salon_id, stylist_id, service_id, price, minutes) rows for appointments."""
+    return db.session.query(
+        Appointment.appointment_date,
+        func.coalesce(Appointment.status, 'pending'),
+        SALON_ID,
+        Appointment.stylist_id,
+        Appointment.service_id,
+        PRICE,
+        MINUTES
+    ).outerjoin(Stylist, Appointment.stylist_id == Stylist.id) \
+     .outerjoin(Service, Appointment.service_id == Service.id) \
+     .filter(Appointment.appointment_date.isnot(None), *criteria)
+
+
+def _apply(deltas):
+    for (dimension, entity_id, day, status), (bookings, revenue, minutes) in deltas.items():
+        if entity_id is None or not bookings:
+            continue
+        key = dict(dimension=dimension, entity_id=entity_id, day=day, status=status)
+        values = {
+            DailyRollup.bookings: DailyRollup.bookings + bookings,
+            DailyRollup.revenue: DailyRollup.revenue + revenue,
+            DailyRollup.booked_minutes: DailyRollup.booked_minutes + minutes
+        }
+        if DailyRollup.query.filter_by(**key).update(values, synchronize_session=False):
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(DailyRollup(**key, bookings=bookings, revenue=revenue, booked_minutes=minutes))
+        except IntegrityError:
+            # Another transaction created the row first
+            DailyRollup.query.filter_by(**key).update(values, synchronize_session=False)
+
+
+def rollup_appointments(*criteria, sign=1, status=None):
+    """Add (sign=1) or remove (sign=-1) the matching appointments from the rollups.
+
+    Call with sign=-1 before deleting appointments and sign=1 after creating
+    them; `status` overrides the stored status (used for status changes).
+    """
+    deltas = defaultdict(lambda: [0, 0.0, 0])
+    for day, row_status, salon_id, stylist_id, service_id, price, minutes in _facts(*criteria):
+        for dimension, entity_id in (('salon', salon_id), ('stylist', stylist_id), ('service', service_id)):
+            delta = deltas[(dimension, entity_id, day, status or row_status)]
+            delta[0] += sign
+            delta[1] += sign * price
+            delta[2] += sign * minutes
+    _apply(deltas)
+
+
+def appointment_status_changed(appointment, old_status):
+    """Move the appointment from its old status to its current one; call before committing."""
+    rollup_appointments(Appointment.id == appointment.id, sign=-1, status=old_status)
+    rollup_appointments(Appointment.id == appointment.id, status=appointment.status)
+
+
+def snapshot_appointments(connection=None):
+    """Fill the rollup_* snapshot of appointments that have none from the current values."""
+    execute = (connection or db.session).execute
+    execute(db.update(Appointment).where(Appointment.rollup_price.is_(None)).values({
+        Appointment.rollup_salon_id: db.select(Stylist.salon_id)
+            .where(Stylist.id == Appointment.stylist_id).scalar_subquery(),
+        Appointment.rollup_price: func.coalesce(
+            db.select(Service.price).where(Service.id == Appointment.service_id).scalar_subquery(), 0),
+        Appointment.rollup_minutes: func.coalesce(
+            db.select(Service.duration).where(Service.id == Appointment.service_id).scalar_subquery(),
+            SLOT_STEP_MINUTES)
+    }).execution_options(synchronize_session=False))
+
+
+def backfill_rollups(date_from=None, date_to=None, connection=None):
+    """Rebuild the rollups for the date range (all dates by default) with INSERT ... SELECT.
+
+    Appointments without a snapshot get one first, at the current prices.
+    Runs on the session unless `connection` is given (migrations pass theirs).
+    """
+    execute = (connection or db.session).execute
+    snapshot_appointments(connection)
+    day_criteria = []
+    if date_from:
+        day_criteria.append(DailyRollup.day >= date_from)
+    if date_to:
+        day_criteria.append(DailyRollup.day <= date_to)
+    execute(db.delete(DailyRollup).where(*day_criteria).execution_options(synchronize_session=False))
+
+    for dimension, entity in DIMENSIONS.items():
+        criteria = [Appointment.appointment_date.isnot(None), entity.isnot(None)]
+        if date_from:
+            criteria.append(Appointment.appointment_date >= date_from)
+        if date_to:
+            criteria.append(Appointment.appointment_date <= date_to)
+        status = func.coalesce(Appointment.status, 'pending')
+        select = db.select(
+            literal(dimension),
+            entity,
+            Appointment.appointment_date,
+            status,
+            func.count(Appointment.id),
+            func.coalesce(func.sum(PRICE), 0),
+            func.coalesce(func.sum(MINUTES), 0)
+        ).select_from(Appointment) \
+         .outerjoin(Stylist, Appointment.stylist_id == Stylist.id) \
+         .outerjoin(Service, Appointment.service_id == Service.id) \
+         .where(*criteria) \
+         .group_by(entity, Appointment.appointment_date, status)
+        execute(db.insert(DailyRollup).from_select(
+            ['dimension', 'entity_id', 'day', 'status', 'bookings', 'revenue', 'booked_minutes'], select
+        ))
+
+
+def _open_minutes(opening_hours, day):
+    window = opening_window(opening_hours, day)
+    if window is None:
+        return 0
+    return max(0, int((datetime.combine(day, window[1]) - datetime.combine(day, window[0])).total_seconds() // 60))
+
+
+def _capacity(dimension, entity_ids):
+    """entity id -> (opening_hours, stylist count) for salons and stylists."""
+    if dimension == 'stylist':
+        rows = db.session.query(Stylist.id, Salon.opening_hours, literal(1)) \
+            .outerjoin(Salon, Stylist.salon_id == Salon.id).filter(Stylist.id.in_(entity_ids))
+    else:
+        rows = db.session.query(Salon.id, Salon.opening_hours, func.count(Stylist.id)) \
+            .outerjoin(Stylist, (Stylist.salon_id == Salon.id) & Stylist.is_active.isnot(False)) \
+            .filter(Salon.id.in_(entity_ids)).group_by(Salon.id, Salon.opening_hours)
+    return {entity_id: (opening_hours, stylists) for entity_id, opening_hours, stylists in rows}
+
+
+def utilization(dimension, rows):
+    """Booked minutes (all statuses) over open minutes per entity and day.
+
+    Capacity uses the salon's current opening hours and, for salons, the
+    current number of active stylists.
+    """
+    booked = defaultdict(int)
+    for row in rows:
+        booked[(row.entity_id, row.day)] += row.booked_minutes
+    capacity = _capacity(dimension, {entity_id for entity_id, _ in booked})
+
+    result = []
+    for (entity_id, day), minutes in sorted(booked.items(), key=lambda item: (item[0][1], item[0][0])):
+        opening_hours, stylists = capacity.get(entity_id, (None, 0))
+        open_minutes = _open_minutes(opening_hours, day) * stylists
+        result.append({
+            f"{dimension}_id": entity_id,
+            "day": day.isoformat(),
+            "booked_minutes": minutes,
+            "open_minutes": open_minutes,
+            "utilization": round(minutes / open_minutes, 4) if open_minutes else None
+        })
+    return result
+
+
+def daily_report(dimension, date_from, date_to, entity_id=None):
+    """Rollup rows and per-status totals for the range; reads O(days) rows per entity."""
+    query = DailyRollup.query.filter(
+        DailyRollup.dimension == dimension,
+        DailyRollup.day >= date_from,
+        DailyRollup.day <= date_to,
+        DailyRollup.bookings != 0  # rows left behind when every booking was removed
+    )
+    if entity_id is not None:
+        query = query.filter(DailyRollup.entity_id == entity_id)
+    rows = query.order_by(DailyRollup.day, DailyRollup.entity_id, DailyRollup.status).all()
+
+    totals = defaultdict(lambda: {"bookings": 0, "revenue": 0.0, "booked_minutes": 0})
+    for row in rows:
+        total = totals[row.status]
+        total["bookings"] += row.bookings
+        total["revenue"] += row.revenue
+        total["booked_minutes"] += row.booked_minutes
+    for total in totals.values():
+        total["revenue"] = round(total["revenue"], 2)
+
+    report = {
+        "dimension": dimension,
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "rows": [row.to_dict() for row in rows],
+        "totals": totals
+    }
+    if dimension in ('salon', 'stylist'):
+        report["utilization"] = utilization(dimension, rows)
+    return report
+
+
+def default_range(days=30):
+    """The last `days` days, including today."""
+    today = date.today()
+    return today - timedelta(days=days - 1), today
@@ -1,24 +1,95 @@
 from flask import Blueprint, request, jsonify
-from models import db, Salon, Stylist, Service, Review, SalonReview, Appointment, User
+from models import db, Salon, Stylist, Service, Review, SalonReview, Appointment, User, adjust_rating
 
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from pagination import paginate, paginated_response, page_limit, encode_cursor, decode_cursor
+from authz import admin_required
+from appointments import appointment_rows, book_appointment, BookingConflict
+from availability import salon_availability_matrix, SLOT_STEP_MINUTES
+from search import KINDS, search_terms, search_listings
+from geo import parse_coordinates, bounding_box, bands_between, haversine_km, DEFAULT_RADIUS_KM, MAX_RADIUS_KM
+from cache import cached_catalog, conditional_get, invalidate_catalog, appointments_changed, CATALOG, APPOINTMENTS
 from datetime import datetime
+import math
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 
 salon_bp = Blueprint('salon', __name__)
 
 # Salon endpoints
 @salon_bp.route('/salons', methods=['GET'])
+@conditional_get(CATALOG, public=True)
+@cached_catalog
 def get_salons():
-    salons = Salon.query.all()
-    return jsonify([{
+    salons, next_cursor = paginate(Salon.query, Salon.id)
+    return paginated_response([{
         'id': salon.id,
         'name': salon.name,
         'location': salon.location,
         'contact': salon.contact,
         'description': salon.description
-    } for salon in salons]), 200
+    } for salon in salons], next_cursor)
+
+def _salons_within(latitude, longitude, radius, limit):
+    """(distance in km, salon row) for up to `limit` salons within `radius` km, nearest first."""
+    min_lat, max_lat, longitude_ranges = bounding_box(latitude, longitude, radius)
+    candidates = db.session.query(Salon.id, Salon.name, Salon.location, Salon.latitude, Salon.longitude).filter(
+        Salon.geo_band.in_(bands_between(min_lat, max_lat)),
+        Salon.latitude.between(min_lat, max_lat),
+        or_(*[Salon.longitude.between(low, high) for low, high in longitude_ranges])
+    )
+    if len(longitude_ranges) == 1:
+        # Let the database keep the closest few by flat-earth distance, which
+        # orders points like the haversine distance does at these scales;
+        # the margin covers the small disagreements near the cut
+        scale = math.cos(math.radians(latitude))
+        dlat, dlon = Salon.latitude - latitude, (Salon.longitude - longitude) * scale
+        candidates = candidates.order_by(dlat * dlat + dlon * dlon).limit(limit * 2 + 10)
+    nearby = []
+    for salon in candidates:
+        distance = haversine_km(latitude, longitude, salon.latitude, salon.longitude)
+        if distance <= radius:
+            nearby.append((distance, salon))
+    nearby.sort(key=lambda item: (item[0], item[1].id))
+    return nearby[:limit]
+
+# Salons within `radius` km of lat/lng, nearest first.
+# The bounding box is narrowed with the (geo_band, longitude) index, then the
+# candidates are ranked by great-circle distance.
+@salon_bp.route('/salons/nearby', methods=['GET'])
+@conditional_get(CATALOG, public=True)
+def nearby_salons():
+    try:
+        latitude, longitude = parse_coordinates(request.args.get('lat'), request.args.get('lng'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    radius = request.args.get('radius', DEFAULT_RADIUS_KM, type=float)
+    if not 0 < radius <= MAX_RADIUS_KM:
+        return jsonify({"error": f"radius must be between 0 and {MAX_RADIUS_KM} km"}), 400
+    limit = page_limit()
+
+    # Start small and widen until `limit` salons are found, so a dense area
+    # reads only the rows near the point rather than the whole radius
+    search_radius = min(radius, 1.0)
+    while True:
+        nearby = _salons_within(latitude, longitude, search_radius, limit)
+        if len(nearby) >= limit or search_radius >= radius:
+            break
+        search_radius = min(radius, search_radius * 4)
+
+    return jsonify([{
+        'id': salon.id,
+        'name': salon.name,
+        'location': salon.location,
+        'latitude': salon.latitude,
+        'longitude': salon.longitude,
+        'distance_km': round(distance, 2)
+    } for distance, salon in nearby]), 200
 
 @salon_bp.route('/salons/<int:salon_id>', methods=['GET'])
+@conditional_get(CATALOG, public=True)
+@cached_catalog
 def get_salon(salon_id):
     salon = Salon.query.get_or_404(salon_id)
     return jsonify({
@@ -27,6 +98,8 @@ def get_salon(salon_id):
         'location': salon.location,
         'contact': salon.contact,
         'description': salon.description,
+        'latitude': salon.latitude,
+        'longitude': salon.longitude,
         'services': [{
             'id': service.id,
             'name': service.name,
@@ -41,19 +114,98 @@ def get_salon(salon_id):
         } for stylist in salon.stylists]
     }), 200
 
+# Search salons, stylists and services by name and description.
+# Every word must match, the last one as a prefix so the endpoint can back
+# autocomplete; results are best match first and paged with an opaque cursor.
+# Not in the catalog cache: every keystroke is a new key, and those one-off
+# entries would push the hot listings out of the LRU.
+@salon_bp.route('/search', methods=['GET'])
+@conditional_get(CATALOG, public=True)
+def search():
+    terms = search_terms(request.args.get('q'))
+    if not terms:
+        return jsonify({"error": "q must contain at least one word"}), 400
+
+    kind = request.args.get('type')
+    if kind and kind not in KINDS:
+        return jsonify({"error": f"type must be one of: {', '.join(KINDS)}"}), 400
+
+    limit = page_limit()
+    offset = decode_cursor(request.args['cursor']) if request.args.get('cursor') else 0
+    if not isinstance(offset, int) or offset < 0:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    results = search_listings(terms, kind, request.args.get('salon_id', type=int), limit + 1, offset)
+    next_cursor = encode_cursor(offset + limit) if len(results) > limit else None
+    return paginated_response(results[:limit], next_cursor)
+
+# Availability matrix for every active stylist of a salon.
+# Each stylist gets one hex bitset per day: bit i is set when the slot starting
+# at that day's "opens" time + i * slot_minutes fits the requested duration.
+@salon_bp.route('/salons/<int:salon_id>/availability', methods=['GET'])
+@conditional_get(APPOINTMENTS, CATALOG, public=True)
+def get_salon_availability(salon_id):
+    salon = Salon.query.get_or_404(salon_id)
+
+    try:
+        start_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    days = request.args.get('days', 7, type=int)
+    if not 1 <= days <= 31:
+        return jsonify({"error": "days must be between 1 and 31"}), 400
+
+    stylists = Stylist.query.filter_by(salon_id=salon_id, is_active=True)
+    duration = None
+    service_id = request.args.get('service_id', type=int)
+    if service_id:
+        service = Service.query.get(service_id)
+        if not service or service.salon_id != salon_id:
+            return jsonify({"error": "Service not found"}), 404
+        duration = service.duration
+        stylists = stylists.filter(Stylist.services.any(Service.id == service_id))
+    stylists = stylists.order_by(Stylist.id).all()
+
+    day_windows, matrix = salon_availability_matrix(
+        salon.opening_hours, [stylist.id for stylist in stylists], start_date, days, duration
+    )
+
+    return jsonify({
+        "salon_id": salon_id,
+        "start_date": start_date.isoformat(),
+        "service_id": service_id,
+        "duration": duration or SLOT_STEP_MINUTES,
+        "slot_minutes": SLOT_STEP_MINUTES,
+        "days": [{
+            "date": day.isoformat(),
+            "opens": window_start.strftime("%H:%M") if window_start else None,
+            "slot_count": slot_count
+        } for day, window_start, slot_count in day_windows],
+        "stylists": [{
+            "id": stylist.id,
+            "name": stylist.name,
+            "availability": [format(bitset, 'x') for bitset in matrix[stylist.id]]
+        } for stylist in stylists]
+    }), 200
+
 # Stylist endpoints
 @salon_bp.route('/stylists', methods=['GET'])
+@conditional_get(CATALOG, public=True)
+@cached_catalog
 def get_stylists():
-    stylists = Stylist.query.all()
-    return jsonify([{
+    stylists, next_cursor = paginate(Stylist.query, Stylist.id)
+    return paginated_response([{
         'id': stylist.id,
         'name': stylist.name,
         'specialization': stylist.specialization,
         'salon_id': stylist.salon_id,
         'average_rating': stylist.average_rating()
-    } for stylist in stylists]), 200
+    } for stylist in stylists], next_cursor)
 
 @salon_bp.route('/stylists/<int:stylist_id>', methods=['GET'])
+@conditional_get(CATALOG, public=True)
+@cached_catalog
 def get_stylist(stylist_id):
     stylist = Stylist.query.get_or_404(stylist_id)
     return jsonify({
@@ -73,22 +225,15 @@ def get_stylist(stylist_id):
             'comment': review.comment,
             'customer_name': review.customer.username,
             'created_at': review.created_at
-        } for review in stylist.reviews if not review.is_hidden]
+        } for review in stylist.reviews.filter_by(is_hidden=False)]
     }), 200
 
 # Service endpoints
 
 #add a service
-# routes/service_routes.py or similar
-def is_admin():
-    current_user = User.query.get(get_jwt_identity())
-    return current_user and current_user.is_admin
 @salon_bp.route('/services', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_service():
-    if not is_admin():
-        return jsonify({"error": "Admin access required"}), 403
-
     data = request.get_json()
 
     name = data.get('name')
@@ -115,6 +260,7 @@ def create_service():
             is_active=True
         )
         db.session.add(new_service)
+        invalidate_catalog()
         db.session.commit()
 
         return jsonify({
@@ -128,8 +274,10 @@ def create_service():
 
 
 @salon_bp.route('/services', methods=['GET'])
+@conditional_get(CATALOG, public=True)
+@cached_catalog
 def get_services():
-    services = Service.query.all()
+    services, next_cursor = paginate(Service.query, Service.id)
     result = []
 
     for service in services:
@@ -153,14 +301,11 @@ def get_services():
             "stylists": stylists
         })
 
-    return jsonify(result), 200
+    return paginated_response(result, next_cursor)
 
 @salon_bp.route('/services/<int:service_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_service(service_id):
-    if not is_admin():
-        return jsonify({"error": "Admin access required"}), 403
-
     service = Service.query.get_or_404(service_id)
     data = request.get_json()
 
@@ -172,6 +317,7 @@ def update_service(service_id):
     service.is_active = data.get('is_active', service.is_active)
 
     try:
+        invalidate_catalog()
         db.session.commit()
         return jsonify({
             "message": "Service updated successfully",
@@ -181,15 +327,13 @@ def update_service(service_id):
         db.session.rollback()
         return jsonify({"error": "Update failed", "details": str(e)}), 500
 @salon_bp.route('/services/<int:service_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_service(service_id):
-    if not is_admin():
-        return jsonify({"error": "Admin access required"}), 403
-
     service = Service.query.get_or_404(service_id)
 
     try:
         db.session.delete(service)
+        invalidate_catalog()
         db.session.commit()
         return jsonify({"message": "Service deleted successfully"}), 200
     except Exception as e:
@@ -201,7 +345,7 @@ def delete_service(service_id):
 @jwt_required()
 def create_appointment():
     data = request.get_json()
-    customer_id = get_jwt_identity()
+    customer_id = int(get_jwt_identity())
     stylist_id = data.get('stylist_id')
     service_id = data.get('service_id')
     appointment_date = data.get('appointment_date')
@@ -223,23 +367,14 @@ def create_appointment():
     if service not in stylist.services:
         return jsonify({"error": "This stylist doesn't offer the selected service"}), 400
 
-    conflicting = Appointment.query.filter_by(
-        stylist_id=stylist_id,
-        appointment_date=appointment_date
-    ).first()
-    if conflicting:
-        return jsonify({"error": "Stylist is not available at this time"}), 400
-
-    new_appointment = Appointment(
-        customer_id=customer_id,
-        stylist_id=stylist_id,
-        service_id=service_id,
-        appointment_date=appointment_date,
-        status='pending'
-    )
-
-    db.session.add(new_appointment)
-    db.session.commit()
+    # Overlap check and insert under a per-stylist lock
+    try:
+        new_appointment = book_appointment(customer_id, stylist, service, appointment_date)
+        appointments_changed()
+        db.session.commit()
+    except (BookingConflict, IntegrityError):
+        db.session.rollback()
+        return jsonify({"error": "Stylist is not available at this time"}), 409
 
     return jsonify({
         "message": "Appointment created successfully",
@@ -249,23 +384,26 @@ def create_appointment():
             "stylist_id": new_appointment.stylist_id,
             "service_id": new_appointment.service_id,
             "appointment_date": new_appointment.appointment_date.isoformat(),
+            "start_datetime": new_appointment.start_datetime.isoformat(),
+            "end_datetime": new_appointment.end_datetime.isoformat(),
             "status": new_appointment.status
         }
     }), 201
 
 @salon_bp.route('/appointments', methods=['GET'])
 @jwt_required()
+@conditional_get(APPOINTMENTS, CATALOG)
 def get_user_appointments():
     user_id = get_jwt_identity()
-    appointments = Appointment.query.filter_by(customer_id=user_id).all()
+    appointments, next_cursor = paginate(appointment_rows(Appointment.customer_id == user_id), Appointment.id)
 
-    return jsonify([{
-        "id": appointment.id,
-        "stylist_name": appointment.stylist.name,
-        "service_name": appointment.service.name,
-        "appointment_date": appointment.appointment_date.isoformat(),
-        "status": appointment.status
-    } for appointment in appointments]), 200
+    return paginated_response([{
+        "id": row.id,
+        "stylist_name": row.stylist_name,
+        "service_name": row.service_name,
+        "appointment_date": row.appointment_date.isoformat() if row.appointment_date else None,
+        "status": row.status
+    } for row in appointments], next_cursor)
 
 # Review endpoints
 @salon_bp.route('/reviews/stylist', methods=['POST'])
@@ -308,6 +446,8 @@ def create_stylist_review():
     )
 
     db.session.add(new_review)
+    adjust_rating(Stylist, stylist_id, rating)
+    invalidate_catalog()
     db.session.commit()
 
     return jsonify({
@@ -360,6 +500,8 @@ def create_salon_review():
     )
 
     db.session.add(new_review)
+    adjust_rating(Salon, salon_id, rating)
+    invalidate_catalog()
     db.session.commit()
 
     return jsonify({
@@ -372,10 +514,3 @@ def create_salon_review():
         }
     }), 201
 
-# Average rating methods
-def average_rating(self):
-    reviews = [review.rating for review in self.reviews if not review.is_hidden]
-    return sum(reviews) / len(reviews) if reviews else 0
-
-Stylist.average_rating = average_rating
-Salon.average_rating = average_rating
@@ -0,0 +1,186 @@
+import re
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from models import db, Salon, Stylist, Service
+
+# Full-text search over salons, stylists and services. Every listing is one
+# row of the search_index table: an FTS5 virtual table on SQLite, a table with
+# a weighted tsvector column and a GIN index on PostgreSQL. Rows are written
+# in the same flush as the listing they describe, so the index never lags the
+# catalog; `flask search rebuild` recreates it from scratch.
+#
+# The row key packs the listing type into the low bits of the listing id
+# (id * 4 + kind) so updates and deletes find their row by key.
+
+KINDS = {'salon': 1, 'stylist': 2, 'service': 3}
+
+# name is weighted above the descriptive fields
+FIELDS = {
+    Salon: ('salon', 'name', ('location', 'description')),
+    Stylist: ('stylist', 'name', ('specialization', 'bio')),
+    Service: ('service', 'name', ('category', 'description')),
+}
+WATCHED = {model: {name, *details, 'salon_id', 'is_active'} & set(inspect(model).columns.keys())
+           for model, (_, name, details) in FIELDS.items()}
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+MAX_TERMS = 8
+MIN_PREFIX = 2  # a single letter as a prefix matches (and ranks) most of the index
+
+
+def _dialect(connection):
+    return connection.dialect.name
+
+
+def create_search_index(connection):
+    if _dialect(connection) == 'postgresql':
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_index ("
+            "id BIGINT PRIMARY KEY, kind VARCHAR(10) NOT NULL, entity_id INTEGER NOT NULL, salon_id INTEGER, "
+            "name TEXT NOT NULL, details TEXT NOT NULL, document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_search_index_document ON search_index USING GIN (document)"
+        ))
+    else:
+        # Prefix indexes keep autocomplete on 2-3 letter prefixes fast
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "kind UNINDEXED, entity_id UNINDEXED, salon_id UNINDEXED, name, details, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+
+
+def drop_search_index(connection):
+    connection.execute(text("DROP TABLE IF EXISTS search_index"))
+
+
+# search_index is not a mapped table, so create_all/drop_all manage it through these
+event.listen(db.metadata, 'after_create', lambda target, connection, **kw: create_search_index(connection))
+event.listen(db.metadata, 'before_drop', lambda target, connection, **kw: drop_search_index(connection))
+
+
+def _key_column(connection):
+    return 'id' if _dialect(connection) == 'postgresql' else 'rowid'
+
+
+def _insert_sql(connection, values):
+    """INSERT ... <values> for the dialect; `values` yields :key, :kind, ... or a SELECT of them."""
+    if _dialect(connection) == 'postgresql':
+        return (f"INSERT INTO search_index (id, kind, entity_id, salon_id, name, details, document) "
+                f"SELECT key, kind, entity_id, salon_id, name, details, "
+                f"setweight(to_tsvector('simple', name), 'A') || setweight(to_tsvector('simple', details), 'B') "
+                f"FROM ({values}) AS listing")
+    return f"INSERT INTO search_index (rowid, kind, entity_id, salon_id, name, details) {values}"
+
+
+def _document(obj):
+    kind, name, details = FIELDS[type(obj)]
+    return {
+        "key": obj.id * 4 + KINDS[kind],
+        "kind": kind,
+        "entity_id": obj.id,
+        "salon_id": obj.id if kind == 'salon' else obj.salon_id,
+        "name": getattr(obj, name) or '',
+        "details": ' '.join(getattr(obj, field) or '' for field in details)
+    }
+
+
+def _listed(obj):
+    return getattr(obj, 'is_active', True) is not False
+
+
+def _sync_search_index(session, flush_context):
+    """Rewrite the index rows of listings created, changed or deleted in this flush."""
+    stale, fresh = set(), []
+    for obj in session.deleted:
+        if type(obj) in FIELDS:
+            stale.add(obj.id * 4 + KINDS[FIELDS[type(obj)][0]])
+    for obj in list(session.new) + list(session.dirty):
+        if type(obj) not in FIELDS or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if obj not in session.new and not any(state.attrs[field].history.has_changes() for field in WATCHED[type(obj)]):
+            continue  # e.g. only the rating aggregates changed
+        document = _document(obj)
+        stale.add(document['key'])
+        if _listed(obj):
+            fresh.append(document)
+    if not stale:
+        return
+
+    connection = session.connection()
+    connection.execute(text(f"DELETE FROM search_index WHERE {_key_column(connection)} = :key"),
+                       [{"key": key} for key in stale])
+    if fresh:
+        connection.execute(text(_insert_sql(
+            connection, "SELECT :key AS key, :kind AS kind, :entity_id AS entity_id, :salon_id AS salon_id, "
+                        ":name AS name, :details AS details"
+        )), fresh)
+
+
+event.listen(Session, 'after_flush', _sync_search_index)
+
+
+def rebuild_search_index(connection=None):
+    """Recreate the search index from the salons, stylists and services tables."""
+    connection = connection or db.session.connection()
+    drop_search_index(connection)
+    create_search_index(connection)
+    for model, (kind, name, details) in FIELDS.items():
+        table = model.__tablename__
+        document = " || ' ' || ".join(f"COALESCE({field}, '')" for field in details)
+        listed = " WHERE is_active IS NOT FALSE" if 'is_active' in WATCHED[model] else ""
+        salon_id = 'id' if kind == 'salon' else 'salon_id'
+        connection.execute(text(_insert_sql(
+            connection, f"SELECT id * 4 + {KINDS[kind]} AS key, '{kind}' AS kind, id AS entity_id, "
+                        f"{salon_id} AS salon_id, COALESCE({name}, '') AS name, {document} AS details "
+                        f"FROM {table}{listed}"
+        )))
+
+
+def search_terms(query):
+    """Lower-cased word tokens of a user query, at most MAX_TERMS of them."""
+    return [term.lower() for term in TOKEN.findall(query or '')][:MAX_TERMS]
+
+
+def search_listings(terms, kind=None, salon_id=None, limit=20, offset=0):
+    """Best matches first for listings containing every term, the last one as a prefix.
+
+    Returns a list of dicts with type, id, salon_id, name and score.
+    """
+    prefix = len(terms[-1]) >= MIN_PREFIX
+    connection = db.session.connection()
+    params = {"limit": limit, "offset": offset, "kind": kind, "salon_id": salon_id}
+    filters = ""
+    if kind:
+        filters += " AND kind = :kind"
+    if salon_id:
+        filters += " AND salon_id = :salon_id"
+
+    if _dialect(connection) == 'postgresql':
+        # Terms are \w+ tokens, so they are safe inside the tsquery syntax
+        params["query"] = ' & '.join(terms[:-1] + [terms[-1] + (':*' if prefix else '')])
+        rows = connection.execute(text(
+            "SELECT kind, entity_id, salon_id, name, ts_rank_cd(document, query) AS score "
+            "FROM search_index, to_tsquery('simple', :query) AS query "
+            f"WHERE document @@ query{filters} ORDER BY score DESC, id LIMIT :limit OFFSET :offset"
+        ), params)
+    else:
+        # Quoted terms keep FTS5 operators in user input literal
+        params["query"] = ' AND '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"' + ('*' if prefix else '')])
+        rows = connection.execute(text(
+            "SELECT kind, entity_id, salon_id, name, -bm25(search_index, 0, 0, 0, 10.0, 1.0) AS score "
+            f"FROM search_index WHERE search_index MATCH :query{filters} "
+            "ORDER BY score DESC, rowid LIMIT :limit OFFSET :offset"
+        ), params)
+
+    return [{
+        "type": row.kind,
+        "id": row.entity_id,
+        "salon_id": row.salon_id,
+        "name": row.name,
+        "score": round(float(row.score), 4)
+    } for row in rows]
@@ -1,5 +1,5 @@
 from app import create_app, db
-from models import User, Stylist, Salon, Service, Appointment, Review, SalonReview
+from models import User, Stylist, Salon, Service, Appointment, Review, SalonReview, rebuild_rating_aggregates
 from datetime import date, time
 
 app = create_app()
@@ -118,5 +118,6 @@ with app.app_context():
     )
     db.session.add(salon_review)
 
+    rebuild_rating_aggregates()
     db.session.commit()
     print("✅ Seed data created.")
@@ -0,0 +1,247 @@
+"""Deterministic bulk data generator for load testing and benchmarks.
+
+Builds salons, stylists, services, customers, appointments and reviews with
+batched executemany inserts. The same --seed and --until always produce the
+same rows (password salts aside), so benchmark runs are repeatable.
+
+    python seed_bulk.py --salons 100 --stylists-per-salon 10 --customers 200000 --years 3
+
+Like seed.py this drops and recreates every table in DATABASE_URL. All
+generated users share the password "password123"; admin@example.com /
+admin123 is created as well.
+"""
+import argparse
+import random
+import time as clock
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import text
+
+from app import create_app, db
+from models import User, Stylist, Salon, Service, Appointment, Review, SalonReview, stylist_services, \
+    rebuild_rating_aggregates
+from passwords import hash_password
+from availability import opening_window, SLOT_STEP_MINUTES
+from reporting import backfill_rollups
+from search import rebuild_search_index
+from geo import PLACES, geo_band
+
+OPENING_HOURS = [
+    {"Mon-Fri": "9am - 6pm", "Sat": "9am - 4pm", "Sun": "Closed"},
+    {"Mon-Sat": "8am - 8pm", "Sun": "10am - 4pm"},
+    {"Tue-Sat": "10am - 7pm"}
+]
+SERVICES = [
+    ("Box Braids", "Hair", 180, 3500), ("Cornrows", "Hair", 90, 1500), ("Wash and Blow Dry", "Hair", 60, 800),
+    ("Haircut", "Hair", 30, 500), ("Dreadlock Retwist", "Hair", 120, 2000), ("Manicure", "Nails", 45, 700),
+    ("Pedicure", "Nails", 60, 900), ("Gel Nails", "Nails", 90, 1800), ("Facial", "Skin", 60, 2500),
+    ("Makeup", "Beauty", 60, 3000), ("Eyebrow Shaping", "Beauty", 30, 400), ("Massage", "Spa", 90, 4000)
+]
+LOCATIONS = ["Nairobi CBD", "Westlands", "Kilimani", "Karen", "Mombasa", "Kisumu", "Nakuru", "Eldoret"]
+SPECIALIZATIONS = ["Braiding", "Cutting", "Coloring", "Nails", "Makeup", "Skin care"]
+
+
+class BatchWriter:
+    """Buffers rows per table and writes them with one executemany per batch.
+
+    Tables listed in `dependents` are flushed right after the table they
+    reference, so foreign keys always point at rows already written.
+    """
+
+    def __init__(self, batch_size, dependents=None):
+        self.batch_size = batch_size
+        self.dependents = dependents or {}
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, table, row):
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, *tables):
+        for table in tables:
+            rows = self.buffers.get(table)
+            if rows:
+                db.session.execute(table.insert(), rows)
+                self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+                self.buffers[table] = []
+            self.flush(*self.dependents.get(table, ()))
+
+
+def _user(user_id, username, email, password, created_at, phone=None, is_admin=False, is_stylist=False):
+    # executemany needs the same keys in every row of a batch
+    return {"id": user_id, "username": username, "email": email, "password": password, "phone": phone,
+            "is_admin": is_admin, "is_stylist": is_stylist, "is_blocked": False, "token_version": 0,
+            "created_at": created_at}
+
+
+def generate(salons=10, stylists_per_salon=5, services_per_salon=8, customers=5000, years=1.0,
+             occupancy=0.5, review_density=0.2, seed=42, until=None, batch_size=10000):
+    """Populate the (empty) database and return {table name: rows written}."""
+    rng = random.Random(seed)
+    until = until or date.today()
+    first_day = until - timedelta(days=int(years * 365))
+    last_day = until + timedelta(days=14)  # some upcoming bookings for availability
+    epoch = datetime.combine(first_day, time.min)
+    history_minutes = max(1, (until - first_day).days * 1440)
+    password = hash_password("password123")  # hashed once for every generated user
+
+    users, salon_rows, services, stylists = User.__table__, Salon.__table__, Service.__table__, Stylist.__table__
+    appointments, reviews, salon_reviews = Appointment.__table__, Review.__table__, SalonReview.__table__
+    writer = BatchWriter(batch_size, dependents={appointments: (reviews, salon_reviews)})
+
+    # Users: admin, customers, then one user per stylist
+    writer.add(users, _user(1, "admin", "admin@example.com", hash_password("admin123"), epoch,
+                            phone="0700000000", is_admin=True))
+    customer_ids = range(2, customers + 2)
+    for user_id in customer_ids:
+        writer.add(users, _user(user_id, f"customer{user_id}", f"customer{user_id}@example.com", password,
+                                epoch + timedelta(minutes=rng.randrange(history_minutes)),
+                                phone=f"07{rng.randrange(10 ** 8):08d}"))
+    stylist_count = salons * stylists_per_salon
+    for stylist_id in range(1, stylist_count + 1):
+        writer.add(users, _user(customers + 1 + stylist_id, f"stylist{stylist_id}", f"stylist{stylist_id}@example.com",
+                                password, epoch, is_stylist=True))
+    writer.flush(users)
+
+    # Salons and their service menus
+    salon_info = {}  # salon id -> (opening hours, [(service id, duration)])
+    for salon_id in range(1, salons + 1):
+        hours = OPENING_HOURS[salon_id % len(OPENING_HOURS)]
+        location = rng.choice(LOCATIONS)
+        # Scattered within ~10 km of the place's centre
+        latitude, longitude = (value + rng.uniform(-0.09, 0.09) for value in PLACES[location.lower()])
+        writer.add(salon_rows, {"id": salon_id, "name": f"Salon {salon_id}", "slug": f"salon-{salon_id}",
+                                "location": location, "contact": f"07{rng.randrange(10 ** 8):08d}",
+                                "description": f"Generated salon {salon_id}", "opening_hours": hours,
+                                "latitude": latitude, "longitude": longitude, "geo_band": geo_band(latitude),
+                                "rating_sum": 0, "rating_count": 0, "created_at": epoch})
+        menu = []
+        for k, (name, category, duration, price) in enumerate(rng.sample(SERVICES, min(services_per_salon, len(SERVICES)))):
+            service_id = (salon_id - 1) * services_per_salon + k + 1
+            writer.add(services, {"id": service_id, "name": name, "slug": f"salon-{salon_id}-{name.lower().replace(' ', '-')}",
+                                  "description": name, "duration": duration, "price": price, "category": category,
+                                  "salon_id": salon_id, "is_active": True})
+            menu.append((service_id, duration))
+        salon_info[salon_id] = (hours, menu)
+    writer.flush(salon_rows, services)
+
+    # Stylists, each offering half of their salon's menu
+    stylist_info = []  # (stylist id, salon id, [(service id, duration)])
+    for stylist_id in range(1, stylist_count + 1):
+        salon_id = (stylist_id - 1) // stylists_per_salon + 1
+        writer.add(stylists, {"id": stylist_id, "user_id": customers + 1 + stylist_id, "salon_id": salon_id,
+                              "name": f"Stylist {stylist_id}", "slug": f"stylist-{stylist_id}",
+                              "specialization": rng.choice(SPECIALIZATIONS), "email": f"stylist{stylist_id}@example.com",
+                              "is_active": True, "years_experience": rng.randrange(1, 20),
+                              "rating_sum": 0, "rating_count": 0, "created_at": epoch})
+        menu = salon_info[salon_id][1]
+        skills = rng.sample(menu, max(1, len(menu) // 2)) if menu else []
+        for service_id, _ in skills:
+            writer.add(stylist_services, {"stylist_id": stylist_id, "service_id": service_id})
+        stylist_info.append((stylist_id, salon_id, skills))
+    writer.flush(stylists, stylist_services)
+
+    # Appointments: walk each stylist's opening hours on the slot grid and
+    # book a random service with probability `occupancy`
+    appointment_id = review_id = salon_review_id = 0
+    reviewed, salon_reviewed = set(), set()
+    step = timedelta(minutes=SLOT_STEP_MINUTES)
+    day = first_day
+    while day <= last_day:
+        windows = {salon_id: opening_window(hours, day) for salon_id, (hours, _) in salon_info.items()}
+        for stylist_id, salon_id, skills in stylist_info:
+            window = windows[salon_id]
+            if window is None or not skills:
+                continue
+            slot = datetime.combine(day, window[0])
+            close = datetime.combine(day, window[1])
+            while slot < close:
+                service_id, duration = rng.choice(skills)
+                end = slot + timedelta(minutes=duration)
+                if end > close or rng.random() >= occupancy:
+                    slot += step
+                    continue
+                appointment_id += 1
+                customer_id = rng.choice(customer_ids)
+                status = 'completed' if day < until and rng.random() < 0.9 else 'pending'
+                writer.add(appointments, {"id": appointment_id, "customer_id": customer_id, "stylist_id": stylist_id,
+                                          "service_id": service_id, "appointment_date": day,
+                                          "appointment_time": slot.time(), "start_datetime": slot,
+                                          "end_datetime": end, "status": status,
+                                          "created_at": slot - timedelta(days=rng.randrange(1, 30))})
+                if status == 'completed' and rng.random() < review_density:
+                    rating = rng.choice((3, 4, 4, 5, 5))
+                    if (customer_id, stylist_id) not in reviewed:
+                        reviewed.add((customer_id, stylist_id))
+                        review_id += 1
+                        writer.add(reviews, {"id": review_id, "customer_id": customer_id, "stylist_id": stylist_id,
+                                             "appointment_id": appointment_id, "rating": rating,
+                                             "comment": "Generated review", "created_at": end, "is_hidden": False})
+                    if (customer_id, salon_id) not in salon_reviewed:
+                        salon_reviewed.add((customer_id, salon_id))
+                        salon_review_id += 1
+                        writer.add(salon_reviews, {"id": salon_review_id, "customer_id": customer_id,
+                                                   "salon_id": salon_id, "appointment_id": appointment_id,
+                                                   "rating": rating, "comment": "Generated review",
+                                                   "created_at": end, "is_hidden": False})
+                slot = end + (-(end - slot) % step)  # next grid point after the booking
+        day += timedelta(days=1)
+    writer.flush(appointments)
+
+    rebuild_rating_aggregates()
+    backfill_rollups()
+    rebuild_search_index()
+    return writer.counts
+
+
+def _reset_sequences():
+    """Explicit ids bypass PostgreSQL sequences; move them past the generated rows."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in (User.__table__, Salon.__table__, Service.__table__, Stylist.__table__,
+                  Appointment.__table__, Review.__table__, SalonReview.__table__):
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), COALESCE(MAX(id), 1)) FROM {table.name}"
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--salons', type=int, default=10)
+    parser.add_argument('--stylists-per-salon', type=int, default=5)
+    parser.add_argument('--services-per-salon', type=int, default=8)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--years', type=float, default=1.0, help="years of appointment history")
+    parser.add_argument('--occupancy', type=float, default=0.5, help="chance each free slot gets booked")
+    parser.add_argument('--review-density', type=float, default=0.2, help="share of completed appointments reviewed")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--until', type=date.fromisoformat, default=None,
+                        help="last day of history, YYYY-MM-DD (default today; fix it for identical datasets)")
+    parser.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        if db.engine.dialect.name == 'sqlite':
+            db.session.execute(text("PRAGMA synchronous = OFF"))
+
+        started = clock.perf_counter()
+        counts = generate(salons=args.salons, stylists_per_salon=args.stylists_per_salon,
+                          services_per_salon=args.services_per_salon, customers=args.customers, years=args.years,
+                          occupancy=args.occupancy, review_density=args.review_density, seed=args.seed,
+                          until=args.until, batch_size=args.batch_size)
+        _reset_sequences()
+        db.session.commit()
+
+        for table, count in counts.items():
+            print(f"{table:>20}: {count}")
+        print(f"✅ Generated {sum(counts.values())} rows in {clock.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
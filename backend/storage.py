@@ -0,0 +1,131 @@
+import os
+import re
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+
+from flask import current_app
+
+# Storage backends for uploaded files. Files are addressed by keys such as
+# "3f/3fa9...c2.jpg" (see uploads.py); a backend only has to store, read and
+# delete them and say where clients fetch them. UPLOAD_STORAGE picks the
+# backend from BACKENDS.
+
+UPLOAD_KEY = re.compile(r'^[0-9a-f]{2}/([0-9a-f]{64})(?:\.(\w+))?\.(jpg|png|gif|webp)$')
+
+# WebP variants made of every image upload: name -> longest side in pixels
+VARIANTS = {'thumb': 160, 'medium': 640, 'large': 1600}
+
+
+class Storage(ABC):
+    """Interface of an upload storage backend."""
+
+    @abstractmethod
+    def exists(self, key):
+        pass
+
+    @abstractmethod
+    def save(self, key, path):
+        """Store the local file at `path` under `key`; the file may be moved away."""
+
+    @abstractmethod
+    def open(self, key):
+        """Binary file object for reading `key`."""
+
+    def path(self, key):
+        """Local filesystem path of `key`, or None if the backend keeps files elsewhere."""
+        return None
+
+    @abstractmethod
+    def delete(self, key):
+        pass
+
+    @abstractmethod
+    def url(self, key):
+        pass
+
+
+class LocalStorage(Storage):
+    """Files under a local directory, served by the media blueprint."""
+
+    def __init__(self, root, base_url):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def save(self, key, path):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Move into place in one step so readers never see a partial file. The
+        # staging name is unique, as threads of one worker may save the same key.
+        fd, staging = tempfile.mkstemp(prefix=os.path.basename(target) + '.', suffix='.tmp',
+                                       dir=os.path.dirname(target))
+        os.close(fd)
+        try:
+            shutil.move(path, staging)
+            os.replace(staging, target)
+        except BaseException:
+            if os.path.exists(staging):
+                os.remove(staging)
+            raise
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+
+BACKENDS = {
+    'local': lambda config: LocalStorage(config['UPLOAD_ROOT'], config['UPLOAD_BASE_URL'])
+}
+
+
+def get_storage():
+    """The configured backend of the current app, created on first use."""
+    storage = current_app.extensions.get('upload_storage')
+    if storage is None:
+        storage = BACKENDS[current_app.config['UPLOAD_STORAGE']](current_app.config)
+        current_app.extensions['upload_storage'] = storage
+    return storage
+
+
+def variant_key(key, variant):
+    """Key of a resized WebP variant of the upload stored under `key`."""
+    digest = UPLOAD_KEY.match(key).group(1)
+    return f"{digest[:2]}/{digest}.{variant}.webp"
+
+
+def image_url(key):
+    """URL of the original file behind an image column, or None when it is empty."""
+    urls = image_urls(key)
+    return urls and urls["original"]
+
+
+def image_urls(key):
+    """{"original": url, <variant>: url, ...} for an image column, or None when it is empty.
+
+    Values that are not upload keys (e.g. external URLs) are passed through
+    as the original. Variant URLs are always listed; until the worker has
+    made a variant its URL redirects to the original.
+    """
+    if not key:
+        return None
+    if not UPLOAD_KEY.match(key):
+        return {"original": key}
+    storage = get_storage()
+    urls = {"original": storage.url(key)}
+    for variant in VARIANTS:
+        urls[variant] = storage.url(variant_key(key, variant))
+    return urls
@@ -1,25 +1,29 @@
 from flask import Blueprint, request, jsonify
 from models import db, Salon, Stylist, Service, Review, SalonReview, Appointment, User
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_mail import Message
-from datetime import datetime, timedelta
-from app import mail
+from flask_jwt_extended import get_jwt_identity
+from datetime import datetime
+from mailer import queue_email
+from pagination import paginate, paginated_response
+from authz import is_admin, admin_required, roles_required
+from appointments import appointment_rows, serialize_appointment
+from availability import stylist_availability, SLOT_STEP_MINUTES
+from reporting import appointment_status_changed, rollup_appointments
+from storage import image_url, image_urls
+from cache import cached_catalog, conditional_get, invalidate_catalog, appointments_changed, CATALOG, APPOINTMENTS
 
 
 stylist_bp = Blueprint('stylist_bp', __name__)
 
-# Helper function to check if user is admin
-def is_admin():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    return user and user.is_admin
+def check_admin_or_own_stylist(stylist_id):
+    """Check if current user is admin or the stylist's own user"""
+    if is_admin():
+        return True
+    user_id = db.session.query(Stylist.user_id).filter_by(id=stylist_id).scalar()
+    return user_id is not None and user_id == int(get_jwt_identity())
 
 @stylist_bp.route('/stylists', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_stylist():
-    if not is_admin():
-        return jsonify({"error": "Admin access required"}), 403
-
     data = request.get_json()
     salon_id = data.get('salon_id') or 1
     name = data.get('name')
@@ -76,25 +80,22 @@ def create_stylist():
             if service and service.salon_id == int(salon_id):
                 new_stylist.services.append(service)
 
-        # Step 5: Commit all
-        db.session.commit()
-
-        # Step 6: Send welcome email
-        try:
-            msg = Message(
-                subject="Your Stylist Account",
-                recipients=[email],
-                body=f"""Welcome {name}!
+        # Step 5: Queue welcome email
+        queue_email(
+            subject="Your Stylist Account",
+            recipients=[email],
+            body=f"""Welcome {name}!
 
 Your stylist account has been created.
 Username: {username}
 Temporary Password: {password}
 
 Please change your password after first login."""
-            )
-            mail.send(msg)
-        except Exception as e:
-            app.logger.error(f"Failed to send email: {str(e)}")
+        )
+
+        # Step 6: Commit all
+        invalidate_catalog()
+        db.session.commit()
 
         return jsonify({
             "message": "Stylist created successfully",
@@ -107,14 +108,12 @@ Please change your password after first login."""
 
 # Get all stylists (Admin only)
 @stylist_bp.route('/stylists', methods=['GET'])
-@jwt_required()
+@admin_required
+@conditional_get(CATALOG)
 def get_all_stylists():
-    if not is_admin():
-        return jsonify({"error": "Admin access required"}), 403
-
     try:
-        stylists = Stylist.query.all()
-        return jsonify([{
+        stylists, next_cursor = paginate(Stylist.query, Stylist.id)
+        return paginated_response([{
             "id": stylist.id,
             "name": stylist.name,
             "email": stylist.email if stylist.email else None,
@@ -122,7 +121,8 @@ def get_all_stylists():
             "specialization": stylist.specialization,
             "salon_id": stylist.salon_id,
             "salon_name": stylist.salon.name if stylist.salon else None,
-            "profile_pic": stylist.profile_pic,
+            "profile_pic": image_url(stylist.profile_pic),
+            "profile_pic_urls": image_urls(stylist.profile_pic),
             "average_rating": stylist.average_rating(),
             "services": [{
                 "id": service.id,
@@ -130,13 +130,15 @@ def get_all_stylists():
             } for service in stylist.services],
             "is_active": stylist.is_active,
             "created_at": stylist.created_at.isoformat() if stylist.created_at else None
-        } for stylist in stylists]), 200
+        } for stylist in stylists], next_cursor)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # Get stylist by ID
 @stylist_bp.route('/stylists/<int:stylist_id>', methods=['GET'])
+@conditional_get(CATALOG, public=True)
+@cached_catalog
 def get_stylist(stylist_id):
     stylist = Stylist.query.get_or_404(stylist_id)
     return jsonify({
@@ -144,7 +146,8 @@ def get_stylist(stylist_id):
         "name": stylist.name,
         "specialization": stylist.specialization,
         "bio": stylist.bio,
-        "profile_pic": stylist.profile_pic,
+        "profile_pic": image_url(stylist.profile_pic),
+        "profile_pic_urls": image_urls(stylist.profile_pic),
         "salon_id": stylist.salon_id,
         "salon_name": stylist.salon.name if stylist.salon else None,
         "average_rating": stylist.average_rating(),
@@ -160,16 +163,13 @@ def get_stylist(stylist_id):
             "comment": review.comment,
             "customer_name": review.customer.username,
             "created_at": review.created_at.isoformat()
-        } for review in stylist.reviews if not review.is_hidden]
+        } for review in stylist.reviews.filter_by(is_hidden=False)]
     }), 200
 
 # Update stylist (Admin only)
 @stylist_bp.route('/stylists/<int:stylist_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_stylist(stylist_id):
-    if not is_admin():
-        return jsonify({"error": "Admin access required"}), 403
-
     stylist = Stylist.query.get_or_404(stylist_id)
     data = request.get_json()  # ✅ This handles JSON input now
 
@@ -194,6 +194,7 @@ def update_stylist(stylist_id):
             if service and service.salon_id == stylist.salon_id:
                 stylist.services.append(service)
 
+    invalidate_catalog()
     db.session.commit()
 
     return jsonify({"message": "Stylist updated successfully"}), 200
@@ -203,74 +204,29 @@ def update_stylist(stylist_id):
 
 
 @stylist_bp.route("/stylists/<int:stylist_id>/appointments", methods=["GET"])
-@jwt_required()
+@roles_required('stylist', 'admin')
+@conditional_get(APPOINTMENTS, CATALOG, authorize=check_admin_or_own_stylist)
 def get_customer_appointments(stylist_id):
-    
-    appointments = Appointment.query.filter_by(stylist_id=stylist_id).all()
-
-    result = []
-    for app in appointments:
-        # Safest possible date/time formatting
-        def safe_date_format(d):
-            if not d:
-                return None
-            try:
-                if isinstance(d, str):
-                    return d.split()[0]  # Just get date part if it's a full datetime string
-                return d.strftime('%Y-%m-%d')
-            except Exception:
-                return None
-
-        def safe_time_format(t):
-            if not t:
-                return None
-            try:
-                if isinstance(t, str):
-                    if ':' in t:  # Basic check if it's a time string
-                        return t.split('T')[-1].split('.')[0]  # Handle ISO strings
-                    return None
-                return t.strftime('%H:%M:%S')
-            except Exception:
-                return None
-
-        def safe_datetime_format(dt):
-            if not dt:
-                return None
-            try:
-                if isinstance(dt, str):
-                    return dt  # Assume it's already properly formatted
-                return dt.isoformat()
-            except Exception:
-                return None
-
-        appointment_data = {
-            "id": app.id,
-            "stylist": getattr(app.stylist, 'name', None),
-            "service": getattr(app.service, 'name', None),
-            "status": app.status,
-            "salon": getattr(getattr(app.stylist, 'salon', None), 'name', None),
-            "appointment_date": safe_date_format(getattr(app, 'appointment_date', None)),
-            "appointment_time": safe_time_format(getattr(app, 'appointment_time', None)),
-            "start_datetime": safe_datetime_format(getattr(app, 'start_datetime', None)),
-            "end_datetime": safe_datetime_format(getattr(app, 'end_datetime', None))
-        }
-
-        result.append(appointment_data)
-
-    return jsonify(result), 200
+    appointments, next_cursor = paginate(appointment_rows(Appointment.stylist_id == stylist_id), Appointment.id)
+    return paginated_response([serialize_appointment(row) for row in appointments], next_cursor)
 
 #mark cmpleteappointment
 @stylist_bp.route("/stylists/appointments/<int:id>", methods=["PATCH"])
-@jwt_required()
+@roles_required('stylist', 'admin')
 def update_appointments(id):
     appointment = Appointment.query.get_or_404(id)
+    if not check_admin_or_own_stylist(appointment.stylist_id):
+        return jsonify({"error": "Unauthorized access"}), 403
 
     # Toggle logic: if completed, set to pending; else set to completed
+    old_status = appointment.status
     if appointment.status == "completed":
         appointment.status = "pending"
     else:
         appointment.status = "completed"
 
+    appointment_status_changed(appointment, old_status)
+    appointments_changed()
     db.session.commit()
 
     return jsonify({
@@ -280,24 +236,20 @@ def update_appointments(id):
 
 # Delete stylist (Admin only)
 @stylist_bp.route('/stylists/<int:stylist_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_stylist(stylist_id):
-    if not is_admin():
-        return jsonify({"error": "Admin access required"}), 403
-
     stylist = Stylist.query.get_or_404(stylist_id)
     stylist_name = stylist.name
     salon_id = stylist.salon_id
 
+    rollup_appointments(Appointment.stylist_id == stylist_id, sign=-1)
     db.session.delete(stylist)
-    db.session.commit()
 
-    # Send email to admin
-    try:
-        msg = Message(
-            subject="Stylist Deleted",
-            recipients=["admin@example.com"],  # Replace with actual admin email
-            body=f"""The following stylist has been deleted:
+    # Queue email to admin
+    queue_email(
+        subject="Stylist Deleted",
+        recipients=["admin@example.com"],  # Replace with actual admin email
+        body=f"""The following stylist has been deleted:
 
 Name: {stylist_name}
 Salon ID: {salon_id}
@@ -305,15 +257,16 @@ Salon ID: {salon_id}
 Best regards,
 Salon System
 """
-        )
-        mail.send(msg)
-    except Exception as e:
-        print("Email send failed:", e)
+    )
+    invalidate_catalog()
+    appointments_changed()
+    db.session.commit()
 
     return jsonify({"message": "Stylist deleted successfully"}), 200
 
 # Get stylist availability
 @stylist_bp.route('/stylists/<int:stylist_id>/availability', methods=['GET'])
+@conditional_get(APPOINTMENTS, CATALOG, public=True)
 def get_stylist_availability(stylist_id):
     date = request.args.get('date')
     if not date:
@@ -324,25 +277,23 @@ def get_stylist_availability(stylist_id):
     except ValueError:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
-    appointments = Appointment.query.filter(
-        db.func.date(Appointment.appointment_date) == target_date,
-        Appointment.stylist_id == stylist_id
-    ).all()
-
-    booked_slots = [app.appointment_date.time() for app in appointments]
+    stylist = Stylist.query.get_or_404(stylist_id)
 
-    available_slots = []
-    start_time = datetime.strptime("09:00", "%H:%M").time()
-    end_time = datetime.strptime("18:00", "%H:%M").time()
+    # Slots must fit the selected service; without one, use the slot step
+    duration = None
+    service_id = request.args.get('service_id', type=int)
+    if service_id:
+        service = Service.query.get(service_id)
+        if not service:
+            return jsonify({"error": "Service not found"}), 404
+        duration = service.duration
 
-    current_time = start_time
-    while current_time <= end_time:
-        if current_time not in booked_slots:
-            available_slots.append(current_time.strftime("%H:%M"))
-        current_time = (datetime.combine(datetime.min, current_time) + timedelta(minutes=30)).time()
+    slots = stylist_availability(stylist, target_date, duration=duration)[target_date]
 
     return jsonify({
         "stylist_id": stylist_id,
         "date": date,
-        "available_slots": available_slots
+        "service_id": service_id,
+        "duration": duration or SLOT_STEP_MINUTES,
+        "available_slots": [slot.strftime("%H:%M") for slot in slots]
     }), 200
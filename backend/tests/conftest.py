@@ -0,0 +1,85 @@
+import os
+import tempfile
+from datetime import date, time, datetime
+
+import pytest
+
+# app.py builds the app at import time, so the environment is set first
+_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ['DATABASE_URL'] = f'sqlite:///{_db.name}'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'  # hash on the test thread
+os.environ['PASSWORD_HASH_COST'] = '1024'
+os.environ['UPLOAD_VARIANT_THREADS'] = '0'
+os.environ['UPLOAD_ROOT'] = tempfile.mkdtemp(prefix='uploads-')
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from models import db, User, Salon, Stylist, Service, Appointment  # noqa: E402
+import authz  # noqa: E402
+import cache  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    # Flask-Mail read TESTING when the app was built; record messages instead of sending them
+    flask_app.extensions['mail'].suppress = True
+    # Per-worker caches outlive the database they were filled from
+    cache.catalog_cache.expire()
+    authz.user_cache.__init__()
+    authz.revoked_tokens.__init__()
+    with flask_app.app_context():
+        db.create_all()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def data(app):
+    """Ids of a salon with one stylist and service, an admin and two customers."""
+    with app.app_context():
+        salon = Salon(name="Glamour", slug="glamour", location="Westlands, Nairobi", contact="0700000000",
+                      opening_hours={"Mon-Fri": "9am - 6pm", "Sat": "9am - 4pm", "Sun": "Closed"})
+        admin = User(username="admin", email="admin@example.com", is_admin=True)
+        stylist_user = User(username="mary", email="mary@example.com", is_stylist=True)
+        customer = User(username="alice", email="alice@example.com")
+        other = User(username="bob", email="bob@example.com")
+        for user in (admin, stylist_user, customer, other):
+            user.set_password("password123")
+        db.session.add_all([salon, admin, stylist_user, customer, other])
+        db.session.flush()
+
+        stylist = Stylist(user_id=stylist_user.id, salon_id=salon.id, name="Mary", slug="mary", email=stylist_user.email)
+        service = Service(name="Braids", slug="braids", duration=90, price=2000, category="Hair", salon_id=salon.id)
+        db.session.add_all([stylist, service])
+        db.session.flush()
+        stylist.services.append(service)
+        appointment = Appointment(customer_id=customer.id, stylist_id=stylist.id, service_id=service.id,
+                                  appointment_date=date(2026, 1, 5), appointment_time=time(10, 30),
+                                  start_datetime=datetime(2026, 1, 5, 10, 30), end_datetime=datetime(2026, 1, 5, 12),
+                                  status='completed')
+        db.session.add(appointment)
+        db.session.commit()
+        return {
+            "salon": salon.id, "admin": admin.id, "stylist_user": stylist_user.id, "stylist": stylist.id,
+            "service": service.id, "customer": customer.id, "other": other.id, "appointment": appointment.id
+        }
+
+
+@pytest.fixture
+def auth(app):
+    """auth(user_id) -> Authorization header for a fresh access token of the user."""
+    def headers(user_id):
+        with app.app_context():
+            user = db.session.get(User, user_id)
+            token = create_access_token(identity=str(user.id), additional_claims=user.token_claims())
+        return {"Authorization": f"Bearer {token}"}
+    return headers
@@ -0,0 +1,57 @@
+import pytest
+
+from models import db, User, Stylist, Appointment
+
+ADMIN_ONLY = [
+    ('get', '/api/admin/users'),
+    ('get', '/api/customer/admin/customers'),
+    ('get', '/api/customer/customers/admin/appointments'),
+    ('delete', '/api/customer/admin/appointments/{appointment}'),
+    ('post', '/api/salon/services'),
+    ('delete', '/api/stylist/stylists/{stylist}'),
+]
+
+
+@pytest.mark.parametrize('method, url', ADMIN_ONLY)
+def test_admin_endpoints_need_an_admin_token(client, data, auth, method, url):
+    url = url.format(**data)
+    assert getattr(client, method)(url).status_code == 401
+    response = getattr(client, method)(url, headers=auth(data['customer']))
+    assert response.status_code == 403
+    assert response.get_json() == {"error": "Admin access required"}
+
+
+def test_admin_blueprint_lets_admins_through(client, data, auth):
+    assert client.get('/api/admin/users', headers=auth(data['admin'])).status_code == 200
+
+
+def test_stylist_appointments_need_a_stylist_or_admin_token(client, data, auth):
+    url = f"/api/stylist/stylists/{data['stylist']}/appointments"
+    response = client.get(url, headers=auth(data['customer']))
+    assert response.status_code == 403
+    assert response.get_json() == {"error": "Stylist or Admin access required"}
+    assert client.get(url, headers=auth(data['stylist_user'])).status_code == 200
+    assert client.get(url, headers=auth(data['admin'])).status_code == 200
+
+    toggle = f"/api/stylist/stylists/appointments/{data['appointment']}"
+    assert client.patch(toggle, headers=auth(data['customer'])).status_code == 403
+    assert client.patch(toggle, headers=auth(data['stylist_user'])).status_code == 200
+
+
+def test_stylists_cannot_reach_another_stylists_appointments(app, client, data, auth):
+    with app.app_context():
+        user = User(username="joan", email="joan@example.com", is_stylist=True)
+        user.set_password("password123")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Stylist(user_id=user.id, salon_id=data['salon'], name="Joan", slug="joan", email=user.email))
+        db.session.commit()
+        other_stylist_user = user.id
+
+    headers = auth(other_stylist_user)
+    response = client.get(f"/api/stylist/stylists/{data['stylist']}/appointments", headers=headers)
+    assert response.status_code == 403
+    response = client.patch(f"/api/stylist/stylists/appointments/{data['appointment']}", headers=headers)
+    assert response.status_code == 403
+    with app.app_context():
+        assert db.session.get(Appointment, data['appointment']).status == 'completed'
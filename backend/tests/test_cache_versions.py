@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import cache
+from cache import APPOINTMENTS
+from models import db, CacheVersion
+
+
+def _version(app):
+    with app.app_context():
+        return db.session.query(CacheVersion.version).filter_by(name=APPOINTMENTS).scalar() or 0
+
+
+def _book(client, data, auth, time):
+    return client.post(f"/api/customer/customers/{data['customer']}/appointments", headers=auth(data['customer']), json={
+        "stylist_id": data['stylist'], "service_id": data['service'],
+        "appointment_date": (date.today() + timedelta(days=30)).isoformat(), "appointment_time": time
+    })
+
+
+def test_booking_bumps_the_appointments_version_after_it_commits(app, client, data, auth):
+    before = _version(app)
+    commits = []
+    original = db.session.commit
+
+    def commit():
+        commits.append(db.session.query(CacheVersion.version).filter_by(name=APPOINTMENTS).scalar() or 0)
+        original()
+
+    with patch.object(db.session, 'commit', commit):
+        assert _book(client, data, auth, "10:00").status_code == 201
+    # The booking transaction never touched the counter row; the bump followed its commit
+    assert commits == [before]
+    assert _version(app) == before + 1
+
+
+def test_failed_booking_leaves_the_version_alone(app, client, data, auth):
+    assert _book(client, data, auth, "10:00").status_code == 201
+    before = _version(app)
+    with patch.object(cache, 'bump_version', wraps=cache.bump_version) as bump:
+        assert _book(client, data, auth, "10:00").status_code == 409
+    assert not bump.called
+    assert _version(app) == before
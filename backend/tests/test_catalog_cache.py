@@ -0,0 +1,40 @@
+from cache import catalog_cache, invalidate_catalog
+from models import db, Salon
+
+
+def _fill(client):
+    assert client.get('/api/salon/salons').status_code == 200
+    assert len(catalog_cache._entries) == 1
+
+
+def test_catalog_entries_are_dropped_when_the_write_commits(app, client, data):
+    _fill(client)
+    with app.app_context():
+        db.session.get(Salon, data['salon']).name = "Renamed"
+        invalidate_catalog()
+        # Until the commit the old rows and version are still the committed ones
+        assert len(catalog_cache._entries) == 1
+        db.session.commit()
+        assert len(catalog_cache._entries) == 0
+
+    assert client.get('/api/salon/salons').get_json()[0]['name'] == "Renamed"
+
+
+def test_catalog_entries_survive_a_rolled_back_write(app, client, data):
+    _fill(client)
+    with app.app_context():
+        invalidate_catalog()
+        db.session.rollback()
+        db.session.commit()
+    assert len(catalog_cache._entries) == 1
+
+
+def test_a_savepoint_does_not_drop_the_entries_early(app, client, data):
+    _fill(client)
+    with app.app_context():
+        invalidate_catalog()
+        with db.session.begin_nested():
+            db.session.get(Salon, data['salon']).name = "Renamed"
+        assert len(catalog_cache._entries) == 1
+        db.session.commit()
+    assert len(catalog_cache._entries) == 0
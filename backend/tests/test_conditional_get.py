@@ -0,0 +1,35 @@
+def test_foreign_etag_does_not_bypass_owner_check(client, data, auth):
+    url = f"/api/customer/customers/{data['customer']}/appointments"
+    response = client.get(url, headers=auth(data['customer']))
+    assert response.status_code == 200
+
+    other = auth(data['other'])
+    response = client.get(url, headers={**other, 'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 403
+
+
+def test_admin_views_check_role_before_revalidating(client, data, auth):
+    response = client.get('/api/customer/admin/appointments', headers=auth(data['admin']))
+    assert response.status_code == 200
+
+    response = client.get('/api/customer/admin/appointments',
+                          headers={**auth(data['customer']), 'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 403
+
+
+def test_private_etag_is_per_user(client, data, auth):
+    first = client.get('/api/salon/appointments', headers=auth(data['customer']))
+    second = client.get('/api/salon/appointments', headers=auth(data['other']))
+    assert first.headers['ETag'] != second.headers['ETag']
+    assert 'Last-Modified' not in first.headers
+
+    response = client.get('/api/salon/appointments',
+                          headers={**auth(data['other']), 'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+
+
+def test_unchanged_response_revalidates(client, data, auth):
+    headers = auth(data['customer'])
+    url = f"/api/customer/customers/{data['customer']}/appointments"
+    etag = client.get(url, headers=headers).headers['ETag']
+    assert client.get(url, headers={**headers, 'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,24 @@
+import csv
+import gzip
+import io
+
+
+def _rows(response, compressed=False):
+    body = response.get_data()
+    return list(csv.reader(io.StringIO((gzip.decompress(body) if compressed else body).decode())))
+
+
+def test_csv_export_has_a_header_row(client, data, auth):
+    response = client.get('/api/admin/export/appointments?format=csv', headers=auth(data['admin']))
+    assert response.status_code == 200
+    header, *rows = _rows(response)
+    assert 'id' in header
+    assert len(rows) == 1
+
+
+def test_empty_csv_export_still_has_the_header(client, data, auth):
+    url = '/api/admin/export/appointments?format=csv&from=2030-01-01'
+    header = _rows(client.get(url, headers=auth(data['admin'])))
+    assert len(header) == 1 and 'id' in header[0]
+
+    assert _rows(client.get(url + '&gzip=true', headers=auth(data['admin'])), compressed=True) == header
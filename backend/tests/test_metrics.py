@@ -0,0 +1,17 @@
+from app import create_app
+
+
+def test_metrics_are_off_by_default(client):
+    assert client.get('/metrics').status_code == 404
+
+
+def test_metrics_only_answer_allowed_addresses(app, monkeypatch):
+    monkeypatch.setenv('METRICS_ENABLED', 'true')
+    monkeypatch.setenv('METRICS_ALLOWED_IPS', '10.0.0.0/8, 192.168.1.5')
+    metrics_client = create_app().test_client()
+
+    assert metrics_client.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'}).status_code == 200
+    assert metrics_client.get('/metrics', environ_base={'REMOTE_ADDR': '192.168.1.5'}).status_code == 200
+    response = metrics_client.get('/metrics', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    assert response.status_code == 403
+    assert response.get_json() == {"error": "Forbidden"}
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from flask_mail import Connection
+
+from app import mail
+from mailer import queue_email, drain_outbox
+from models import db, OutboundEmail
+
+
+def _queue(app, count=1):
+    with app.app_context():
+        for i in range(count):
+            queue_email(f"Subject {i}", [f"user{i}@example.com"], "Hello")
+        db.session.commit()
+
+
+def _emails(app):
+    with app.app_context():
+        return [(email.status, email.attempts, email.next_attempt_at, email.last_error)
+                for email in OutboundEmail.query.order_by(OutboundEmail.id)]
+
+
+def test_register_queues_the_welcome_email_until_the_worker_sends_it(app, client):
+    with mail.record_messages() as outbox:
+        response = client.post('/api/auth/register', json={
+            "username": "carol", "email": "carol@example.com", "password": "password123"
+        })
+        assert response.status_code == 201
+        assert outbox == []
+
+        with app.app_context():
+            assert drain_outbox() == 1
+            assert drain_outbox() == 0
+
+    assert [message.recipients for message in outbox] == [["carol@example.com"]]
+    assert outbox[0].subject == "Welcome to Our Salon Booking System"
+    assert _emails(app)[0][0] == 'sent'
+
+
+def test_failed_send_backs_off_then_dead_letters(app, monkeypatch):
+    def refuse(self, message, envelope_from=None):
+        raise OSError("mailbox unavailable")
+
+    monkeypatch.setattr(Connection, 'send', refuse)
+    app.config['MAIL_OUTBOX_RETRY_DELAY'] = 30
+    _queue(app)
+
+    with app.app_context():
+        started = datetime.utcnow()
+        assert drain_outbox(max_attempts=3) == 0
+        status, attempts, next_attempt_at, last_error = _emails(app)[0]
+        assert (status, attempts, last_error) == ('pending', 1, "mailbox unavailable")
+        assert next_attempt_at >= started + timedelta(seconds=30)
+
+        # Not due yet: nothing is attempted
+        assert drain_outbox(max_attempts=3) == 0
+        assert _emails(app)[0][1] == 1
+
+        # Each retry doubles the delay; the last attempt dead-letters it
+        for attempts, delay in ((2, 60), (3, None)):
+            OutboundEmail.query.update({OutboundEmail.next_attempt_at: datetime.utcnow()})
+            db.session.commit()
+            started = datetime.utcnow()
+            drain_outbox(max_attempts=3)
+            status, seen, next_attempt_at, _ = _emails(app)[0]
+            assert seen == attempts
+            if delay:
+                assert status == 'pending'
+                assert next_attempt_at >= started + timedelta(seconds=delay)
+            else:
+                assert status == 'dead'
+
+
+def test_connection_failure_counts_against_every_email_in_the_batch(app, monkeypatch):
+    def unreachable():
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(mail, 'connect', unreachable)
+    _queue(app, count=3)
+
+    with app.app_context():
+        assert drain_outbox() == 0
+    assert [(status, attempts) for status, attempts, _, _ in _emails(app)] == [('pending', 1)] * 3
@@ -0,0 +1,31 @@
+import base64
+import json
+
+import pytest
+
+from pagination import encode_cursor
+
+
+def _cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def _appointments(client, data, auth, cursor):
+    return client.get(f"/api/customer/customers/{data['customer']}/appointments",
+                      query_string={"cursor": cursor}, headers=auth(data['customer']))
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!", _cursor([1]), _cursor({"x": 1}),
+    _cursor({"k": [1, 2]}), _cursor({"k": {"a": 1}}), _cursor({"k": None}), _cursor({"k": True}),
+])
+def test_invalid_cursor_is_400(client, data, auth, cursor):
+    response = _appointments(client, data, auth, cursor)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+def test_cursor_past_the_last_row_is_an_empty_page(client, data, auth):
+    response = _appointments(client, data, auth, encode_cursor(data['appointment']))
+    assert response.status_code == 200
+    assert response.get_json() == []
@@ -0,0 +1,17 @@
+import passwords
+
+
+def test_hashing_in_the_process_pool(app):
+    app.config['PASSWORD_HASH_WORKERS'] = 1
+    try:
+        with app.app_context():
+            pool, _ = passwords._get_pool()
+            assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+            pwhash = passwords.hash_password("password123")
+            assert passwords.verify_password(pwhash, "password123")
+            assert not passwords.verify_password(pwhash, "wrong")
+    finally:
+        app.config['PASSWORD_HASH_WORKERS'] = 0
+        if passwords._pool is not None:
+            passwords._pool.shutdown()
+        passwords._reset_pool()
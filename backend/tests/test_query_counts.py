@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+from datetime import date, time, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Appointment
+import cache
+
+# Each listing is one joined query per page, however many appointments it
+# holds: adding rows must not add statements.
+
+LISTINGS = [
+    ('/api/customer/admin/appointments', 'admin'),
+    ('/api/customer/customers/admin/appointments', 'admin'),
+    ('/api/customer/admin/customers/{customer}/appointments', 'admin'),
+    ('/api/customer/customers/{customer}/appointments', 'customer'),
+    ('/api/salon/appointments', 'customer'),
+    ('/api/stylist/stylists/{stylist}/appointments', 'stylist_user'),
+]
+
+
+@contextmanager
+def count_statements(app):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def _add_appointments(app, data, count):
+    with app.app_context():
+        for i in range(count):
+            day = date(2026, 2, 1) + timedelta(days=i)
+            db.session.add(Appointment(
+                customer_id=data['customer'], stylist_id=data['stylist'], service_id=data['service'],
+                appointment_date=day, appointment_time=time(9), status='pending',
+                start_datetime=datetime.combine(day, time(9)), end_datetime=datetime.combine(day, time(10, 30))
+            ))
+        db.session.commit()
+
+
+def _get(app, client, url, headers):
+    cache.catalog_cache.expire()  # measure the full read path, not a cached version lookup
+    with count_statements(app) as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json(), statements
+
+
+@pytest.mark.parametrize('url, user', LISTINGS)
+def test_listing_statements_do_not_grow_with_rows(app, client, data, auth, url, user):
+    url = url.format(**data)
+    headers = auth(data[user])
+    client.get(url, headers=headers)  # warm the per-worker user and revocation caches
+
+    few, few_statements = _get(app, client, url, headers)
+    _add_appointments(app, data, 10)
+    many, many_statements = _get(app, client, url, headers)
+
+    assert len(many) == len(few) + 10
+    assert len(many_statements) == len(few_statements)
+    assert sum('FROM appointments' in statement for statement in many_statements) == 1
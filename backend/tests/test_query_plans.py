@@ -0,0 +1,58 @@
+import json
+
+from sqlalchemy import event
+
+import seed_bulk
+from benchmarks.endpoints import THRESHOLDS, prepare, scenarios
+from benchmarks.query_plans import StatementRecorder, check_plans
+from models import db
+
+# benchmarks.query_plans as a test: every statement the hot endpoints send
+# must use an index on a table of MIN_ROWS rows or more, unless thresholds.json
+# allows the scan for that endpoint.
+
+MIN_ROWS = 200
+
+
+def _seed(app):
+    with app.app_context():
+        seed_bulk.generate(salons=3, customers=300, years=0.25, seed=42)
+        db.session.commit()
+
+
+def test_hot_endpoints_do_not_scan_large_tables(app, client):
+    _seed(app)
+    with open(THRESHOLDS) as f:
+        thresholds = json.load(f)
+    with app.app_context():
+        engine = db.engine
+    ids = prepare(app, db)
+
+    failures = []
+    row_counts = {}
+    for name, _, fn in scenarios(client, ids):
+        recorder = StatementRecorder()
+        event.listen(engine, 'before_cursor_execute', recorder)
+        try:
+            for i in range(3):
+                fn(i)
+        finally:
+            event.remove(engine, 'before_cursor_execute', recorder)
+
+        allowed = set(thresholds.get(name, {}).get('allow_scans', []))
+        assert recorder.statements, f"{name} sent no statements"
+        for statement, details, full in check_plans(app, db, recorder.statements, allowed, MIN_ROWS, row_counts):
+            if full:
+                failures.append(f"{name}: full scan of {', '.join(full)} in {' '.join(statement.split())}\n"
+                                + '\n'.join('    ' + line for line in details))
+
+    assert not failures, '\n'.join(failures)
+
+
+def test_check_plans_reports_a_full_scan(app):
+    _seed(app)
+    statement = 'SELECT id FROM appointments WHERE customer_id + 0 = ?'
+    [(_, details, full)] = check_plans(app, db, {statement: (1,)}, set(), MIN_ROWS, {})
+    assert full == ['appointments'], details
+    [(_, _, full)] = check_plans(app, db, {statement: (1,)}, {'appointments'}, MIN_ROWS, {})
+    assert full == []
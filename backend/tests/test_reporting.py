@@ -0,0 +1,76 @@
+from models import db, Appointment, DailyRollup
+
+
+def _bookings(app):
+    with app.app_context():
+        return db.session.query(db.func.coalesce(db.func.sum(DailyRollup.bookings), 0)).filter_by(dimension='salon').scalar()
+
+
+def _appointments(app):
+    with app.app_context():
+        return Appointment.query.count()
+
+
+def test_booking_adds_to_rollups(app, client, data, auth):
+    before = _bookings(app)
+    response = client.post(f"/api/customer/customers/{data['customer']}/appointments", headers=auth(data['customer']),
+                           json={"stylist_id": data['stylist'], "service_id": data['service'],
+                                 "appointment_date": "2030-01-07", "appointment_time": "10:00"})
+    assert response.status_code == 201
+    assert _bookings(app) == before + 1
+
+
+def test_deleting_a_customer_removes_their_appointments_from_rollups(app, client, data, auth):
+    from reporting import backfill_rollups
+    with app.app_context():
+        backfill_rollups()
+        db.session.commit()
+    assert _bookings(app) == _appointments(app) == 1
+
+    response = client.delete(f"/api/customer/customers/{data['customer']}", headers=auth(data['customer']))
+    assert response.status_code == 200
+    assert _bookings(app) == _appointments(app) == 0
+
+
+def _totals(app):
+    """dimension -> {entity_id: (bookings, revenue, booked_minutes)} over every day and status."""
+    with app.app_context():
+        rows = db.session.query(DailyRollup.dimension, DailyRollup.entity_id, db.func.sum(DailyRollup.bookings),
+                                db.func.sum(DailyRollup.revenue), db.func.sum(DailyRollup.booked_minutes)) \
+            .group_by(DailyRollup.dimension, DailyRollup.entity_id).all()
+    totals = {}
+    for dimension, entity_id, bookings, revenue, minutes in rows:
+        if bookings:
+            totals.setdefault(dimension, {})[entity_id] = (bookings, revenue, minutes)
+    return totals
+
+
+def test_removing_an_appointment_subtracts_what_booking_added(app, client, data, auth):
+    from models import Salon, Service, Stylist
+    from reporting import backfill_rollups
+    with app.app_context():
+        backfill_rollups()
+        db.session.commit()
+    before = _totals(app)
+
+    response = client.post(f"/api/customer/customers/{data['customer']}/appointments", headers=auth(data['customer']),
+                           json={"stylist_id": data['stylist'], "service_id": data['service'],
+                                 "appointment_date": "2030-01-07", "appointment_time": "10:00"})
+    appointment_id = response.get_json()['id']
+
+    # Price, duration and the stylist's salon all change before the appointment goes away
+    with app.app_context():
+        service = db.session.get(Service, data['service'])
+        service.price, service.duration = 3500, 120
+        other_salon = Salon(name="Elsewhere", slug="elsewhere", location="CBD", contact="0711111111")
+        db.session.add(other_salon)
+        db.session.flush()
+        db.session.get(Stylist, data['stylist']).salon_id = other_salon.id
+        db.session.commit()
+
+    toggle = f"/api/stylist/stylists/appointments/{appointment_id}"
+    assert client.patch(toggle, headers=auth(data['stylist_user'])).status_code == 200
+    assert client.patch(toggle, headers=auth(data['stylist_user'])).status_code == 200
+    response = client.delete(f"/api/customer/admin/appointments/{appointment_id}", headers=auth(data['admin']))
+    assert response.status_code == 200
+    assert _totals(app) == before
@@ -0,0 +1,53 @@
+from models import db, Stylist, Review
+
+
+def _stylist_rating(app, stylist_id):
+    with app.app_context():
+        stylist = db.session.get(Stylist, stylist_id)
+        return stylist.rating_sum, stylist.rating_count
+
+
+def _review(client, data, auth, **body):
+    return client.post("/api/customer/reviews", headers=auth(data['customer']),
+                       json={"appointment_id": data['appointment'], "stylist_id": data['stylist'], "rating": 4, **body})
+
+
+def test_review_goes_to_the_appointments_stylist(app, client, data, auth):
+    with app.app_context():
+        other = Stylist(name="Other", salon_id=data['salon'], user_id=data['other'])
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+
+    response = _review(client, data, auth, stylist_id=other_id)
+    assert response.status_code == 201
+    assert response.get_json()['review']['stylist_id'] == data['stylist']
+    assert _stylist_rating(app, data['stylist']) == (4, 1)
+    assert _stylist_rating(app, other_id) == (0, 0)
+
+
+def test_review_rating_must_be_one_to_five(app, client, data, auth):
+    for rating in (None, 0, 6, 2.5, "5", True):
+        response = _review(client, data, auth, rating=rating)
+        assert response.status_code == 400, rating
+    with app.app_context():
+        assert Review.query.count() == 0
+
+
+def test_hiding_and_showing_twice_adjusts_the_rating_once(app, client, data, auth):
+    review_id = _review(client, data, auth).get_json()['review']['id']
+
+    for _ in range(2):
+        response = client.put(f"/api/admin/reviews/stylist/{review_id}/hide", headers=auth(data['admin']))
+        assert response.status_code == 200
+        assert _stylist_rating(app, data['stylist']) == (0, 0)
+
+    for _ in range(2):
+        response = client.put(f"/api/admin/reviews/stylist/{review_id}/show", headers=auth(data['admin']))
+        assert response.status_code == 200
+        assert _stylist_rating(app, data['stylist']) == (4, 1)
+
+
+def test_hiding_a_missing_review_is_404(client, data, auth):
+    response = client.put("/api/admin/reviews/stylist/999/hide", headers=auth(data['admin']))
+    assert response.status_code == 404
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from models import db, TokenBlocklist
+from authz import revoked_tokens
+
+
+def _insert(jti, created_at):
+    # As another worker would: straight to the table, not through revoke_token()
+    db.session.add(TokenBlocklist(jti=jti, created_at=created_at))
+    db.session.commit()
+
+
+def test_refresh_picks_up_a_reused_id(app):
+    with app.app_context():
+        now = datetime.utcnow()
+        _insert('first', now - timedelta(seconds=2))
+        _insert('second', now - timedelta(seconds=1))
+        revoked_tokens.refresh(force=True)
+        assert 'second' in revoked_tokens._jtis
+
+        # SQLite hands the deleted row's id to the next insert
+        reused_id = db.session.query(db.func.max(TokenBlocklist.id)).scalar()
+        TokenBlocklist.query.filter_by(jti='second').delete()
+        _insert('third', now)
+        assert TokenBlocklist.query.filter_by(jti='third').one().id == reused_id
+
+        revoked_tokens.refresh(force=True)
+        assert 'third' in revoked_tokens._jtis
+
+
+def test_refresh_picks_up_a_row_that_commits_late(app):
+    with app.app_context():
+        now = datetime.utcnow()
+        _insert('newer', now)
+        revoked_tokens.refresh(force=True)
+
+        # Stamped before the watermark, committed after it was read
+        _insert('late', now - timedelta(seconds=5))
+        revoked_tokens.refresh(force=True)
+        assert 'late' in revoked_tokens._jtis
+        assert len(revoked_tokens) == 2
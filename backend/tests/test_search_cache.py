@@ -0,0 +1,10 @@
+from cache import catalog_cache
+
+
+def test_search_does_not_fill_the_catalog_cache(client, data):
+    for q in ('b', 'br', 'bra', 'braids'):
+        assert client.get(f'/api/salon/search?q={q}').status_code == 200
+    assert len(catalog_cache._entries) == 0
+
+    assert client.get('/api/salon/salons').status_code == 200
+    assert len(catalog_cache._entries) == 1
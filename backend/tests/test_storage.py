@@ -0,0 +1,35 @@
+import os
+import threading
+
+from storage import LocalStorage
+
+
+def test_concurrent_saves_of_one_key_do_not_collide(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'root'), '/files')
+    key = 'ab/' + 'ab' * 32 + '.png'
+    sources = []
+    for i in range(8):
+        source = tmp_path / f'source-{i}'
+        source.write_bytes(b'same bytes' * 1000)
+        sources.append(str(source))
+
+    errors = []
+    barrier = threading.Barrier(len(sources))
+
+    def save(source):
+        barrier.wait()
+        try:
+            storage.save(key, source)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(source,)) for source in sources]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with storage.open(key) as f:
+        assert f.read() == b'same bytes' * 1000
+    assert os.listdir(os.path.dirname(storage.path(key))) == [os.path.basename(storage.path(key))]
@@ -0,0 +1,53 @@
+import io
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from models import db, Upload
+from storage import get_storage
+from uploads import drain_variants
+
+
+def _png(size=(800, 600), color='teal'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _upload(client, data, auth, body):
+    return client.post(f"/api/media/users/{data['customer']}/profile-pic", data=body,
+                       headers={**auth(data['customer']), 'Content-Type': 'image/png'})
+
+
+def test_worker_makes_the_variants(app, client, data, auth):
+    response = _upload(client, data, auth, _png())
+    assert response.status_code == 200
+    digest = response.get_json()['upload']['digest']
+
+    with app.app_context():
+        assert drain_variants() == 1
+        upload = db.session.get(Upload, digest)
+        assert upload.status == 'ready'
+        assert (upload.width, upload.height) == (800, 600)
+        storage = get_storage()
+        assert all(storage.exists(key) for key in upload.variants.values())
+
+
+def test_broken_image_backs_off_then_fails(app, client, data, auth):
+    # A PNG signature with nothing decodable behind it
+    response = _upload(client, data, auth, b'\x89PNG\r\n\x1a\n' + b'\0' * 64)
+    assert response.status_code == 200
+    digest = response.get_json()['upload']['digest']
+    app.config['UPLOAD_VARIANT_RETRY_DELAY'] = 30
+
+    with app.app_context():
+        started = datetime.utcnow()
+        assert drain_variants(max_attempts=2) == 0
+        upload = db.session.get(Upload, digest)
+        assert (upload.status, upload.attempts) == ('pending', 1)
+        assert upload.next_attempt_at >= started + timedelta(seconds=30)
+
+        upload.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        assert drain_variants(max_attempts=2) == 0
+        assert db.session.get(Upload, digest).status == 'failed'
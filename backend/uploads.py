@@ -0,0 +1,210 @@
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Upload
+from jobqueue import WorkQueue
+from storage import get_storage, variant_key, VARIANTS
+
+# Image uploads. Request bodies are streamed to a temporary file in
+# UPLOAD_CHUNK_SIZE pieces while their sha256 is computed, then stored under
+# a key derived from that hash ("<2 hex>/<sha256>.<ext>"), so the same file
+# uploaded twice is stored once. Every upload gets a row in the uploads
+# table; the resized WebP variants listed in storage.VARIANTS are made later,
+# either by `flask uploads run` or, with UPLOAD_VARIANT_THREADS, by a thread
+# in the web process once the request has committed.
+
+uploads_cli = AppGroup('uploads', help="Process uploaded images.")
+
+# Leading bytes of the accepted formats -> (content type, extension)
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png', 'png'),
+    (b'GIF87a', 'image/gif', 'gif'),
+    (b'GIF89a', 'image/gif', 'gif'),
+]
+SNIFF_BYTES = 16
+
+
+class UploadRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def sniff_image(head):
+    """(content type, extension) of an image from its first bytes, or None."""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp', 'webp'
+    for signature, content_type, extension in SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    return None
+
+
+def receive_upload(stream):
+    """Store an image read from a file-like stream and return its Upload row.
+
+    The body is never held in memory: chunks go to a temporary file as they
+    are hashed. An image that was uploaded before returns the existing row.
+    New rows join the caller's transaction, so commit before calling
+    process_in_background(). Raises UploadRejected for empty, oversized or
+    non-image bodies.
+    """
+    config = current_app.config
+    max_bytes = config['UPLOAD_MAX_BYTES']
+    hasher = hashlib.sha256()
+    head = b''
+    size = 0
+
+    fd, path = tempfile.mkstemp(prefix='upload-', dir=config['UPLOAD_TMP_DIR'])
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(config['UPLOAD_CHUNK_SIZE'])
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(f"File is larger than {max_bytes // (1024 * 1024)} MB", 413)
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                hasher.update(chunk)
+                f.write(chunk)
+
+        if not size:
+            raise UploadRejected("No file uploaded")
+        kind = sniff_image(head)
+        if kind is None:
+            raise UploadRejected("Only JPEG, PNG, GIF and WebP images are accepted", 415)
+        content_type, extension = kind
+
+        digest = hasher.hexdigest()
+        upload = db.session.get(Upload, digest)
+        if upload is not None:
+            return upload
+
+        key = f"{digest[:2]}/{digest}.{extension}"
+        storage = get_storage()
+        if not storage.exists(key):
+            storage.save(key, path)
+        upload = Upload(digest=digest, key=key, content_type=content_type, size=size,
+                        next_attempt_at=datetime.utcnow())
+        try:
+            with db.session.begin_nested():
+                db.session.add(upload)
+        except IntegrityError:
+            # The same file was uploaded concurrently and that row won
+            upload = db.session.get(Upload, digest)
+        return upload
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def make_variants(upload):
+    """Write the missing WebP variants of an upload and record its dimensions."""
+    from PIL import Image, ImageOps
+
+    config = current_app.config
+    Image.MAX_IMAGE_PIXELS = config['UPLOAD_MAX_PIXELS']  # decompression bombs raise instead of eating memory
+    storage = get_storage()
+    largest = max(VARIANTS.values())
+
+    with storage.open(upload.key) as f, Image.open(f) as image:
+        upload.width, upload.height = image.size
+        # JPEGs can be decoded straight at a reduced scale that still covers the largest variant
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+
+        variants = {}
+        # Each variant is resized from the next larger one, which is much cheaper than the original
+        for name, side in sorted(VARIANTS.items(), key=lambda item: item[1], reverse=True):
+            image = image.copy()
+            image.thumbnail((side, side), Image.LANCZOS)  # keeps the aspect ratio, never enlarges
+            key = variant_key(upload.key, name)
+            if not storage.exists(key):
+                fd, path = tempfile.mkstemp(prefix='variant-', suffix='.webp', dir=config['UPLOAD_TMP_DIR'])
+                os.close(fd)
+                try:
+                    image.save(path, 'WEBP', quality=config['UPLOAD_VARIANT_QUALITY'])
+                    storage.save(key, path)
+                finally:
+                    if os.path.exists(path):
+                        os.remove(path)
+            variants[name] = key
+    upload.variants = variants
+
+
+variants_queue = WorkQueue(Upload, Upload.digest, 'upload', dead_status='failed', config_prefix='UPLOAD_VARIANT')
+
+
+def _make_variants(upload, _):
+    make_variants(upload)
+    upload.status = 'ready'
+    upload.last_error = None
+
+
+def drain_variants(batch_size=None, max_attempts=None):
+    """Make the variants of one batch of due uploads.
+
+    Returns the number of uploads that are now ready.
+    """
+    return variants_queue.drain(_make_variants, batch_size, max_attempts)
+
+
+_executor = None
+
+
+def _drain_in_background(app):
+    with app.app_context():
+        try:
+            while drain_variants() >= app.config['UPLOAD_VARIANT_BATCH_SIZE']:
+                pass
+        except Exception:
+            app.logger.exception("Making upload variants failed")
+
+
+def process_in_background():
+    """Make pending variants on a thread of this process, if UPLOAD_VARIANT_THREADS allows.
+
+    Call after committing the new uploads. With UPLOAD_VARIANT_THREADS=0 the
+    variants are left to `flask uploads run`.
+    """
+    global _executor
+    threads = current_app.config['UPLOAD_VARIANT_THREADS']
+    if not threads:
+        return
+    # Created on first use, so each gunicorn worker gets its own after the fork
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='upload-variants')
+    _executor.submit(_drain_in_background, current_app._get_current_object())
+
+
+@uploads_cli.command('run')
+@click.option('--once', is_flag=True, help="Process the due uploads and exit.")
+@click.option('--interval', default=5.0, show_default=True, help="Seconds to sleep when the queue is empty.")
+def run_worker(once, interval):
+    """Run the image variant worker."""
+    variants_queue.run(drain_variants, once, interval)
+
+
+@uploads_cli.command('status')
+def uploads_status():
+    """Show the number of uploads per status."""
+    variants_queue.echo_status()
+
+
+@uploads_cli.command('retry-failed')
+def retry_failed():
+    """Queue uploads whose variants failed for another attempt."""
+    click.echo(f"Requeued {variants_queue.requeue_dead()} upload(s)")
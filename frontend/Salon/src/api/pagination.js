@@ -0,0 +1,16 @@
+// List endpoints return one page at a time and put the cursor of the next
+// page in the X-Next-Cursor header. getAllPages follows it to the last page
+// and returns the rows of every page, for screens that show the whole list.
+const PAGE_SIZE = 200; // the backend's PAGINATION_MAX_LIMIT
+
+export async function getAllPages(client, url, config = {}) {
+  const rows = [];
+  let cursor = null;
+  do {
+    const params = { ...config.params, limit: PAGE_SIZE, ...(cursor && { cursor }) };
+    const response = await client.get(url, { ...config, params });
+    rows.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return rows;
+}
@@ -9,6 +9,7 @@ import { toast } from 'react-toastify';
 import StylistList from './Stylists';
 import ServiceList from './ShowServices';
 import AdminAppointments from './Appointments';
+import { getAllPages } from '../../api/pagination';
 
 export default function AdminDashboard() {
   const { user, logout } = useContext(AuthContext);
@@ -24,14 +25,14 @@ export default function AdminDashboard() {
   const fetchUsers = async () => {
     setLoading(true);
     try {
-      const res = await axios.get('http://127.0.0.1:5000/api/customer/admin/customers', {
+      const customers = await getAllPages(axios, 'http://127.0.0.1:5000/api/customer/admin/customers', {
         headers: { 
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json'
         },
         withCredentials: true
       });
-      setUsers(res.data);
+      setUsers(customers);
     } catch (err) {
       if (err.response?.status === 401) {
         toast.error('Session expired, please login again');
@@ -2,6 +2,7 @@ import { useEffect, useState } from 'react';
 import axios from 'axios';
 import { FaSpinner, FaTrashAlt, FaEdit } from 'react-icons/fa';
 import { toast } from 'react-toastify';
+import { getAllPages } from '../../api/pagination';
 
 export default function AdminAppointments() {
   const [appointments, setAppointments] = useState([]);
@@ -11,10 +12,12 @@ const token = localStorage.getItem('token');
   const loadAdminAppointments = async () => {
     setLoading(true);
     try {
-      const response = await axios.get(`http://127.0.0.1:5000/api/customer/customers/admin/appointments`, {
-    
+      const appointments = await getAllPages(axios, `http://127.0.0.1:5000/api/customer/customers/admin/appointments`, {
+        headers: {
+          Authorization: `Bearer ${token}`
+        }
       });
-      setAppointments(response.data);
+      setAppointments(appointments);
     } catch (err) {
       toast.error('Failed to load appointments');
       console.error(err);
@@ -2,6 +2,7 @@ import { useEffect, useState } from 'react';
 import axios from 'axios';
 import { FaEdit, FaTrash, FaSpinner } from 'react-icons/fa';
 import { toast } from 'react-toastify';
+import { getAllPages } from '../../api/pagination';
 
 const API = 'http://127.0.0.1:5000/api';
 
@@ -40,8 +41,7 @@ export default function ServiceList() {
   const fetchServices = async () => {
     try {
       setLoading(true);
-      const res = await api.get('/salon/services');
-      setServices(res.data);
+      setServices(await getAllPages(api, '/salon/services'));
     } catch (err) {
       toast.error(err.response?.data?.error || 'Failed to load services');
     } finally {
@@ -3,6 +3,7 @@ import axios from 'axios';
 import { toast } from 'react-toastify';
 import { FaSpinner } from 'react-icons/fa';
 import { useNavigate } from 'react-router-dom';
+import { getAllPages } from '../../api/pagination';
 
 const API_BASE_URL = 'http://127.0.0.1:5000/api';
 
@@ -55,12 +56,12 @@ const [formData, setFormData] = useState({
     const fetchData = async () => {
       try {
         setLoading(true);
-        const [salonsRes, servicesRes] = await Promise.all([
-          api.get('/salon/salons'),
-          api.get('/salon/services')
+        const [salons, services] = await Promise.all([
+          getAllPages(api, '/salon/salons'),
+          getAllPages(api, '/salon/services')
         ]);
-        setSalons(salonsRes.data);
-        setServices(servicesRes.data);
+        setSalons(salons);
+        setServices(services);
       } catch (err) {
         toast.error(err.response?.data?.message || 'Failed to load data');
       } finally {
@@ -2,6 +2,7 @@ import { useEffect, useState } from 'react';
 import axios from 'axios';
 import { FaTrash, FaEdit, FaSpinner } from 'react-icons/fa';
 import { toast } from 'react-toastify';
+import { getAllPages } from '../../api/pagination';
 
 const API_URL = 'http://127.0.0.1:5000/api';
 
@@ -44,8 +45,7 @@ useEffect(() => {
 
 const fetchServices = async () => {
   try {
-    const res = await api.get('/salon/services'); // Adjust to your real endpoint
-    setServices(res.data);
+    setServices(await getAllPages(api, '/salon/services'));
   } catch (err) {
     toast.error('Failed to load services');
   }
@@ -55,8 +55,7 @@ const fetchServices = async () => {
   const fetchStylists = async () => {
     try {
       setLoading(true);
-      const res = await api.get('/stylist/stylists');
-      setStylists(res.data);
+      setStylists(await getAllPages(api, '/stylist/stylists'));
     } catch (err) {
       toast.error(err.response?.data?.error || 'Failed to load stylists');
     } finally {
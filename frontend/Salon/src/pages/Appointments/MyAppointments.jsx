@@ -1,6 +1,7 @@
 import { useContext, useEffect, useState } from 'react';
 import { AuthContext } from '../../context/AuthContext';
 import axios from '../../api/axios';
+import { getAllPages } from '../../api/pagination';
 
 const MyAppointments = () => {
   const { user } = useContext(AuthContext);
@@ -8,10 +9,10 @@ const MyAppointments = () => {
 
   useEffect(() => {
     const fetch = async () => {
-      const res = await axios.get(`/customer/customers/${user.id}/appointments`, {
+      const appointments = await getAllPages(axios, `/customer/customers/${user.id}/appointments`, {
         headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
       });
-      setAppointments(res.data);
+      setAppointments(appointments);
     };
     if (user) fetch();
   }, [user]);
@@ -23,6 +23,7 @@ import {
 } from 'react-icons/fa';
 import { FiLogOut } from 'react-icons/fi';
 import { toast } from 'react-toastify';
+import { getAllPages } from '../api/pagination';
 
 export default function CustomerDashboard() {
   const [activeTab, setActiveTab] = useState('services');
@@ -120,8 +121,7 @@ useEffect(() => {
 const loadServices = async () => {
   setLoading(prev => ({ ...prev, services: true }));
   try {
-    const response = await axios.get('http://127.0.0.1:5000/api/salon/services'); // Adjust baseURL if needed
-    setServices(response.data);
+    setServices(await getAllPages(axios, 'http://127.0.0.1:5000/api/salon/services'));
   } catch (err) {
     toast.error('Failed to load services');
     console.error(err);
@@ -134,14 +134,14 @@ const loadAppointments = async () => {
   setLoading(prev => ({ ...prev, appointments: true }));
   try {
       
-    const response = await axios.get(`http://127.0.0.1:5000/api/customer/customers/${user.id}/appointments`, {
+    const appointments = await getAllPages(axios, `http://127.0.0.1:5000/api/customer/customers/${user.id}/appointments`, {
       headers: {
         Authorization: `Bearer ${token}`
       }
     });
     
     // Transform data if needed
-    const transformedAppointments = response.data.map(app => ({
+    const transformedAppointments = appointments.map(app => ({
       ...app,
       // Ensure all date fields are strings
       appointment_date: app.appointment_date || null,
@@ -4,6 +4,7 @@ import { Link } from 'react-router-dom';
 import { FaScissors } from 'react-icons/fa6';
 import { FiCalendar, FiUser, FiMenu, FiX } from 'react-icons/fi';
 import { FaMapMarkerAlt, FaPhone, FaInstagram, FaFacebook, FaTwitter } from 'react-icons/fa';
+import { getAllPages } from '../api/pagination';
 
 const NavBar = () => {
   const [mobileMenuOpen, setMobileMenuOpen] = useState(false);
@@ -123,8 +124,7 @@ export default function Home() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const res = await axios.get('/salon/salons');
-        setSalons(res.data);
+        setSalons(await getAllPages(axios, '/salon/salons'));
       } catch (err) {
         console.error('Error fetching salons:', err);
       } finally {
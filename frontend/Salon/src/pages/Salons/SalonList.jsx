@@ -1,14 +1,14 @@
 import { useEffect, useState } from 'react';
 import axios from '../../api/axios';
 import { Link } from 'react-router-dom';
+import { getAllPages } from '../../api/pagination';
 
 const SalonList = () => {
   const [salons, setSalons] = useState([]);
 
   useEffect(() => {
     const fetchSalons = async () => {
-      const res = await axios.get('/salon/salons');
-      setSalons(res.data);
+      setSalons(await getAllPages(axios, '/salon/salons'));
     };
     fetchSalons();
   }, []);
@@ -15,6 +15,7 @@ import {
 } from 'react-icons/fa';
 import { FiLogOut } from 'react-icons/fi';
 import { toast } from 'react-toastify';
+import { getAllPages } from '../api/pagination';
 
 export default function StylistDashboard() {
   const [activeTab, setActiveTab] = useState('');
@@ -103,8 +104,7 @@ useEffect(() => {
 const loadServices = async () => {
   setLoading(prev => ({ ...prev, services: true }));
   try {
-    const response = await axios.get('http://127.0.0.1:5000/api/salon/services'); // Adjust baseURL if needed
-    setServices(response.data);
+    setServices(await getAllPages(axios, 'http://127.0.0.1:5000/api/salon/services'));
   } catch (err) {
     toast.error('Failed to load services');
     console.error(err);
@@ -117,14 +117,14 @@ const loadAppointments = async () => {
   setLoading(prev => ({ ...prev, appointments: true }));
   try {
       
-    const response = await axios.get(`http://127.0.0.1:5000/api/stylist/stylists/${user.stylist_id}/appointments`, {
+    const appointments = await getAllPages(axios, `http://127.0.0.1:5000/api/stylist/stylists/${user.stylist_id}/appointments`, {
       headers: {
         Authorization: `Bearer ${token}`
       }
     });
     
     // Transform data if needed
-    const transformedAppointments = response.data.map(app => ({
+    const transformedAppointments = appointments.map(app => ({
       ...app,
       // Ensure all date fields are strings
       appointment_date: app.appointment_date || null,